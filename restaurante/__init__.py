@@ -0,0 +1,58 @@
+#Pacote do sistema de pedidos do restaurante
+#Os nomes públicos são importados sob demanda: "import restaurante" não carrega o SQLAlchemy,
+#não cria a engine e não toca no banco; isso só acontece no primeiro uso
+
+import importlib
+
+_EXPORTACOES = {
+    "modelos": ["Base", "Categoria", "Prato", "Cliente", "Pedido", "ItemPedido", "VendaDiaria",
+                "ParticaoPedidos", "Alteracao", "ConsumidorAlteracoes"],
+    "banco": ["URL_BANCO", "PRAGMAS_PADRAO", "criar_engine", "configurar_banco", "obter_engine",
+              "unidade_de_trabalho"],
+    "cache": ["CacheLRU", "cache_cardapio", "obter_prato", "obter_categoria", "preco_prato",
+              "pratos_da_categoria", "estatisticas_cache"],
+    "crud": ["criar_categoria", "criar_prato", "criar_cliente", "criar_pedido", "criar_pedido_com_itens",
+             "ler_categoria", "ler_prato", "ler_cliente", "ler_pedido", "ler_clientes_por_telefone",
+             "ler_todos_clientes", "ler_todos_pratos", "ler_todas_categorias", "ler_todos_pedidos",
+             "iterar_clientes", "iterar_pratos", "iterar_categorias", "iterar_pedidos",
+             "atualizar_categoria", "atualizar_prato", "atualizar_cliente", "atualizar_pedido",
+             "excluir_categoria", "excluir_prato", "excluir_cliente", "excluir_pedido", "reajustar_precos",
+             "excluir_pedidos_anteriores", "ConflitoDeVersao", "RegistroEmUso"],
+    "lote": ["criar_pedidos_em_lote", "importar_pedidos", "gravar_pedidos"],
+    "consultas": ["consultar_todas_tabelas", "selecionar_pratos_por_preco", "projetar_clientes_nome_telefone",
+                  "linhas_clientes_pedidos", "junção_clientes_pedidos", "pratos_nao_pedidos",
+                  "diferença_pratos_nao_pedidos"],
+    "busca": ["buscar_pratos", "buscar_clientes"],
+    "analise": ["reconstruir_vendas_diarias", "receita_por_dia", "pratos_mais_vendidos", "receita_por_categoria"],
+    "migracao": ["migrar_banco", "verificar_planos_consulta"],
+    "particoes": ["arquivar_pedidos", "listar_particoes", "linhas_pedidos_periodo", "pratos_nao_pedidos_periodo"],
+    "instrumentacao": ["ativar_instrumentacao", "estatisticas_consultas", "imprimir_estatisticas",
+                       "salvar_estatisticas", "zerar_estatisticas"],
+    "colunar": ["exportar_colunar", "importar_colunar", "carregar_tabelas"],
+    "algebra": ["Tabela", "col", "carregar_relacoes", "conferir_algebra"],
+    "alteracoes": ["ler_alteracoes", "acompanhar_alteracoes", "confirmar_alteracoes", "registros_alterados",
+                   "registrar_consumidor", "remover_consumidor", "listar_consumidores", "posicao_consumidor",
+                   "compactar_alteracoes"],
+    "copias": ["copiar_banco", "restaurar_copia", "listar_copias"],
+    "benchmark": ["gerar_dados_sinteticos", "executar_benchmark", "comparar_leituras_por_id",
+                  "comparar_atualizacoes_concorrentes", "comparar_sincronizacao", "comparar_copias_sob_carga",
+                  "comparar_roteiro"],
+    "servico": ["ServidorPedidos", "servir"],
+    "roteiro": ["executar_roteiro"],
+    "cli": ["main", "executar_comando"],
+}
+
+_MODULO_DE = {nome: modulo for modulo, nomes in _EXPORTACOES.items() for nome in nomes}
+
+__all__ = sorted(_MODULO_DE)
+
+def __getattr__(nome):
+    modulo = _MODULO_DE.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nome)
+    globals()[nome] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,4 @@
+#Permite executar "python -m restaurante [comando]"
+from .cli import executar_comando
+
+raise SystemExit(executar_comando())
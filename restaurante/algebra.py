@@ -0,0 +1,677 @@
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from .analise import receita_por_dia
+from .banco import abrir_sessao
+from .colunar import carregar_tabelas
+from .modelos import Prato, Cliente
+from .particoes import linhas_pedidos_periodo, pratos_nao_pedidos_periodo
+
+#Álgebra relacional vetorizada (NumPy)
+#Os operadores montam um plano sem tocar nos dados; executar() carrega uma vez as tabelas usadas
+#(do banco ou de um diretório gerado por 'exportar') em arrays por coluna e avalia o plano inteiro.
+#- junção: hash por endereçamento direto quando a chave do lado direito é única e densa (o caso
+#  chave estrangeira -> chave primária); senão ordenação do lado direito e busca binária (searchsorted)
+#- diferença, união, distintos e agrupamento: cada linha vira um código inteiro (np.unique) e as
+#  operações de conjunto são feitas sobre os códigos (np.isin, reduceat)
+#- nulos seguem o SQL: não casam em junções, comparações com nulo não selecionam a linha e nas
+#  operações de conjunto e no agrupamento dois nulos são iguais
+#conferir_algebra() executa as operações do menu de álgebra relacional pelos dois caminhos e compara.
+
+#Relação materializada
+
+class Relacao:
+    def __init__(self, colunas, nulos=None):
+        self.colunas = dict(colunas)
+        self.nulos = {nome: mascara for nome, mascara in (nulos or {}).items()
+                      if nome in self.colunas and mascara.any()}
+
+    @property
+    def nomes(self):
+        return list(self.colunas)
+
+    def __len__(self):
+        return len(next(iter(self.colunas.values()))) if self.colunas else 0
+
+    def __repr__(self):
+        return f"<Relacao(colunas={self.nomes}, linhas={len(self)})>"
+
+    def valor(self, nome):
+        if nome not in self.colunas:
+            raise KeyError(f"coluna inexistente: {nome} (disponíveis: {', '.join(self.nomes)})")
+        return self.colunas[nome], self.nulos.get(nome)
+
+    def tomar(self, indices):
+        return Relacao({nome: array[indices] for nome, array in self.colunas.items()},
+                       {nome: mascara[indices] for nome, mascara in self.nulos.items()})
+
+    def linhas(self):
+        #Tuplas Python (None para nulos, datetime.date para datas), como as linhas do SQLAlchemy
+        listas = []
+        for nome, array in self.colunas.items():
+            valores = array.tolist()
+            mascara = self.nulos.get(nome)
+            if mascara is not None:
+                valores = [None if nulo else valor for valor, nulo in zip(valores, mascara.tolist())]
+            listas.append(valores)
+        return list(zip(*listas))
+
+#Expressões sobre colunas: avaliar() devolve (valores, máscara de nulos ou None)
+
+def _ou_nulos(*mascaras):
+    mascaras = [mascara for mascara in mascaras if mascara is not None]
+    return np.logical_or.reduce(mascaras) if mascaras else None
+
+class Termo:
+    __hash__ = None
+
+    def avaliar(self, relacao):
+        raise NotImplementedError
+
+    def __eq__(self, outro):
+        return Operacao(np.equal, self, outro)
+
+    def __ne__(self, outro):
+        return Operacao(np.not_equal, self, outro)
+
+    def __lt__(self, outro):
+        return Operacao(np.less, self, outro)
+
+    def __le__(self, outro):
+        return Operacao(np.less_equal, self, outro)
+
+    def __gt__(self, outro):
+        return Operacao(np.greater, self, outro)
+
+    def __ge__(self, outro):
+        return Operacao(np.greater_equal, self, outro)
+
+    def __add__(self, outro):
+        return Operacao(np.add, self, outro)
+
+    def __sub__(self, outro):
+        return Operacao(np.subtract, self, outro)
+
+    def __mul__(self, outro):
+        return Operacao(np.multiply, self, outro)
+
+    def __and__(self, outro):
+        return Logica("e", self, outro)
+
+    def __or__(self, outro):
+        return Logica("ou", self, outro)
+
+    def __invert__(self):
+        return Logica("nao", self)
+
+    def em(self, valores):
+        return Operacao(lambda array, _: np.isin(array, np.asarray(list(valores))), self, None)
+
+    def entre(self, minimo, maximo):
+        return (self >= minimo) & (self <= maximo)
+
+    def e_nulo(self):
+        return EhNulo(self)
+
+class Coluna(Termo):
+    def __init__(self, nome):
+        self.nome = nome
+
+    def avaliar(self, relacao):
+        return relacao.valor(self.nome)
+
+    def __repr__(self):
+        return self.nome
+
+class Literal(Termo):
+    def __init__(self, valor):
+        #Datas viram datetime64[D] para comparar com as colunas de data
+        self.valor = np.datetime64(valor, "D") if isinstance(valor, date) else valor
+
+    def avaliar(self, relacao):
+        return self.valor, None
+
+    def __repr__(self):
+        return repr(self.valor)
+
+def _termo(valor):
+    return valor if isinstance(valor, Termo) else Literal(valor)
+
+class Operacao(Termo):
+    def __init__(self, funcao, *operandos):
+        self.funcao = funcao
+        self.operandos = [_termo(operando) for operando in operandos]
+
+    def avaliar(self, relacao):
+        avaliados = [operando.avaliar(relacao) for operando in self.operandos]
+        return (self.funcao(*(valores for valores, _ in avaliados)),
+                _ou_nulos(*(nulos for _, nulos in avaliados)))
+
+    def __repr__(self):
+        return f"{getattr(self.funcao, '__name__', 'funcao')}({', '.join(map(repr, self.operandos))})"
+
+class Logica(Termo):
+    #Lógica de três valores do SQL
+    def __init__(self, operador, *operandos):
+        self.operador = operador
+        self.operandos = [_termo(operando) for operando in operandos]
+
+    def avaliar(self, relacao):
+        (a, nulo_a), *resto = [operando.avaliar(relacao) for operando in self.operandos]
+        a = np.asarray(a, dtype=bool)
+        nulo_a = np.zeros_like(a) if nulo_a is None else nulo_a
+        if self.operador == "nao":
+            return ~a & ~nulo_a, nulo_a
+        b, nulo_b = resto[0]
+        b = np.asarray(b, dtype=bool)
+        nulo_b = np.zeros_like(b) if nulo_b is None else nulo_b
+        if self.operador == "e":
+            falso = (~a & ~nulo_a) | (~b & ~nulo_b)
+            nulo = (nulo_a | nulo_b) & ~falso
+            return a & b & ~nulo, nulo
+        verdadeiro = (a & ~nulo_a) | (b & ~nulo_b)
+        return verdadeiro, (nulo_a | nulo_b) & ~verdadeiro
+
+    def __repr__(self):
+        return f"{self.operador}({', '.join(map(repr, self.operandos))})"
+
+class EhNulo(Termo):
+    def __init__(self, termo):
+        self.termo = termo
+
+    def avaliar(self, relacao):
+        valores, nulos = self.termo.avaliar(relacao)
+        return np.zeros(len(relacao), bool) if nulos is None else nulos, None
+
+    def __repr__(self):
+        return f"e_nulo({self.termo!r})"
+
+def col(nome):
+    return Coluna(nome)
+
+def _mascara(predicado, relacao):
+    valores, nulos = predicado.avaliar(relacao)
+    valores = np.broadcast_to(np.asarray(valores, dtype=bool), (len(relacao),))
+    return valores if nulos is None else valores & ~nulos
+
+def _coluna_calculada(termo, relacao):
+    valores, nulos = termo.avaliar(relacao)
+    return np.broadcast_to(np.asarray(valores), (len(relacao),)).copy(), nulos
+
+#Códigos de linha: linhas iguais (nas colunas dadas) recebem o mesmo inteiro, na ordem das colunas
+
+def _codigos(colunas):
+    #colunas: lista de (valores, nulos); nulos valem o mesmo valor entre si e ficam antes dos demais
+    codigos = None
+    for valores, nulos in colunas:
+        if nulos is not None and len(valores):
+            valores = np.where(nulos, valores[np.argmax(nulos)], valores)
+        partes = [valores] if nulos is None else [~nulos, valores]
+        for parte in partes:
+            distintos, inverso = np.unique(parte, return_inverse=True)
+            inverso = inverso.reshape(-1).astype(np.int64)
+            if codigos is None:
+                codigos = inverso
+            else:
+                _, codigos = np.unique(codigos * len(distintos) + inverso, return_inverse=True)
+                codigos = codigos.reshape(-1).astype(np.int64)
+    return codigos
+
+def _concatenar(relacoes):
+    #Concatena relações com o mesmo número de colunas (posicionalmente); os nomes vêm da primeira
+    nomes = relacoes[0].nomes
+    for relacao in relacoes[1:]:
+        if len(relacao.nomes) != len(nomes):
+            raise ValueError(f"relações com colunas diferentes: {nomes} e {relacao.nomes}")
+    colunas, nulos = {}, {}
+    for posicao, nome in enumerate(nomes):
+        partes = [relacao.valor(relacao.nomes[posicao]) for relacao in relacoes]
+        colunas[nome] = np.concatenate([valores for valores, _ in partes])
+        if any(mascara is not None for _, mascara in partes):
+            nulos[nome] = np.concatenate([np.zeros(len(valores), bool) if mascara is None else mascara
+                                          for valores, mascara in partes])
+    return Relacao(colunas, nulos)
+
+def _primeiras_ocorrencias(codigos):
+    _, primeiros = np.unique(codigos, return_index=True)
+    return np.sort(primeiros)
+
+#Junção
+
+def _lado_direito_denso(chaves):
+    #Tabela de endereçamento direto (chave - mínimo -> posição) quando as chaves são inteiros únicos
+    #em um intervalo não muito maior que a quantidade de linhas
+    if chaves.dtype.kind not in "iu" or not len(chaves):
+        return None
+    minimo, maximo = int(chaves.min()), int(chaves.max())
+    if maximo - minimo + 1 > 4 * len(chaves) + 1024:
+        return None
+    tabela = np.full(maximo - minimo + 1, -1, dtype=np.int64)
+    tabela[chaves - minimo] = np.arange(len(chaves))
+    if np.count_nonzero(tabela >= 0) != len(chaves):
+        return None
+    return minimo, tabela
+
+def _pares_juncao(chave_esquerda, chave_direita, externa):
+    #(índices à esquerda, índices à direita ou -1 sem correspondente), na ordem das linhas da esquerda
+    quantidade = len(chave_esquerda)
+    densa = _lado_direito_denso(chave_direita)
+    if densa is not None:
+        minimo, tabela = densa
+        deslocadas = chave_esquerda.astype(np.int64) - minimo
+        dentro = (deslocadas >= 0) & (deslocadas < len(tabela))
+        posicoes = np.full(quantidade, -1, dtype=np.int64)
+        posicoes[dentro] = tabela[deslocadas[dentro]]
+        if externa:
+            return np.arange(quantidade), posicoes
+        esquerda = np.flatnonzero(posicoes >= 0)
+        return esquerda, posicoes[esquerda]
+    ordem = np.argsort(chave_direita, kind="stable")
+    ordenadas = chave_direita[ordem]
+    inicio = np.searchsorted(ordenadas, chave_esquerda, "left")
+    contagem = np.searchsorted(ordenadas, chave_esquerda, "right") - inicio
+    saida = np.maximum(contagem, 1) if externa else contagem
+    esquerda = np.repeat(np.arange(quantidade), saida)
+    deslocamento = np.arange(len(esquerda)) - np.repeat(np.cumsum(saida) - saida, saida)
+    encontrados = np.repeat(contagem, saida) > 0
+    direita = np.full(len(esquerda), -1, dtype=np.int64)
+    direita[encontrados] = ordem[np.repeat(inicio, saida)[encontrados] + deslocamento[encontrados]]
+    return esquerda, direita
+
+def _juntar(esquerda, direita, chaves_esquerda, chaves_direita, externa):
+    partes_esquerda = [esquerda.valor(nome) for nome in chaves_esquerda]
+    partes_direita = [direita.valor(nome) for nome in chaves_direita]
+    if len(chaves_esquerda) == 1 and partes_esquerda[0][0].dtype.kind in "iu" \
+            and partes_direita[0][0].dtype.kind in "iu":
+        chave_esquerda, chave_direita = partes_esquerda[0][0], partes_direita[0][0]
+    else:
+        #Chaves compostas ou não inteiras: códigos comuns aos dois lados
+        codigos = _codigos([(np.concatenate([valores_e, valores_d]), None)
+                            for (valores_e, _), (valores_d, _) in zip(partes_esquerda, partes_direita)])
+        chave_esquerda, chave_direita = codigos[:len(esquerda)], codigos[len(esquerda):]
+    nulos_esquerda = _ou_nulos(*(nulos for _, nulos in partes_esquerda))
+    nulos_direita = _ou_nulos(*(nulos for _, nulos in partes_direita))
+    #Chaves nulas não casam com nada: a direita elas saem da tabela; a esquerda o par é desfeito
+    linhas_direita = np.arange(len(direita)) if nulos_direita is None else np.flatnonzero(~nulos_direita)
+    indices_esquerda, indices_direita = _pares_juncao(chave_esquerda, chave_direita[linhas_direita], externa)
+    indices_direita = np.where(indices_direita >= 0, linhas_direita[np.maximum(indices_direita, 0)]
+                               if len(linhas_direita) else -1, -1)
+    if nulos_esquerda is not None:
+        sem_par = nulos_esquerda[indices_esquerda]
+        if externa:
+            indices_direita[sem_par] = -1
+        else:
+            indices_esquerda, indices_direita = indices_esquerda[~sem_par], indices_direita[~sem_par]
+    resultado = esquerda.tomar(indices_esquerda)
+    sem_correspondente = indices_direita < 0
+    seguras = np.maximum(indices_direita, 0)
+    for nome, array in direita.colunas.items():
+        if nome in chaves_direita and chaves_esquerda[chaves_direita.index(nome)] == nome:
+            continue
+        destino = nome if nome not in resultado.colunas else f"{nome}_direita"
+        valores = array[seguras] if len(array) else np.zeros(len(seguras), array.dtype)
+        nulos = direita.nulos.get(nome)
+        nulos = nulos[seguras] if nulos is not None and len(array) else None
+        if sem_correspondente.any():
+            nulos = sem_correspondente if nulos is None else nulos | sem_correspondente
+        resultado.colunas[destino] = valores
+        if nulos is not None and nulos.any():
+            resultado.nulos[destino] = nulos
+    return resultado
+
+#Agrupamento
+
+AGREGACOES = ("contagem", "soma", "minimo", "maximo", "media")
+
+def _agregar(funcao, valores, nulos, ordem, limites):
+    if funcao == "contagem" and valores is None:
+        return np.diff(np.append(limites, len(ordem))), None
+    valores = np.asarray(valores)[ordem]
+    validos = np.ones(len(ordem), bool) if nulos is None else ~nulos[ordem]
+    contagem = np.add.reduceat(validos.astype(np.int64), limites) if len(ordem) else np.zeros(0, np.int64)
+    if funcao == "contagem":
+        return contagem, None
+    vazios = contagem == 0
+    data = valores.dtype.kind == "M"
+    if data:
+        valores = valores.view(np.int64)
+    if funcao in ("soma", "media"):
+        somas = np.add.reduceat(np.where(validos, valores, 0), limites) if len(ordem) else np.zeros(0, valores.dtype)
+        if funcao == "media":
+            return somas / np.maximum(contagem, 1), vazios
+        return somas, vazios
+    extremo = np.iinfo(np.int64) if valores.dtype.kind in "iu" else None
+    if funcao == "minimo":
+        neutro = extremo.max if extremo else np.inf
+        resultado = np.minimum.reduceat(np.where(validos, valores, neutro), limites)
+    else:
+        neutro = extremo.min if extremo else -np.inf
+        resultado = np.maximum.reduceat(np.where(validos, valores, neutro), limites)
+    if data:
+        resultado = resultado.view("datetime64[D]")
+    return resultado, vazios
+
+def _agrupar(relacao, chaves, agregados):
+    partes = [relacao.valor(chave) for chave in chaves]
+    #Os códigos já são densos e seguem a ordem das chaves: grupo i = código i
+    codigos = _codigos(partes) if chaves else np.zeros(len(relacao), np.int64)
+    ordem = np.argsort(codigos, kind="stable")
+    limites = np.flatnonzero(np.diff(codigos[ordem], prepend=-1)) if len(ordem) else np.zeros(0, np.int64)
+    resultado = relacao.tomar(ordem[limites]) if chaves else Relacao({})
+    resultado = Relacao({chave: resultado.colunas[chave] for chave in chaves},
+                        {chave: resultado.nulos[chave] for chave in chaves if chave in resultado.nulos})
+    for nome, (funcao, termo) in agregados.items():
+        if funcao not in AGREGACOES:
+            raise ValueError(f"agregação desconhecida: {funcao} (use {', '.join(AGREGACOES)})")
+        valores, nulos = (None, None) if termo is None else _coluna_calculada(_termo_coluna(termo), relacao)
+        valores, nulos = _agregar(funcao, valores, nulos, ordem, limites)
+        resultado.colunas[nome] = valores
+        if nulos is not None and nulos.any():
+            resultado.nulos[nome] = nulos
+    return resultado
+
+def _termo_coluna(termo):
+    return Coluna(termo) if isinstance(termo, str) else _termo(termo)
+
+#Planos
+
+class Plano:
+    filhos = ()
+
+    def selecionar(self, predicado):
+        return Selecao(self, predicado)
+
+    def projetar(self, *colunas, **calculadas):
+        return Projecao(self, colunas, calculadas)
+
+    def juntar(self, outro, esquerda, direita=None, externa=False):
+        return Juncao(self, outro, esquerda, direita or esquerda, externa)
+
+    def diferenca(self, outro):
+        return Diferenca(self, outro)
+
+    def uniao(self, outro):
+        return Uniao(self, outro)
+
+    def distintos(self):
+        return Distintos(self)
+
+    def agrupar(self, chaves, **agregados):
+        return Agrupamento(self, chaves, agregados)
+
+    def ordenar(self, *colunas, decrescente=False):
+        return Ordenacao(self, colunas, decrescente)
+
+    def limitar(self, quantidade):
+        return Limite(self, quantidade)
+
+    def tabelas(self):
+        return set().union(*(filho.tabelas() for filho in self.filhos))
+
+    def explicar(self, nivel=0):
+        linhas = ["  " * nivel + self.descricao()]
+        for filho in self.filhos:
+            linhas.append(filho.explicar(nivel + 1))
+        return "\n".join(linhas)
+
+    def descricao(self):
+        return type(self).__name__
+
+    def executar(self, origem=None, relacoes=None):
+        #Carrega as tabelas usadas (ou usa relacoes já carregadas por carregar_relacoes) e avalia o plano;
+        #um subplano usado em dois lugares é avaliado uma vez
+        if relacoes is None:
+            relacoes = carregar_relacoes(self.tabelas(), origem)
+        return self._avaliar(relacoes, {})
+
+    def _avaliar(self, relacoes, memoria):
+        chave = id(self)
+        if chave not in memoria:
+            memoria[chave] = self._calcular(relacoes, [filho._avaliar(relacoes, memoria) for filho in self.filhos])
+        return memoria[chave]
+
+class Tabela(Plano):
+    def __init__(self, nome):
+        self.nome = nome
+
+    def tabelas(self):
+        return {self.nome}
+
+    def descricao(self):
+        return f"Tabela({self.nome})"
+
+    def _calcular(self, relacoes, entradas):
+        return relacoes[self.nome]
+
+class Selecao(Plano):
+    def __init__(self, filho, predicado):
+        self.filhos = (filho,)
+        self.predicado = predicado
+
+    def descricao(self):
+        return f"Selecao({self.predicado!r})"
+
+    def _calcular(self, relacoes, entradas):
+        return entradas[0].tomar(_mascara(self.predicado, entradas[0]))
+
+class Projecao(Plano):
+    def __init__(self, filho, colunas, calculadas):
+        self.filhos = (filho,)
+        self.colunas = colunas
+        self.calculadas = calculadas
+
+    def descricao(self):
+        return f"Projecao({', '.join(list(self.colunas) + list(self.calculadas))})"
+
+    def _calcular(self, relacoes, entradas):
+        relacao = entradas[0]
+        colunas, nulos = {}, {}
+        for nome in self.colunas:
+            colunas[nome], mascara = relacao.valor(nome)
+            if mascara is not None:
+                nulos[nome] = mascara
+        for nome, termo in self.calculadas.items():
+            colunas[nome], mascara = _coluna_calculada(_termo_coluna(termo), relacao)
+            if mascara is not None:
+                nulos[nome] = mascara
+        return Relacao(colunas, nulos)
+
+class Juncao(Plano):
+    def __init__(self, esquerda, direita, chaves_esquerda, chaves_direita, externa):
+        self.filhos = (esquerda, direita)
+        self.chaves_esquerda = [chaves_esquerda] if isinstance(chaves_esquerda, str) else list(chaves_esquerda)
+        self.chaves_direita = [chaves_direita] if isinstance(chaves_direita, str) else list(chaves_direita)
+        if len(self.chaves_esquerda) != len(self.chaves_direita):
+            raise ValueError("a junção precisa do mesmo número de chaves dos dois lados")
+        self.externa = externa
+
+    def descricao(self):
+        tipo = "externa à esquerda" if self.externa else "interna"
+        return f"Juncao {tipo}({self.chaves_esquerda} = {self.chaves_direita})"
+
+    def _calcular(self, relacoes, entradas):
+        return _juntar(entradas[0], entradas[1], self.chaves_esquerda, self.chaves_direita, self.externa)
+
+class Diferenca(Plano):
+    def __init__(self, esquerda, direita):
+        self.filhos = (esquerda, direita)
+
+    def _calcular(self, relacoes, entradas):
+        esquerda, direita = entradas
+        juntas = _concatenar([esquerda, direita])
+        codigos = _codigos([juntas.valor(nome) for nome in juntas.nomes])
+        codigos_esquerda = codigos[:len(esquerda)]
+        restantes = np.flatnonzero(~np.isin(codigos_esquerda, codigos[len(esquerda):]))
+        return esquerda.tomar(restantes[_primeiras_ocorrencias(codigos_esquerda[restantes])])
+
+class Uniao(Plano):
+    def __init__(self, esquerda, direita):
+        self.filhos = (esquerda, direita)
+
+    def _calcular(self, relacoes, entradas):
+        juntas = _concatenar(entradas)
+        return juntas.tomar(_primeiras_ocorrencias(_codigos([juntas.valor(nome) for nome in juntas.nomes])))
+
+class Distintos(Plano):
+    def __init__(self, filho):
+        self.filhos = (filho,)
+
+    def _calcular(self, relacoes, entradas):
+        relacao = entradas[0]
+        return relacao.tomar(_primeiras_ocorrencias(_codigos([relacao.valor(nome) for nome in relacao.nomes])))
+
+class Agrupamento(Plano):
+    #agregados: nome=(função, coluna ou expressão); ("contagem", None) conta as linhas do grupo
+    def __init__(self, filho, chaves, agregados):
+        self.filhos = (filho,)
+        self.chaves = [chaves] if isinstance(chaves, str) else list(chaves)
+        self.agregados = agregados
+
+    def descricao(self):
+        return f"Agrupamento({self.chaves}: {', '.join(self.agregados)})"
+
+    def _calcular(self, relacoes, entradas):
+        return _agrupar(entradas[0], self.chaves, self.agregados)
+
+class Ordenacao(Plano):
+    def __init__(self, filho, colunas, decrescente):
+        self.filhos = (filho,)
+        self.colunas = colunas
+        self.decrescente = decrescente
+
+    def descricao(self):
+        return f"Ordenacao({', '.join(self.colunas)}{' desc' if self.decrescente else ''})"
+
+    def _calcular(self, relacoes, entradas):
+        relacao = entradas[0]
+        if not len(relacao):
+            return relacao
+        #Nulos primeiro, como no SQLite; np.lexsort usa a última chave como principal. Colunas numéricas
+        #sem nulos entram direto; as demais são trocadas pelo código (posto) de cada valor
+        postos = []
+        for nome in self.colunas:
+            valores, nulos = relacao.valor(nome)
+            if nulos is None and valores.dtype.kind in "iuM":
+                posto = valores.view(np.int64) if valores.dtype.kind == "M" else valores
+            else:
+                posto = _codigos([(valores, nulos)])
+            postos.append(-posto if self.decrescente else posto)
+        return relacao.tomar(np.lexsort(postos[::-1]))
+
+class Limite(Plano):
+    def __init__(self, filho, quantidade):
+        self.filhos = (filho,)
+        self.quantidade = quantidade
+
+    def descricao(self):
+        return f"Limite({self.quantidade})"
+
+    def _calcular(self, relacoes, entradas):
+        return entradas[0].tomar(slice(0, self.quantidade))
+
+def carregar_relacoes(nomes, origem=None):
+    #Tabelas em memória para executar vários planos sem recarregar
+    #Datas nulas chegam como NaT e ganham uma máscara como as demais colunas
+    relacoes = {}
+    for nome, (colunas, nulos) in carregar_tabelas(sorted(nomes), origem).items():
+        nulos = dict(nulos)
+        for coluna, array in colunas.items():
+            if array.dtype.kind == "M":
+                nulos[coluna] = np.isnat(array)
+        relacoes[nome] = Relacao(colunas, nulos)
+    return relacoes
+
+#As operações do menu de álgebra relacional como planos
+
+def plano_pratos_por_preco(preco_minimo):
+    return Tabela("pratos").selecionar(col("preco") >= preco_minimo)
+
+def plano_clientes_nome_telefone():
+    return Tabela("clientes").projetar("nome_cliente", "telefone")
+
+def plano_clientes_pedidos(data_inicio=None, data_fim=None):
+    #Seleção aplicada aos pedidos e projeção de clientes e pratos antes das junções: cada operador
+    #materializa as colunas que recebe, então menos colunas significa menos cópias
+    pedidos = Tabela("pedidos")
+    if data_inicio is not None:
+        pedidos = pedidos.selecionar(col("data_pedido") >= data_inicio)
+    if data_fim is not None:
+        pedidos = pedidos.selecionar(col("data_pedido") <= data_fim)
+    return (Tabela("itens_pedido")
+            .juntar(pedidos, "id_pedido")
+            .juntar(Tabela("clientes").projetar("id_cliente", "nome_cliente"), "id_cliente", externa=True)
+            .juntar(Tabela("pratos").projetar("id_prato", "nome_prato"), "id_prato", externa=True)
+            .ordenar("data_pedido", "id_pedido", "id_item")
+            .projetar("id_pedido", "nome_cliente", "nome_prato", "quantidade", "data_pedido"))
+
+def plano_pratos_nao_pedidos(dias=None, referencia=None):
+    itens = Tabela("itens_pedido")
+    if dias is not None:
+        inicio = (referencia or date.today()) - timedelta(days=dias)
+        itens = itens.juntar(Tabela("pedidos").selecionar(col("data_pedido") > inicio), "id_pedido")
+    return (Tabela("pratos").projetar("id_prato")
+            .diferenca(itens.projetar("id_prato"))
+            .juntar(Tabela("pratos").projetar("id_prato", "nome_prato"), "id_prato")
+            .ordenar("id_prato"))
+
+def plano_receita_por_dia(data_inicio=None, data_fim=None):
+    pedidos = Tabela("pedidos")
+    if data_inicio is not None:
+        pedidos = pedidos.selecionar(col("data_pedido") >= data_inicio)
+    if data_fim is not None:
+        pedidos = pedidos.selecionar(col("data_pedido") <= data_fim)
+    return (Tabela("itens_pedido")
+            .juntar(pedidos.selecionar(~col("data_pedido").e_nulo()), "id_pedido")
+            .agrupar("data_pedido", qtd=("soma", "quantidade"),
+                     receita=("soma", col("quantidade") * col("preco_unitario"))))
+
+#Conferência com o SQL
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+def conferir_algebra(origem=None, preco_minimo=30, dias=30, data_inicio=None, data_fim=None, referencia=None):
+    #Executa cada operação pelo motor vetorizado e pelo SQL (incluindo as partições arquivadas) e compara
+    #as linhas; com origem, os dados do motor vêm de um diretório exportado
+    try:
+        referencia = referencia or date.today()
+        relacoes, carga = _medir(lambda: carregar_relacoes(
+            {"categorias", "pratos", "clientes", "pedidos", "itens_pedido"}, origem))
+        print(f"Tabelas carregadas em {carga * 1000:.0f} ms: "
+              + ", ".join(f"{len(relacao)} {nome}" for nome, relacao in relacoes.items()))
+
+        def sql(consulta):
+            with abrir_sessao() as session:
+                return [tuple(linha) for linha in session.execute(consulta)]
+
+        inicio_dias = referencia - timedelta(days=dias) + timedelta(days=1)
+        verificacoes = [
+            ("seleção", plano_pratos_por_preco(preco_minimo), True,
+             lambda: sql(select(Prato.id_prato, Prato.nome_prato, Prato.preco, Prato.id_categoria)
+                         .where(Prato.preco >= preco_minimo))),
+            ("projeção", plano_clientes_nome_telefone(), True,
+             lambda: sql(select(Cliente.nome_cliente, Cliente.telefone))),
+            ("junção", plano_clientes_pedidos(data_inicio, data_fim), False,
+             lambda: [tuple(linha) for linha in linhas_pedidos_periodo(data_inicio, data_fim)]),
+            ("diferença", plano_pratos_nao_pedidos(dias, referencia), False,
+             lambda: [tuple(linha) for linha in pratos_nao_pedidos_periodo(inicio_dias)]),
+            ("agrupamento", plano_receita_por_dia(data_inicio, data_fim), False,
+             lambda: [tuple(linha) for linha in receita_por_dia(data_inicio, data_fim)]),
+        ]
+        todas_iguais = True
+        for nome, plano, sem_ordem, executar_sql in verificacoes:
+            vetorizado, tempo_vetorizado = _medir(lambda: plano.executar(relacoes=relacoes))
+            esperado, tempo_sql = _medir(executar_sql)
+            obtido = vetorizado.linhas()
+            iguais = sorted(obtido) == sorted(esperado) if sem_ordem else obtido == esperado
+            todas_iguais = todas_iguais and iguais
+            print(f"{nome}: {'OK' if iguais else 'DIVERGENTE'} ({len(obtido)} linhas; vetorizado "
+                  f"{tempo_vetorizado * 1000:.1f} ms, SQL {tempo_sql * 1000:.1f} ms)")
+        return todas_iguais
+    except Exception as e:
+        print(f"Erro ao conferir a álgebra vetorizada: {e}")
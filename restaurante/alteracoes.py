@@ -0,0 +1,140 @@
+import time
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert
+
+from .banco import abrir_sessao, confirmar, desfazer
+from .lote import linhas_por_id
+from .modelos import Alteracao, ConsumidorAlteracoes, TABELAS_RASTREADAS
+
+#Consumo incremental do registro de alterações (change data capture)
+#Os gatilhos criados em modelos.py acrescentam (seq, tabela, id_registro, operacao, versao) a cada inclusão,
+#alteração ou exclusão. Um consumidor (tela da cozinha, exportação contábil) guarda em consumidores_alteracoes
+#a última seq processada e lê apenas o que veio depois, em lotes: o custo acompanha o volume de alterações,
+#não o tamanho das tabelas. O SQLite tem um único escritor por vez, então as seq são atribuídas na ordem dos
+#commits e um lote nunca pula uma alteração que ainda vai ser confirmada.
+#A entrega é "pelo menos uma vez": a posição só avança depois que o lote foi processado, então após uma falha
+#um lote pode ser entregue de novo (a versão permite descartar o que já foi aplicado).
+#compactar_alteracoes apaga as alterações já confirmadas por todos os consumidores registrados.
+
+LOTE_ALTERACOES = 500
+_MODELO_DA_TABELA = {modelo.__tablename__: modelo for modelo in TABELAS_RASTREADAS}
+
+def ultima_alteracao(session):
+    #Maior seq já atribuída, mesmo que a compactação tenha apagado a linha (sqlite_sequence)
+    return session.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'alteracoes'")).scalar() or 0
+
+def _primeira_disponivel(session):
+    primeira = session.execute(select(func.min(Alteracao.seq))).scalar()
+    return primeira if primeira is not None else ultima_alteracao(session) + 1
+
+def posicao_consumidor(nome):
+    #Consumidores ainda não registrados começam do início do registro
+    with abrir_sessao() as session:
+        return session.execute(select(ConsumidorAlteracoes.posicao)
+                               .where(ConsumidorAlteracoes.nome == nome)).scalar() or 0
+
+def ler_alteracoes(apos=0, limite=LOTE_ALTERACOES, tabelas=None):
+    #Alterações com seq maior que apos, em ordem; lança ValueError se parte delas já foi compactada.
+    #operacao: I, A e E (inclusão, alteração, exclusão), M (pedido arquivado: saiu do banco principal, mas
+    #continua no histórico, não deve ser apagado pelo consumidor) e R (tabela recarregada: releia-a inteira)
+    with abrir_sessao() as session:
+        consulta = select(Alteracao).where(Alteracao.seq > apos).order_by(Alteracao.seq).limit(limite)
+        if tabelas:
+            consulta = consulta.where(Alteracao.tabela.in_(tabelas))
+        alteracoes = session.execute(consulta).scalars().all()
+        primeira = _primeira_disponivel(session)
+        if apos + 1 < primeira:
+            raise ValueError(f"as alterações até {primeira - 1} já foram compactadas; "
+                             "recarregue as tabelas e registre o consumidor novamente")
+        return alteracoes
+
+def confirmar_alteracoes(nome, ate):
+    #A posição nunca recua: confirmar de novo um lote antigo não faz nada
+    with abrir_sessao() as session:
+        try:
+            instrucao = insert(ConsumidorAlteracoes).values(nome=nome, posicao=ate)
+            session.execute(instrucao.on_conflict_do_update(
+                index_elements=[ConsumidorAlteracoes.nome],
+                set_={"posicao": func.max(ConsumidorAlteracoes.posicao, instrucao.excluded.posicao)}))
+            confirmar(session)
+        except Exception as e:
+            desfazer(session, e)
+            raise
+
+def registrar_consumidor(nome, posicao=None):
+    #Sem posição, o consumidor começa na última alteração: usado depois de ler as tabelas inteiras
+    with abrir_sessao() as session:
+        try:
+            if posicao is None:
+                posicao = ultima_alteracao(session)
+            session.merge(ConsumidorAlteracoes(nome=nome, posicao=posicao))
+            confirmar(session)
+            print(f"Consumidor {nome} registrado na alteração {posicao}.")
+            return posicao
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao registrar consumidor: {e}")
+
+def remover_consumidor(nome):
+    with abrir_sessao() as session:
+        try:
+            removidos = session.execute(delete(ConsumidorAlteracoes)
+                                        .where(ConsumidorAlteracoes.nome == nome)).rowcount
+            confirmar(session)
+            return removidos > 0
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao remover consumidor: {e}")
+
+def listar_consumidores():
+    with abrir_sessao() as session:
+        return session.execute(select(ConsumidorAlteracoes).order_by(ConsumidorAlteracoes.nome)).scalars().all()
+
+def acompanhar_alteracoes(nome, limite=LOTE_ALTERACOES, tabelas=None, intervalo=None):
+    #Gera lotes de alterações a partir da posição salva do consumidor. O lote é confirmado quando o próximo
+    #é pedido (ou o laço termina normalmente); sem intervalo para quando não há mais nada, com intervalo
+    #continua consultando a cada intervalo segundos
+    posicao = posicao_consumidor(nome)
+    while True:
+        alteracoes = ler_alteracoes(posicao, limite, tabelas)
+        if not alteracoes:
+            if intervalo is None:
+                return
+            time.sleep(intervalo)
+            continue
+        yield alteracoes
+        posicao = alteracoes[-1].seq
+        confirmar_alteracoes(nome, posicao)
+
+def registros_alterados(alteracoes):
+    #Estado atual dos registros citados em um lote, com uma consulta IN por tabela:
+    #{(tabela, id_registro): linha}, sem as chaves de registros que não existem mais
+    ids = {}
+    for alteracao in alteracoes:
+        if alteracao.id_registro is not None:
+            ids.setdefault(alteracao.tabela, set()).add(alteracao.id_registro)
+    registros = {}
+    with abrir_sessao() as session:
+        for tabela, ids_tabela in ids.items():
+            chave = _MODELO_DA_TABELA[tabela].__mapper__.primary_key[0]
+            colunas = [coluna for coluna in chave.table.columns if coluna is not chave]
+            for id_registro, linha in linhas_por_id(session, chave, ids_tabela, *colunas).items():
+                registros[(tabela, id_registro)] = linha
+    return registros
+
+def compactar_alteracoes():
+    #Apaga as alterações já confirmadas por todos os consumidores registrados; sem consumidores não apaga nada
+    with abrir_sessao() as session:
+        try:
+            posicao = session.execute(select(func.min(ConsumidorAlteracoes.posicao))).scalar()
+            if posicao is None:
+                print("Nenhum consumidor registrado; nada foi compactado.")
+                return 0
+            removidas = session.execute(delete(Alteracao).where(Alteracao.seq <= posicao)).rowcount
+            confirmar(session)
+            print(f"{removidas} alterações compactadas (até a seq {posicao}).")
+            return removidas
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao compactar alterações: {e}")
@@ -0,0 +1,120 @@
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .banco import abrir_sessao, confirmar, desfazer
+from .cache import obter_prato
+from .modelos import Categoria, Prato, Pedido, ItemPedido, VendaDiaria, preencher_vendas_diarias
+
+#Análise de vendas
+#vendas_diarias guarda, por dia e prato, a quantidade vendida e a receita. Ela é atualizada na mesma
+#transação que grava os pedidos: criar_pedido, criar_pedido_com_itens, criar_pedidos_em_lote,
+#atualizar_pedido, excluir_pedido, excluir_cliente e excluir_pedidos_anteriores.
+#Os relatórios abaixo leem só esse resumo, sem percorrer os pedidos.
+#A receita usa o preço gravado em cada item do pedido.
+#reconstruir_vendas_diarias recalcula o resumo a partir de uma data (marca d'água).
+
+def acumular_venda(vendas, data, id_prato, qtd, receita, id_categoria=None):
+    qtd_atual, receita_atual, categoria = vendas.get((data, id_prato), (0, 0, None))
+    vendas[(data, id_prato)] = (qtd_atual + qtd, receita_atual + receita, categoria or id_categoria)
+    return vendas
+
+def vendas_dos_itens(session, data_pedido, itens, sinal=1, vendas=None):
+    #itens: objetos ItemPedido; sinal -1 desfaz as vendas de um pedido alterado ou excluído
+    vendas = {} if vendas is None else vendas
+    for item in itens:
+        prato = obter_prato(item.id_prato) or session.get(Prato, item.id_prato)
+        acumular_venda(vendas, data_pedido, item.id_prato, sinal * item.quantidade,
+                       sinal * item.quantidade * item.preco_unitario,
+                       prato.id_categoria if prato is not None else None)
+    return vendas
+
+def registrar_vendas(session, vendas):
+    #vendas: {(data, id_prato): (qtd, receita, id_categoria)}; valores negativos desfazem vendas
+    linhas = [
+        {"data": data, "id_prato": id_prato, "id_categoria": id_categoria, "qtd": qtd, "receita": receita}
+        for (data, id_prato), (qtd, receita, id_categoria) in vendas.items()
+        if data is not None and id_prato is not None and (qtd or receita)
+    ]
+    if not linhas:
+        return
+    #Na tabela (Core): com a entidade, o executemany passaria pelo caminho em massa do ORM, bem mais lento
+    tabela = VendaDiaria.__table__
+    upsert = sqlite_insert(tabela)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[tabela.c.data, tabela.c.id_prato],
+        set_={
+            "qtd": tabela.c.qtd + upsert.excluded.qtd,
+            "receita": tabela.c.receita + upsert.excluded.receita,
+            "id_categoria": func.coalesce(upsert.excluded.id_categoria, tabela.c.id_categoria),
+        },
+    )
+    session.execute(upsert, linhas)
+    if any(linha["qtd"] < 0 for linha in linhas):
+        session.execute(delete(VendaDiaria).where(VendaDiaria.qtd <= 0))
+
+def descontar_vendas(session, *condicoes):
+    #Desfaz no resumo as vendas dos pedidos que atendem às condições, antes de excluí-los em massa:
+    #um único UPDATE ... FROM com o agregado por dia e prato, sem carregar pedidos na sessão
+    removidas = (select(Pedido.data_pedido.label("data"), ItemPedido.id_prato,
+                        func.sum(ItemPedido.quantidade).label("qtd"),
+                        func.sum(ItemPedido.quantidade * ItemPedido.preco_unitario).label("receita"))
+                 .join(ItemPedido.pedido)
+                 .where(*condicoes)
+                 .group_by(Pedido.data_pedido, ItemPedido.id_prato)
+                 .subquery())
+    descontadas = session.execute(
+        update(VendaDiaria)
+        .where(VendaDiaria.data == removidas.c.data, VendaDiaria.id_prato == removidas.c.id_prato)
+        .values(qtd=VendaDiaria.qtd - removidas.c.qtd, receita=VendaDiaria.receita - removidas.c.receita)
+        .execution_options(synchronize_session=False)).rowcount
+    if descontadas:
+        session.execute(delete(VendaDiaria).where(VendaDiaria.qtd <= 0))
+    return descontadas
+
+def reconstruir_vendas_diarias(desde=None):
+    with abrir_sessao() as session:
+        try:
+            preencher_vendas_diarias(session, desde)
+            confirmar(session)
+            print("Resumo de vendas reconstruído" + (f" a partir de {desde}." if desde else "."))
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao reconstruir resumo de vendas: {e}")
+
+def _filtrar_periodo(consulta, data_inicio, data_fim):
+    if data_inicio is not None:
+        consulta = consulta.where(VendaDiaria.data >= data_inicio)
+    if data_fim is not None:
+        consulta = consulta.where(VendaDiaria.data <= data_fim)
+    return consulta
+
+def receita_por_dia(data_inicio=None, data_fim=None):
+    consulta = (select(VendaDiaria.data, func.sum(VendaDiaria.qtd).label("qtd"),
+                       func.sum(VendaDiaria.receita).label("receita"))
+                .group_by(VendaDiaria.data)
+                .order_by(VendaDiaria.data))
+    with abrir_sessao() as session:
+        return session.execute(_filtrar_periodo(consulta, data_inicio, data_fim)).all()
+
+def pratos_mais_vendidos(limite=10, data_inicio=None, data_fim=None):
+    vendas = _filtrar_periodo(
+        select(VendaDiaria.id_prato, func.sum(VendaDiaria.qtd).label("qtd"),
+               func.sum(VendaDiaria.receita).label("receita"))
+        .group_by(VendaDiaria.id_prato), data_inicio, data_fim).subquery()
+    consulta = (select(vendas.c.id_prato, Prato.nome_prato, vendas.c.qtd, vendas.c.receita)
+                .outerjoin(Prato, Prato.id_prato == vendas.c.id_prato)
+                .order_by(vendas.c.qtd.desc(), vendas.c.receita.desc())
+                .limit(limite))
+    with abrir_sessao() as session:
+        return session.execute(consulta).all()
+
+def receita_por_categoria(data_inicio=None, data_fim=None):
+    vendas = _filtrar_periodo(
+        select(VendaDiaria.id_categoria, func.sum(VendaDiaria.qtd).label("qtd"),
+               func.sum(VendaDiaria.receita).label("receita"))
+        .group_by(VendaDiaria.id_categoria), data_inicio, data_fim).subquery()
+    consulta = (select(vendas.c.id_categoria, Categoria.nome_categoria, vendas.c.qtd, vendas.c.receita)
+                .outerjoin(Categoria, Categoria.id_categoria == vendas.c.id_categoria)
+                .order_by(vendas.c.receita.desc()))
+    with abrir_sessao() as session:
+        return session.execute(consulta).all()
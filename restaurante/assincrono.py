@@ -0,0 +1,306 @@
+#Camada assíncrona (sqlalchemy.ext.asyncio + aiosqlite) para receber pedidos de muitos clientes ao mesmo tempo
+#As leituras usam um pool limitado de conexões. Todas as gravações de pedidos passam por um único
+#escritor: chamadas concorrentes de criar_pedido entram em uma fila e são gravadas em grupos,
+#com um commit por grupo em vez de um por pedido.
+#Requer o pacote aiosqlite, carregado apenas quando a engine assíncrona é criada.
+
+import asyncio
+import random
+import time
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .analise import descontar_vendas, registrar_vendas, vendas_dos_itens
+from .banco import Session, configurar_banco, instalar_pragmas
+from .cache import invalidar_cardapio
+from .consultas import consulta_pratos_por_preco, consulta_clientes_pedidos, consulta_pratos_nao_pedidos
+from .crud import RegistroEmUso, _atualizar_por_id, _informados, alterar_pedido
+from .lote import gravar_pedidos
+from .modelos import Categoria, Prato, Cliente, Pedido
+
+URL_BANCO_ASSINCRONO = 'sqlite+aiosqlite:///banco_restaurante.db'
+TAMANHO_POOL_ASSINCRONO = 5
+TAMANHO_GRUPO_ESCRITA = 500
+
+def criar_engine_assincrona(url=URL_BANCO_ASSINCRONO, tamanho_pool=TAMANHO_POOL_ASSINCRONO, echo=False, **pragmas):
+    engine = create_async_engine(url, echo=echo, poolclass=AsyncAdaptedQueuePool,
+                                 pool_size=tamanho_pool, max_overflow=0)
+    instalar_pragmas(engine.sync_engine, **pragmas)
+    return engine
+
+_engine = None
+_sessoes = None
+_escritor = None
+_trava = asyncio.Lock()
+
+async def configurar_banco_assincrono(url=URL_BANCO_ASSINCRONO, tamanho_pool=TAMANHO_POOL_ASSINCRONO,
+                                      tamanho_grupo=TAMANHO_GRUPO_ESCRITA, echo=False, **pragmas):
+    global _engine, _sessoes, _escritor
+    await encerrar()
+    engine = criar_engine_assincrona(url, tamanho_pool, echo, **pragmas)
+    #Preços e categorias dos pratos vêm do cache do cardápio, que lê pelo engine síncrono: ele passa a
+    #apontar para o mesmo arquivo (e prepara o esquema dele), senão as consultas iriam para o banco padrão
+    #do diretório atual
+    configurar_banco(engine.url.set(drivername="sqlite"), echo, **pragmas)
+    _engine = engine
+    #A classe das sessões síncronas é a de banco.Session, para que o cache do cardápio seja invalidado no commit
+    _sessoes = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=Session.class_)
+    _escritor = EscritorPedidos(_sessoes, tamanho_grupo)
+    return engine
+
+async def _obter_sessoes():
+    if _sessoes is None:
+        async with _trava:
+            if _sessoes is None:
+                await configurar_banco_assincrono()
+    return _sessoes
+
+async def encerrar():
+    #Grava os pedidos que ainda estão na fila e fecha as conexões
+    global _engine, _sessoes, _escritor
+    if _escritor is not None:
+        await _escritor.encerrar()
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = _sessoes = _escritor = None
+
+#Escritor único com commit em grupo
+
+class EscritorPedidos:
+    def __init__(self, sessoes, tamanho_grupo=TAMANHO_GRUPO_ESCRITA):
+        self.tamanho_grupo = tamanho_grupo
+        self.grupos = 0
+        self.pedidos = 0
+        self._sessoes = sessoes
+        self._fila = asyncio.Queue()
+        self._tarefa = None
+
+    async def enviar(self, id_cliente, id_prato, data_pedido):
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.get_running_loop().create_task(self._executar())
+        futuro = asyncio.get_running_loop().create_future()
+        await self._fila.put(((id_cliente, id_prato, data_pedido), futuro))
+        return await futuro
+
+    async def _executar(self):
+        while True:
+            #Enquanto um grupo é gravado, os pedidos seguintes se acumulam na fila e formam o próximo
+            grupo = [await self._fila.get()]
+            while len(grupo) < self.tamanho_grupo and not self._fila.empty():
+                grupo.append(self._fila.get_nowait())
+            try:
+                await self._gravar(grupo)
+            finally:
+                for _ in grupo:
+                    self._fila.task_done()
+
+    async def _gravar(self, grupo):
+        try:
+            async with self._sessoes() as session:
+                resultados = await session.run_sync(gravar_pedidos, [pedido for pedido, _ in grupo])
+                await session.commit()
+        except Exception as e:
+            for _, futuro in grupo:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        self.grupos += 1
+        self.pedidos += len(grupo)
+        for (_, futuro), resultado in zip(grupo, resultados):
+            if futuro.done():
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    async def encerrar(self):
+        if self._tarefa is not None and not self._tarefa.done():
+            await self._fila.join()
+            self._tarefa.cancel()
+        self._tarefa = None
+
+#Operações CRUD assíncronas: retornam os dados em vez de imprimir e sinalizam erros com ValueError.
+#Gravações em categorias e pratos chamam invalidar_cardapio na transação, como na versão síncrona: o cache
+#(inclusive pratos_da_categoria e os ETags do serviço) é limpo de novo quando ela termina
+_CARDAPIO = (Categoria, Prato)
+
+async def _criar(objeto):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        session.add(objeto)
+        if isinstance(objeto, _CARDAPIO):
+            invalidar_cardapio(session.sync_session)
+        await session.commit()
+    return objeto
+
+async def criar_categoria(nome_categoria):
+    categoria = await _criar(Categoria(nome_categoria=nome_categoria))
+    return categoria.id_categoria
+
+async def criar_prato(nome_prato, preco, id_categoria):
+    if await ler_categoria(id_categoria) is None:
+        raise ValueError(f"Categoria com ID {id_categoria} não encontrada. Não é possível criar o prato.")
+    prato = await _criar(Prato(nome_prato=nome_prato, preco=preco, id_categoria=id_categoria))
+    return prato.id_prato
+
+async def criar_cliente(nome_cliente, telefone):
+    cliente = await _criar(Cliente(nome_cliente=nome_cliente, telefone=telefone))
+    return cliente.id_cliente
+
+async def criar_pedido(id_cliente, id_prato, data_pedido):
+    await _obter_sessoes()
+    return await _escritor.enviar(id_cliente, id_prato, data_pedido)
+
+async def _ler(modelo, id_registro, opcoes=()):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        return await session.get(modelo, id_registro, options=opcoes)
+
+async def ler_categoria(id_categoria):
+    return await _ler(Categoria, id_categoria)
+
+async def ler_prato(id_prato):
+    return await _ler(Prato, id_prato)
+
+async def ler_cliente(id_cliente):
+    return await _ler(Cliente, id_cliente)
+
+async def ler_pedido(id_pedido):
+    return await _ler(Pedido, id_pedido, [selectinload(Pedido.itens)])
+
+async def _atualizar(modelo, id_registro, valores, versao=None):
+    #O mesmo UPDATE ... RETURNING da versão síncrona; um conflito de versão lança ConflitoDeVersao
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        if modelo in _CARDAPIO:
+            invalidar_cardapio(session.sync_session)
+        registro = await session.run_sync(_atualizar_por_id, modelo, id_registro, _informados(**valores), versao)
+        await session.commit()
+    return registro
+
+async def atualizar_categoria(id_categoria, nome_categoria, versao=None):
+    return await _atualizar(Categoria, id_categoria, {"nome_categoria": nome_categoria}, versao)
+
+async def atualizar_prato(id_prato, nome_prato=None, preco=None, id_categoria=None, versao=None):
+    return await _atualizar(Prato, id_prato,
+                            {"nome_prato": nome_prato, "preco": preco, "id_categoria": id_categoria}, versao)
+
+async def atualizar_cliente(id_cliente, nome_cliente=None, telefone=None, versao=None):
+    return await _atualizar(Cliente, id_cliente, {"nome_cliente": nome_cliente, "telefone": telefone}, versao)
+
+async def atualizar_pedido(id_pedido, id_cliente=None, id_prato=None, data_pedido=None, versao=None):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        pedido = await session.get(Pedido, id_pedido, options=[selectinload(Pedido.itens)])
+        if pedido is None:
+            return None
+        await session.run_sync(alterar_pedido, pedido, id_cliente, id_prato, data_pedido, versao)
+        await session.commit()
+    return pedido
+
+async def _excluir(modelo, id_registro, antes=None, motivo_em_uso=None):
+    #Como na versão síncrona, uma exclusão recusada pela chave estrangeira lança RegistroEmUso
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        registro = await session.get(modelo, id_registro)
+        if registro is None:
+            return False
+        if antes is not None:
+            await session.run_sync(antes, registro)
+        if modelo in _CARDAPIO:
+            invalidar_cardapio(session.sync_session)
+        await session.delete(registro)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise RegistroEmUso(modelo, id_registro, motivo_em_uso or "há registros que dependem dele")
+    return True
+
+async def excluir_categoria(id_categoria):
+    return await _excluir(Categoria, id_categoria, motivo_em_uso="há pratos dela em itens de pedidos")
+
+async def excluir_prato(id_prato):
+    return await _excluir(Prato, id_prato, motivo_em_uso="o prato aparece em itens de pedidos")
+
+def _descontar_vendas_do_cliente(session, cliente):
+    #Os pedidos do cliente saem em cascata no banco; o resumo é corrigido antes
+    descontar_vendas(session, Pedido.id_cliente == cliente.id_cliente)
+
+async def excluir_cliente(id_cliente):
+    return await _excluir(Cliente, id_cliente, _descontar_vendas_do_cliente)
+
+def _desfazer_venda_do_pedido(session, pedido):
+    registrar_vendas(session, vendas_dos_itens(session, pedido.data_pedido, pedido.itens, -1))
+
+async def excluir_pedido(id_pedido):
+    return await _excluir(Pedido, id_pedido, _desfazer_venda_do_pedido)
+
+#Álgebra relacional assíncrona: as mesmas consultas da versão síncrona
+
+async def selecionar_pratos_por_preco(preco_minimo):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        return (await session.execute(consulta_pratos_por_preco(preco_minimo))).scalars().all()
+
+async def projetar_clientes_nome_telefone():
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        return (await session.execute(select(Cliente.nome_cliente, Cliente.telefone))).all()
+
+async def junção_clientes_pedidos(data_inicio=None, data_fim=None, limite=None):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        resultado = await session.stream(consulta_clientes_pedidos(data_inicio, data_fim, limite))
+        async for linha in resultado:
+            yield linha
+
+async def pratos_nao_pedidos(dias=None, referencia=None):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        resultado = await session.stream(consulta_pratos_nao_pedidos(dias, referencia))
+        async for linha in resultado:
+            yield linha
+
+#Teste de carga: vazão de criar_pedido conforme aumenta o número de clientes simultâneos
+
+async def teste_carga(niveis=(1, 2, 4, 8, 16, 32, 64), pedidos_por_cliente=200, semente=42):
+    sessoes = await _obter_sessoes()
+    async with sessoes() as session:
+        #Sorteia entre os ids existentes: depois de exclusões, nem todo id até o maior ainda existe
+        ids_clientes = (await session.execute(select(Cliente.id_cliente))).scalars().all()
+        ids_pratos = (await session.execute(select(Prato.id_prato))).scalars().all()
+    if not ids_clientes or not ids_pratos:
+        raise ValueError("O teste de carga precisa de clientes e pratos cadastrados.")
+    aleatorio = random.Random(semente)
+
+    async def cliente():
+        for _ in range(pedidos_por_cliente):
+            await criar_pedido(aleatorio.choice(ids_clientes), aleatorio.choice(ids_pratos), date.today())
+
+    resultados = []
+    for clientes in niveis:
+        grupos_antes, pedidos_antes = _escritor.grupos, _escritor.pedidos
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente() for _ in range(clientes)))
+        duracao = time.perf_counter() - inicio
+        grupos = _escritor.grupos - grupos_antes
+        pedidos = _escritor.pedidos - pedidos_antes
+        resultado = {
+            "clientes": clientes,
+            "pedidos": pedidos,
+            "segundos": duracao,
+            "pedidos_por_segundo": pedidos / duracao,
+            "commits": grupos,
+            "pedidos_por_commit": pedidos / grupos if grupos else 0.0,
+        }
+        resultados.append(resultado)
+        print(f"{clientes:>4} clientes: {resultado['pedidos_por_segundo']:10.0f} pedidos/s, "
+              f"{resultado['pedidos_por_commit']:6.1f} pedidos por commit")
+    return resultados
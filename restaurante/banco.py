@@ -0,0 +1,155 @@
+#Criação de engine para banco de dados SQLite e configuração da sessão
+#Nada acontece na importação: a engine é criada e o esquema verificado na primeira sessão aberta
+
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from .modelos import criar_esquema
+
+URL_BANCO = 'sqlite:///banco_restaurante.db'
+
+#PRAGMAs aplicados a cada nova conexão (None desativa um PRAGMA):
+#WAL deixa leitores e o escritor trabalharem ao mesmo tempo e synchronous=NORMAL
+#evita um fsync completo a cada commit, mantendo o banco consistente; foreign_keys faz o SQLite
+#verificar as chaves estrangeiras e aplicar as exclusões em cascata declaradas nos modelos
+PRAGMAS_PADRAO = {
+    "busy_timeout": 5000,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,
+    "mmap_size": 268435456,
+    "foreign_keys": "ON",
+}
+
+def instalar_pragmas(engine, **pragmas):
+    #engine síncrona; para uma engine assíncrona passe engine.sync_engine
+    configuracao = dict(PRAGMAS_PADRAO, **pragmas)
+
+    @event.listens_for(engine, "connect")
+    def _aplicar_pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in configuracao.items():
+            if valor is not None:
+                cursor.execute(f"PRAGMA {nome} = {valor}")
+        cursor.close()
+
+def criar_engine(url=URL_BANCO, echo=False, **pragmas):
+    engine = create_engine(url, echo=echo)
+    instalar_pragmas(engine, **pragmas)
+    return engine
+
+def preparar_esquema(conexao):
+    #Cria ou migra o esquema em uma única transação, em uma conexão recém-aberta. PRAGMA foreign_keys não muda
+    #dentro de uma transação: é desligado antes do BEGIN, para que recriar uma tabela não exclua em cascata
+    #as linhas que a referenciam, e volta ao valor anterior no fim
+    ativas = conexao.exec_driver_sql("PRAGMA foreign_keys").scalar()
+    conexao.exec_driver_sql("PRAGMA foreign_keys = OFF")
+    conexao.commit()
+    try:
+        conexao.exec_driver_sql("BEGIN")
+        criar_esquema(conexao)
+        conexao.commit()
+    except BaseException:
+        conexao.rollback()
+        raise
+    finally:
+        conexao.exec_driver_sql(f"PRAGMA foreign_keys = {int(ativas)}")
+        conexao.commit()
+
+#Os objetos continuam legíveis depois do commit, já que as funções CRUD os retornam com a sessão fechada
+Session = sessionmaker(expire_on_commit=False)
+
+_engine = None
+_trava_engine = threading.Lock()
+#Funções chamadas sempre que o banco é trocado (por exemplo, para limpar caches)
+_ao_trocar_banco = []
+
+def ao_trocar_banco(funcao):
+    _ao_trocar_banco.append(funcao)
+    return funcao
+
+def obter_engine():
+    global _engine
+    if _engine is None:
+        with _trava_engine:
+            if _engine is None:
+                engine = criar_engine()
+                with engine.connect() as conexao:
+                    preparar_esquema(conexao)
+                Session.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+def configurar_banco(url=URL_BANCO, echo=False, **pragmas):
+    #Troca o banco usado por todas as funções (outro arquivo, outros PRAGMAs)
+    global _engine
+    novo = criar_engine(url, echo, **pragmas)
+    with novo.connect() as conexao:
+        preparar_esquema(conexao)
+    with _trava_engine:
+        antigo, _engine = _engine, novo
+        Session.configure(bind=novo)
+    if antigo is not None:
+        antigo.dispose()
+    for funcao in _ao_trocar_banco:
+        funcao()
+    return novo
+
+def nova_sessao():
+    obter_engine()
+    return Session()
+
+#Unidade de trabalho: agrupa várias operações CRUD da mesma thread em uma única transação
+#Exemplo:
+#with unidade_de_trabalho():
+    #criar_cliente("Ana", "41999990000")
+    #criar_pedido(1, 2, date.today())
+
+_contexto = threading.local()
+
+def _sessao_atual():
+    return getattr(_contexto, "sessao", None)
+
+@contextmanager
+def unidade_de_trabalho():
+    sessao = _sessao_atual()
+    if sessao is not None:
+        #Unidade aninhada: participa da transação mais externa
+        yield sessao
+        return
+    with nova_sessao() as sessao:
+        _contexto.sessao = sessao
+        try:
+            yield sessao
+            sessao.commit()
+        except BaseException:
+            sessao.rollback()
+            raise
+        finally:
+            _contexto.sessao = None
+
+@contextmanager
+def abrir_sessao():
+    #Dentro de uma unidade de trabalho reutiliza a sessão dela, senão abre uma sessão própria
+    sessao = _sessao_atual()
+    if sessao is not None:
+        yield sessao
+    else:
+        with nova_sessao() as sessao:
+            yield sessao
+
+def confirmar(session):
+    #Dentro de uma unidade de trabalho apenas envia as alterações; o commit fica para o final
+    if session is _sessao_atual():
+        session.flush()
+    else:
+        session.commit()
+
+def desfazer(session, erro):
+    #Dentro de uma unidade de trabalho o erro é propagado para desfazer a transação inteira
+    if session is _sessao_atual():
+        raise erro
+    session.rollback()
@@ -0,0 +1,589 @@
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+import sqlalchemy
+from sqlalchemy import select, func, update
+from sqlalchemy.orm import selectinload
+
+from .alteracoes import acompanhar_alteracoes, registrar_consumidor, registros_alterados, remover_consumidor
+from .banco import abrir_sessao, confirmar, desfazer, configurar_banco, obter_engine, unidade_de_trabalho
+from .busca import buscar_clientes
+from .copias import PAGINAS_POR_PASSO, PAUSA_ENTRE_PASSOS, _copiar_paginas
+from .consultas import (selecionar_pratos_por_preco, junção_clientes_pedidos, diferença_pratos_nao_pedidos,
+                        consultar_todas_tabelas)
+from .crud import (ConflitoDeVersao, _ler_por_id, atualizar_prato, criar_pedido, ler_cliente, ler_pedido,
+                   ler_prato)
+from .roteiro import executar_roteiro
+from .modelos import (Categoria, Prato, Cliente, Pedido, ItemPedido, TABELAS_RASTREADAS, criar_registro_alteracoes,
+                      preencher_vendas_diarias, remover_registro_alteracoes)
+
+#Geração de dados sintéticos e benchmark
+#gerar_dados_sinteticos preenche um banco com cardinalidades configuráveis e pedidos concentrados
+#em poucos pratos e clientes (distribuição de Zipf), sempre com a mesma semente para ser
+#reproduzível. executar_benchmark mede as funções públicas em várias escalas e grava JSON para
+#comparar resultados entre commits. comparar_leituras_por_id mede a latência por chamada da leitura
+#por chave primária antes (Query montada a cada chamada) e depois (consulta pronta e mapa de identidade).
+#comparar_atualizacoes_concorrentes mede, com várias threads, a vazão de atualizar_prato e quantas
+#atualizações se perdem quando todas incrementam o mesmo preço (ler, somar, gravar).
+#comparar_sincronizacao mede o que um consumidor paga para se atualizar relendo as tabelas inteiras ou
+#lendo o registro de alterações, e quanto os gatilhos do registro somam a cada pedido criado.
+#comparar_copias_sob_carga mede a vazão e a latência de criar_pedido com várias threads enquanto nada é
+#copiado, durante uma cópia a quente (copiar_banco) e durante uma cópia do arquivo com o banco travado.
+#comparar_roteiro mede comandos de criar_pedido executados um por processo e pelo modo roteiro em lotes.
+
+LOTE_GERACAO = 50000
+NOMES_CATEGORIAS = ["Entrada", "Prato Principal", "Sobremesa", "Bebida", "Lanche", "Salada", "Massa", "Grelhado"]
+NOMES_PRATOS = ["Polenta", "Fígado", "Strogonoff", "Parmegiana", "Feijoada", "Risoto", "Lasanha", "Moqueca",
+                "Picanha", "Pudim", "Mousse", "Suco", "Salada", "Sopa", "Torta", "Escondidinho"]
+NOMES_CLIENTES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Heitor", "Íris", "João",
+                  "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago"]
+
+def _pesos_zipf(quantidade, assimetria):
+    acumulado = 0.0
+    pesos = []
+    for posicao in range(1, quantidade + 1):
+        acumulado += 1.0 / posicao ** assimetria
+        pesos.append(acumulado)
+    return pesos
+
+def gerar_dados_sinteticos(n_pedidos=100000, n_clientes=None, n_pratos=None, n_categorias=None,
+                           semente=42, assimetria=1.1, data_inicial=date(2024, 1, 1), dias=365, max_itens=3):
+    n_clientes = n_clientes or max(10, n_pedidos // 10)
+    n_pratos = n_pratos or max(4, min(500, n_pedidos // 100))
+    n_categorias = n_categorias or max(1, min(len(NOMES_CATEGORIAS) * 4, n_pratos // 10))
+    aleatorio = random.Random(semente)
+    with abrir_sessao() as session:
+        try:
+            session.execute(Categoria.__table__.insert(), [
+                {"nome_categoria": f"{NOMES_CATEGORIAS[i % len(NOMES_CATEGORIAS)]} {i + 1}"}
+                for i in range(n_categorias)])
+            precos = [aleatorio.randint(10, 120) for _ in range(n_pratos)]
+            session.execute(Prato.__table__.insert(), [
+                {"nome_prato": f"{NOMES_PRATOS[i % len(NOMES_PRATOS)]} {i + 1}",
+                 "preco": precos[i],
+                 "id_categoria": aleatorio.randint(1, n_categorias)}
+                for i in range(n_pratos)])
+            for inicio in range(0, n_clientes, LOTE_GERACAO):
+                session.execute(Cliente.__table__.insert(), [
+                    {"nome_cliente": f"{NOMES_CLIENTES[i % len(NOMES_CLIENTES)]} {i + 1}",
+                     "telefone": f"{aleatorio.randint(11, 99)}9{aleatorio.randint(0, 99999999):08d}"}
+                    for i in range(inicio, min(inicio + LOTE_GERACAO, n_clientes))])
+
+            #Os IDs recebem pesos de Zipf em ordem embaralhada, para os mais pedidos não serem sempre os primeiros
+            ids_pratos = list(range(1, n_pratos + 1))
+            ids_clientes = list(range(1, n_clientes + 1))
+            aleatorio.shuffle(ids_pratos)
+            aleatorio.shuffle(ids_clientes)
+            pesos_pratos = _pesos_zipf(n_pratos, assimetria)
+            pesos_clientes = _pesos_zipf(n_clientes, assimetria)
+            #Cada pedido tem de 1 a max_itens pratos; os IDs são atribuídos aqui para inserir os itens sem RETURNING
+            proximo_id = (session.execute(select(func.max(Pedido.id_pedido))).scalar() or 0) + 1
+            for inicio in range(0, n_pedidos, LOTE_GERACAO):
+                tamanho = min(LOTE_GERACAO, n_pedidos - inicio)
+                clientes = aleatorio.choices(ids_clientes, cum_weights=pesos_clientes, k=tamanho)
+                n_itens = [aleatorio.randint(1, max_itens) for _ in range(tamanho)]
+                pratos = iter(aleatorio.choices(ids_pratos, cum_weights=pesos_pratos, k=sum(n_itens)))
+                ids = range(proximo_id, proximo_id + tamanho)
+                proximo_id += tamanho
+                session.execute(Pedido.__table__.insert(), [
+                    {"id_pedido": id_pedido, "id_cliente": id_cliente,
+                     "data_pedido": data_inicial + timedelta(days=aleatorio.randrange(dias))}
+                    for id_pedido, id_cliente in zip(ids, clientes)])
+                itens = []
+                for id_pedido, quantidade_itens in zip(ids, n_itens):
+                    for id_prato in {next(pratos) for _ in range(quantidade_itens)}:
+                        itens.append({"id_pedido": id_pedido, "id_prato": id_prato,
+                                      "quantidade": aleatorio.choice((1, 1, 1, 2)),
+                                      "preco_unitario": precos[id_prato - 1]})
+                session.execute(ItemPedido.__table__.insert(), itens)
+            preencher_vendas_diarias(session)
+            confirmar(session)
+            print(f"Dados gerados: {n_categorias} categorias, {n_pratos} pratos, "
+                  f"{n_clientes} clientes, {n_pedidos} pedidos.")
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao gerar dados sintéticos: {e}")
+
+def _medir(funcao, chamadas):
+    #Executa funcao(*argumentos) para cada item de chamadas, sem imprimir nada, e retorna os tempos
+    tempos = []
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        for argumentos in chamadas:
+            inicio = time.perf_counter()
+            funcao(*argumentos)
+            tempos.append(time.perf_counter() - inicio)
+    return {
+        "chamadas": len(tempos),
+        "total_s": sum(tempos),
+        "media_s": statistics.fmean(tempos),
+        "mediana_s": statistics.median(tempos),
+        "min_s": min(tempos),
+        "max_s": max(tempos),
+    }
+
+def _casos_benchmark(n_pedidos, repeticoes, aleatorio):
+    with abrir_sessao() as session:
+        n_clientes = session.execute(select(func.max(Cliente.id_cliente))).scalar()
+        n_pratos = session.execute(select(func.max(Prato.id_prato))).scalar()
+    pontuais = max(100, repeticoes * 100)
+    return [
+        ("criar_pedido", criar_pedido,
+         [(aleatorio.randint(1, n_clientes), aleatorio.randint(1, n_pratos), date(2024, 6, 1))
+          for _ in range(pontuais)]),
+        ("ler_pedido", ler_pedido, [(aleatorio.randint(1, n_pedidos),) for _ in range(pontuais)]),
+        ("ler_cliente", ler_cliente, [(aleatorio.randint(1, n_clientes),) for _ in range(pontuais)]),
+        ("ler_prato", ler_prato, [(aleatorio.randint(1, n_pratos),) for _ in range(pontuais)]),
+        ("selecionar_pratos_por_preco", selecionar_pratos_por_preco, [(100,)] * repeticoes),
+        ("buscar_clientes", buscar_clientes,
+         [(aleatorio.choice(NOMES_CLIENTES)[:3],) for _ in range(pontuais)]),
+        ("junção_clientes_pedidos", junção_clientes_pedidos, [()] * repeticoes),
+        ("diferença_pratos_nao_pedidos", diferença_pratos_nao_pedidos, [()] * repeticoes),
+        ("consultar_todas_tabelas", consultar_todas_tabelas, [()] * repeticoes),
+    ]
+
+#Leitura por chave primária: forma anterior (Query montada e compilada a cada chamada) e atual
+
+def _ler_com_query(modelo, id_registro):
+    chave = modelo.__mapper__.primary_key[0].key
+    with abrir_sessao() as session:
+        consulta = session.query(modelo).filter_by(**{chave: id_registro})
+        if modelo is Pedido:
+            consulta = consulta.options(selectinload(Pedido.itens))
+        return consulta.first()
+
+def _ler_com_consulta_pronta(modelo, id_registro):
+    with abrir_sessao() as session:
+        return _ler_por_id(session, modelo, id_registro)
+
+def comparar_leituras_por_id(chamadas=2000, semente=42):
+    #Latência por chamada (microssegundos) de cada forma, com sessão própria por chamada (como nas funções
+    #ler_*) e repetindo as mesmas chaves dentro de uma unidade de trabalho (mapa de identidade)
+    aleatorio = random.Random(semente)
+    with abrir_sessao() as session:
+        maiores = {modelo: session.execute(select(func.max(modelo.__mapper__.primary_key[0]))).scalar() or 0
+                   for modelo in (Categoria, Prato, Cliente, Pedido)}
+    resultados = []
+    for modelo, maior in maiores.items():
+        if not maior:
+            continue
+        ids = [(modelo, aleatorio.randint(1, maior)) for _ in range(chamadas)]
+        _medir(_ler_com_query, ids[:100])
+        _medir(_ler_com_consulta_pronta, ids[:100])
+        antes = _medir(_ler_com_query, ids)
+        depois = _medir(_ler_com_consulta_pronta, ids)
+        repetidas = ids[:100] * (chamadas // 100)
+        with unidade_de_trabalho():
+            #O mapa de identidade guarda referências fracas: os objetos ficam vivos durante a medição
+            carregados = [_ler_com_consulta_pronta(modelo, id_registro) for modelo, id_registro in ids[:100]]
+            na_unidade_antes = _medir(_ler_com_query, repetidas)
+            na_unidade_depois = _medir(_ler_com_consulta_pronta, repetidas)
+            del carregados
+        linha = {
+            "modelo": modelo.__name__,
+            "query_us": antes["mediana_s"] * 1e6,
+            "consulta_pronta_us": depois["mediana_s"] * 1e6,
+            "query_na_unidade_us": na_unidade_antes["mediana_s"] * 1e6,
+            "mapa_identidade_us": na_unidade_depois["mediana_s"] * 1e6,
+        }
+        resultados.append(linha)
+        print(f"{linha['modelo']:<10} por chamada: Query {linha['query_us']:8.1f} us -> consulta pronta "
+              f"{linha['consulta_pronta_us']:8.1f} us; na unidade de trabalho: Query "
+              f"{linha['query_na_unidade_us']:8.1f} us -> mapa de identidade {linha['mapa_identidade_us']:8.1f} us")
+    return resultados
+
+#Atualizações concorrentes: forma anterior (SELECT do registro e UPDATE sem versão, como o flush da sessão
+#fazia) e atual (UPDATE ... RETURNING com versão)
+
+def _atualizar_com_leitura(id_prato, preco=None):
+    with abrir_sessao() as session:
+        prato = session.execute(select(Prato).where(Prato.id_prato == id_prato)).scalar_one()
+        session.execute(Prato.__table__.update().where(Prato.__table__.c.id_prato == id_prato).values(preco=preco))
+        session.commit()
+        return prato
+
+def _incrementar_com_leitura(id_prato):
+    _atualizar_com_leitura(id_prato, ler_prato(id_prato).preco + 1)
+    return 0
+
+def _incrementar_com_versao(id_prato):
+    #Relê e tenta de novo a cada conflito; retorna quantos conflitos houve
+    conflitos = 0
+    while True:
+        prato = ler_prato(id_prato)
+        try:
+            atualizar_prato(id_prato, preco=prato.preco + 1, versao=prato.versao)
+            return conflitos
+        except ConflitoDeVersao:
+            conflitos += 1
+
+def _gravar_preco(atualizar, id_prato, preco):
+    atualizar(id_prato, preco=preco)
+
+def _em_threads(funcao, chamadas_por_thread):
+    #Cada thread executa funcao(*argumentos) para as suas chamadas, todas começando juntas;
+    #retorna (segundos, soma dos retornos)
+    threads = len(chamadas_por_thread)
+    barreira = threading.Barrier(threads)
+    totais = [0] * threads
+
+    def executar(posicao):
+        barreira.wait()
+        for argumentos in chamadas_por_thread[posicao]:
+            totais[posicao] += funcao(*argumentos) or 0
+
+    trabalhadores = [threading.Thread(target=executar, args=(posicao,)) for posicao in range(threads)]
+    inicio = time.perf_counter()
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+    return time.perf_counter() - inicio, sum(totais)
+
+def comparar_atualizacoes_concorrentes(threads=8, atualizacoes=300, incrementos=100, semente=42):
+    #Vazão: cada thread grava preços em pratos aleatórios. Atualizações perdidas: todas as threads somam 1
+    #ao preço do mesmo prato; o preço final deveria subir threads * incrementos. Altera preços do banco atual
+    aleatorio = random.Random(semente)
+    with abrir_sessao() as session:
+        menor, maior = session.execute(select(func.min(Prato.id_prato), func.max(Prato.id_prato))).one()
+    if not maior:
+        raise ValueError("A comparação precisa de pratos cadastrados.")
+    trabalhos = [[(aleatorio.randint(menor, maior), aleatorio.randint(10, 200)) for _ in range(atualizacoes)]
+                 for _ in range(threads)]
+    resultados = []
+    for forma, atualizar, incrementar in (("SELECT + UPDATE", _atualizar_com_leitura, _incrementar_com_leitura),
+                                          ("UPDATE ... RETURNING", atualizar_prato, _incrementar_com_versao)):
+        segundos, _ = _em_threads(_gravar_preco, [[(atualizar, *argumentos) for argumentos in trabalho]
+                                                  for trabalho in trabalhos])
+        inicial = ler_prato(menor).preco
+        segundos_incremento, conflitos = _em_threads(incrementar, [[(menor,)] * incrementos
+                                                                   for _ in range(threads)])
+        esperado = threads * incrementos
+        aplicados = ler_prato(menor).preco - inicial
+        linha = {
+            "forma": forma,
+            "threads": threads,
+            "atualizacoes_por_segundo": threads * atualizacoes / segundos,
+            "incrementos_esperados": esperado,
+            "incrementos_aplicados": aplicados,
+            "atualizacoes_perdidas": esperado - aplicados,
+            "conflitos": conflitos,
+            "incrementos_por_segundo": esperado / segundos_incremento,
+        }
+        resultados.append(linha)
+        print(f"{forma:<22} {linha['atualizacoes_por_segundo']:8.0f} atualizações/s; incrementos: "
+              f"{aplicados}/{esperado} aplicados, {linha['atualizacoes_perdidas']} perdidos, "
+              f"{conflitos} conflitos ({linha['incrementos_por_segundo']:.0f}/s)")
+    return resultados
+
+#Sincronização: reler as tabelas rastreadas inteiras (como as exportações faziam com ler_todos_pedidos e
+#consultar_todas_tabelas) ou ler as alterações desde a posição do consumidor e os registros citados nelas
+
+def _reler_tabelas():
+    linhas = 0
+    with abrir_sessao() as session:
+        for modelo in TABELAS_RASTREADAS:
+            linhas += len(session.execute(select(modelo.__table__)).all())
+    return linhas
+
+def _ler_registro_alteracoes(consumidor):
+    registros = 0
+    for lote in acompanhar_alteracoes(consumidor):
+        registros += len(registros_alterados(lote))
+    return registros
+
+def _alterar_pedidos(ids):
+    #Alteração sintética: só a versão muda, o suficiente para os gatilhos registrarem cada pedido
+    with abrir_sessao() as session:
+        session.execute(update(Pedido).where(Pedido.id_pedido.in_(ids)).values(versao=Pedido.versao + 1)
+                        .execution_options(synchronize_session=False))
+        session.commit()
+
+def comparar_sincronizacao(alteracoes=(10, 100, 1000, 10000), pedidos_criados=500, semente=42):
+    #Altera o banco atual: incrementa a versão de pedidos e cria pedidos_criados * 9 pedidos. A medição sem
+    #gatilhos os remove por alguns instantes; não use em um banco com outros processos gravando
+    aleatorio = random.Random(semente)
+    consumidor = "benchmark-sincronizacao"
+    with abrir_sessao() as session:
+        maior_pedido = session.execute(select(func.max(Pedido.id_pedido))).scalar() or 0
+        n_clientes = session.execute(select(func.max(Cliente.id_cliente))).scalar() or 0
+        n_pratos = session.execute(select(func.max(Prato.id_prato))).scalar() or 0
+    if not maior_pedido:
+        raise ValueError("A comparação precisa de pedidos cadastrados.")
+    resultados = []
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        registrar_consumidor(consumidor)
+    try:
+        for quantidade in alteracoes:
+            _alterar_pedidos(aleatorio.sample(range(1, maior_pedido + 1), min(quantidade, maior_pedido)))
+            inicio = time.perf_counter()
+            linhas = _reler_tabelas()
+            releitura = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            registros = _ler_registro_alteracoes(consumidor)
+            incremental = time.perf_counter() - inicio
+            linha = {"alteracoes": quantidade, "releitura_s": releitura, "linhas_relidas": linhas,
+                     "registro_s": incremental, "registros_lidos": registros}
+            resultados.append(linha)
+            print(f"{quantidade:>8} alterações: releitura {releitura * 1000:9.1f} ms ({linhas} linhas) -> "
+                  f"registro de alterações {incremental * 1000:9.1f} ms ({registros} registros)")
+    finally:
+        with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+            remover_consumidor(consumidor)
+    casos = [(aleatorio.randint(1, n_clientes), aleatorio.randint(1, n_pratos), date(2024, 6, 1))
+             for _ in range(pedidos_criados)]
+    #As medições com e sem gatilhos se alternam (e trocam de ordem) em rodadas; vale a melhor mediana de cada
+    _medir(criar_pedido, casos[:50])
+    medianas = {True: [], False: []}
+    for rodada in range(4):
+        for com_gatilhos in ((True, False) if rodada % 2 == 0 else (False, True)):
+            if not com_gatilhos:
+                with obter_engine().begin() as conexao:
+                    remover_registro_alteracoes(conexao)
+            try:
+                medianas[com_gatilhos].append(_medir(criar_pedido, casos)["mediana_s"] * 1e6)
+            finally:
+                if not com_gatilhos:
+                    with obter_engine().begin() as conexao:
+                        criar_registro_alteracoes(conexao)
+    com_registro, sem_registro = medianas[True], medianas[False]
+    resultados.append({"criar_pedido_sem_registro_us": min(sem_registro),
+                       "criar_pedido_com_registro_us": min(com_registro)})
+    print(f"criar_pedido: {min(sem_registro):.1f} us sem o registro de alterações -> "
+          f"{min(com_registro):.1f} us com o registro")
+    return resultados
+
+#Cópias sob carga: escritores criam pedidos sem parar enquanto a thread principal espera, faz a etapa de cópia
+#de copiar_banco (em passos com pausa ou em um passo só) ou copia o arquivo com o banco travado para gravação
+#(BEGIN IMMEDIATE), que era a forma segura de copiar antes. A verificação e o gzip de copiar_banco leem
+#apenas a cópia e ficam fora da medição
+
+def _copiar_com_trava(destino):
+    origem = obter_engine().url.database
+    conexao = sqlite3.connect(origem, isolation_level=None)
+    try:
+        conexao.execute("BEGIN IMMEDIATE")
+        inicio = time.perf_counter()
+        for sufixo in ("", "-wal"):
+            if os.path.exists(origem + sufixo):
+                shutil.copyfile(origem + sufixo, destino + sufixo)
+        segundos = time.perf_counter() - inicio
+        conexao.execute("COMMIT")
+    finally:
+        conexao.close()
+    return {"bytes": sum(os.path.getsize(destino + sufixo) for sufixo in ("", "-wal")
+                         if os.path.exists(destino + sufixo)), "copia_s": segundos}
+
+def _percentil(valores, fracao):
+    return valores[min(len(valores) - 1, int(len(valores) * fracao))] if valores else 0.0
+
+def _pedidos_durante(acao, escritores, casos):
+    #Executa acao() enquanto as threads criam pedidos; retorna (resultado, segundos, latências, falhas)
+    parar = threading.Event()
+    latencias = [[] for _ in range(escritores)]
+    falhas = [0] * escritores
+
+    def escrever(posicao):
+        for indice in itertools.count(posicao, escritores):
+            if parar.is_set():
+                return
+            inicio = time.perf_counter()
+            if criar_pedido(*casos[indice % len(casos)]) is None:
+                falhas[posicao] += 1
+            latencias[posicao].append(time.perf_counter() - inicio)
+
+    trabalhadores = [threading.Thread(target=escrever, args=(posicao,)) for posicao in range(escritores)]
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        inicio = time.perf_counter()
+        try:
+            resultado = acao()
+        finally:
+            segundos = time.perf_counter() - inicio
+            parar.set()
+            for trabalhador in trabalhadores:
+                trabalhador.join()
+    return resultado, segundos, sorted(latencia for lista in latencias for latencia in lista), sum(falhas)
+
+def comparar_copias_sob_carga(segundos=5, escritores=4, paginas_por_passo=PAGINAS_POR_PASSO,
+                              pausa=PAUSA_ENTRE_PASSOS, semente=42):
+    #Cria pedidos no banco atual; as cópias vão para um diretório temporário, apagado no fim
+    aleatorio = random.Random(semente)
+    with abrir_sessao() as session:
+        n_clientes = session.execute(select(func.max(Cliente.id_cliente))).scalar() or 0
+        n_pratos = session.execute(select(func.max(Prato.id_prato))).scalar() or 0
+    if not n_clientes or not n_pratos:
+        raise ValueError("A comparação precisa de clientes e pratos cadastrados.")
+    casos = [(aleatorio.randint(1, n_clientes), aleatorio.randint(1, n_pratos), date(2024, 6, 1))
+             for _ in range(10000)]
+    diretorio = tempfile.mkdtemp(prefix="copias_benchmark_")
+    resultados = []
+    try:
+        origem = obter_engine().url.database
+        for forma, acao in (
+                ("sem cópia", lambda: time.sleep(segundos)),
+                ("cópia a quente", lambda: _copiar_paginas(origem, os.path.join(diretorio, "passos.db"),
+                                                           paginas_por_passo, pausa)),
+                ("cópia em 1 passo", lambda: _copiar_paginas(origem, os.path.join(diretorio, "unica.db"), -1, 0)),
+                ("cópia com trava", lambda: _copiar_com_trava(os.path.join(diretorio, "travada.db")))):
+            metricas, duracao, latencias, falhas = _pedidos_durante(acao, escritores, casos)
+            linha = {
+                "forma": forma,
+                "segundos": duracao,
+                "pedidos_por_segundo": len(latencias) / duracao,
+                "latencia_p50_ms": _percentil(latencias, 0.5) * 1000,
+                "latencia_p99_ms": _percentil(latencias, 0.99) * 1000,
+                "latencia_max_ms": (latencias[-1] if latencias else 0.0) * 1000,
+                "falhas": falhas,
+            }
+            if metricas:
+                linha["copia_mb"] = metricas["bytes"] / 1e6
+                linha["copia_mb_por_segundo"] = metricas["bytes"] / 1e6 / metricas["copia_s"]
+            resultados.append(linha)
+            copia = (f"; cópia {linha['copia_mb']:.1f} MB a {linha['copia_mb_por_segundo']:.1f} MB/s"
+                     if metricas else "")
+            print(f"{forma:<16} {duracao:6.1f} s: {linha['pedidos_por_segundo']:7.0f} pedidos/s, latência p50 "
+                  f"{linha['latencia_p50_ms']:7.1f} ms, p99 {linha['latencia_p99_ms']:7.1f} ms, máx "
+                  f"{linha['latencia_max_ms']:7.1f} ms, {falhas} falhas{copia}")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return resultados
+
+#Modo roteiro: um processo por comando (como relançar o programa a cada operação) ou todos os comandos em um
+#processo, com transações de vários tamanhos
+
+def _ambiente_do_pacote(**variaveis):
+    #Ambiente de um subprocesso que importa este pacote mesmo sem ele estar instalado
+    pacote = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return dict(os.environ, **variaveis,
+                PYTHONPATH=os.pathsep.join(filter(None, [pacote, os.environ.get("PYTHONPATH")])))
+
+def _roteiro_em_processo(banco, linha, usuario, senha):
+    subprocess.run([sys.executable, "-m", "restaurante", "roteiro", "-", "--usuario", usuario, "--banco", banco],
+                   input=linha + "\n", text=True, capture_output=True, env=_ambiente_do_pacote(RESTAURANTE_SENHA=senha),
+                   check=True)
+
+def comparar_roteiro(comandos=2000, lotes=(1, 10, 100, 1000), processos=20, semente=42):
+    #Cria pedidos no banco atual. O custo por processo é medido em "processos" comandos e extrapolado
+    from .cli import USUARIOS
+    usuario, senha = next(iter(USUARIOS.items()))
+    aleatorio = random.Random(semente)
+    banco = obter_engine().url.database
+    with abrir_sessao() as session:
+        n_clientes = session.execute(select(func.max(Cliente.id_cliente))).scalar() or 0
+        n_pratos = session.execute(select(func.max(Prato.id_prato))).scalar() or 0
+    if not n_clientes or not n_pratos:
+        raise ValueError("A comparação precisa de clientes e pratos cadastrados.")
+    linhas = [json.dumps({"op": "criar_pedido", "id_cliente": aleatorio.randint(1, n_clientes),
+                          "id_prato": aleatorio.randint(1, n_pratos), "data_pedido": "2024-06-01"})
+              for _ in range(comandos)]
+    resultados = []
+    inicio = time.perf_counter()
+    for linha in linhas[:processos]:
+        _roteiro_em_processo(banco, linha, usuario, senha)
+    por_comando = (time.perf_counter() - inicio) / processos
+    resultados.append({"forma": "um processo por comando", "comandos_por_segundo": 1 / por_comando,
+                       "estimativa_total_s": por_comando * comandos})
+    print(f"{'um processo por comando':<26} {1 / por_comando:8.1f} comandos/s "
+          f"({por_comando * comandos:7.1f} s estimados para {comandos})")
+    for lote in lotes:
+        with open(os.devnull, "w") as nulo:
+            inicio = time.perf_counter()
+            resumo = executar_roteiro(linhas, lote, saida=nulo)
+            segundos = time.perf_counter() - inicio
+        forma = f"roteiro, lote de {lote}"
+        resultados.append({"forma": forma, "comandos_por_segundo": comandos / segundos, "total_s": segundos,
+                           "erros": resumo["erros"]})
+        print(f"{forma:<26} {comandos / segundos:8.1f} comandos/s ({segundos:7.1f} s para {comandos}, "
+              f"{resumo['erros']} erros)")
+    return resultados
+
+#Tempo de importação: "import restaurante" e "import restaurante.cli" não devem carregar o SQLAlchemy nem criar o
+#engine (isso fica para o primeiro uso). Cada medida é um processo novo com -X importtime; vale a menor das repetições
+
+ORCAMENTO_IMPORTACAO_MS = {"restaurante": 50, "restaurante.cli": 150}
+
+def _importar_em_processo(modulo):
+    resultado = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"], capture_output=True,
+                               text=True, env=_ambiente_do_pacote(), check=True)
+    #Linhas "import time: próprio | acumulado | módulo"; soma as importações de primeiro nível do pacote
+    total_us = 0
+    modulos = set()
+    for linha in resultado.stderr.splitlines():
+        campos = linha.removeprefix("import time:").split("|")
+        if len(campos) != 3 or not campos[1].strip().isdigit():
+            continue
+        nome = campos[2].strip()
+        modulos.add(nome)
+        if campos[2] == f" {nome}" and (nome == modulo or modulo.startswith(nome + ".")):
+            total_us += int(campos[1])
+    return total_us / 1000, "sqlalchemy" in modulos
+
+def verificar_tempo_importacao(repeticoes=5, orcamento_ms=None):
+    #Retorna True se todos os módulos importam dentro do orçamento
+    orcamento_ms = orcamento_ms or ORCAMENTO_IMPORTACAO_MS
+    aprovado = True
+    for modulo, limite in orcamento_ms.items():
+        medidas = [_importar_em_processo(modulo) for _ in range(repeticoes)]
+        milissegundos = min(ms for ms, _ in medidas)
+        carrega_sqlalchemy = any(carrega for _, carrega in medidas)
+        dentro = milissegundos <= limite and not carrega_sqlalchemy
+        aprovado = aprovado and dentro
+        print(f"{'OK   ' if dentro else 'FALHA'} import {modulo}: {milissegundos:.1f} ms (orçamento {limite} ms)"
+              f"{'; carrega o SQLAlchemy' if carrega_sqlalchemy else ''}")
+    return aprovado
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+def executar_benchmark(escalas=(1000, 10000, 100000), repeticoes=3, diretorio=".", saida=None, semente=42):
+    url_original = str(obter_engine().url)
+    aleatorio = random.Random(semente)
+    relatorio = {
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "semente": semente,
+        "resultados": [],
+    }
+    try:
+        for escala in escalas:
+            caminho = os.path.join(diretorio, f"benchmark_{escala}.db")
+            for sufixo in ("", "-wal", "-shm"):
+                if os.path.exists(caminho + sufixo):
+                    os.remove(caminho + sufixo)
+            configurar_banco(f"sqlite:///{caminho}")
+            inicio = time.perf_counter()
+            gerar_dados_sinteticos(escala, semente=semente)
+            relatorio["resultados"].append(
+                {"escala": escala, "funcao": "gerar_dados_sinteticos", "total_s": time.perf_counter() - inicio})
+            for nome, funcao, chamadas in _casos_benchmark(escala, repeticoes, aleatorio):
+                resultado = _medir(funcao, chamadas)
+                relatorio["resultados"].append({"escala": escala, "funcao": nome, **resultado})
+                print(f"{escala:>10} {nome:<30} média {resultado['media_s'] * 1000:10.3f} ms")
+    finally:
+        configurar_banco(url_original)
+    if saida:
+        with open(saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+        print(f"Resultados gravados em {saida}.")
+    return relatorio
@@ -0,0 +1,64 @@
+import re
+
+from sqlalchemy import text
+
+from .banco import abrir_sessao
+
+#Busca textual por prefixo em pratos e clientes (tabelas FTS5 criadas em criar_esquema)
+#Cada palavra digitada vira um prefixo ("fig pol" encontra "Polenta com Fígado"); todas precisam
+#aparecer. Os resultados vêm ordenados por relevância (bm25) e limitados no próprio banco.
+
+LIMITE_BUSCA = 10
+#Texto formado só por dígitos e pontuação de telefone é tratado como um único número
+_TELEFONE = re.compile(r"[\d\s()+.-]+")
+
+def expressao_busca(texto):
+    #Converte o texto digitado em uma expressão MATCH segura: cada termo entre aspas com prefixo
+    if _TELEFONE.fullmatch(texto) and any(caractere.isdigit() for caractere in texto):
+        termos = ["".join(caractere for caractere in texto if caractere.isdigit())]
+    else:
+        termos = re.findall(r"\w+", texto)
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+def consulta_busca_pratos(expressao, limite=LIMITE_BUSCA):
+    return text(
+        "SELECT p.id_prato, p.nome_prato, p.preco, p.id_categoria "
+        "FROM (SELECT rowid, rank FROM busca_pratos WHERE busca_pratos MATCH :expressao "
+        "ORDER BY rank LIMIT :limite) AS b "
+        "JOIN pratos AS p ON p.id_prato = b.rowid ORDER BY b.rank"
+    ).bindparams(expressao=expressao, limite=limite)
+
+def consulta_busca_clientes(expressao, limite=LIMITE_BUSCA):
+    return text(
+        "SELECT c.id_cliente, c.nome_cliente, c.telefone "
+        "FROM (SELECT rowid, rank FROM busca_clientes WHERE busca_clientes MATCH :expressao "
+        "ORDER BY rank LIMIT :limite) AS b "
+        "JOIN clientes AS c ON c.id_cliente = b.rowid ORDER BY b.rank"
+    ).bindparams(expressao=expressao, limite=limite)
+
+def _buscar(consulta, texto, limite):
+    expressao = expressao_busca(texto)
+    if not expressao:
+        return []
+    with abrir_sessao() as session:
+        return session.execute(consulta(expressao, limite)).all()
+
+def buscar_pratos(texto, limite=LIMITE_BUSCA):
+    return _buscar(consulta_busca_pratos, texto, limite)
+
+def buscar_clientes(texto, limite=LIMITE_BUSCA):
+    return _buscar(consulta_busca_clientes, texto, limite)
+
+def pesquisar(texto, limite=LIMITE_BUSCA):
+    #Usada pelo menu: imprime pratos e clientes encontrados
+    try:
+        pratos = buscar_pratos(texto, limite)
+        clientes = buscar_clientes(texto, limite)
+        if not pratos and not clientes:
+            print("Nenhum resultado encontrado.")
+        for prato in pratos:
+            print(f"Prato {prato.id_prato}: {prato.nome_prato} (preço {prato.preco})")
+        for cliente in clientes:
+            print(f"Cliente {cliente.id_cliente}: {cliente.nome_cliente}, Telefone: {cliente.telefone}")
+    except Exception as e:
+        print(f"Erro ao pesquisar: {e}")
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, select
+
+from .banco import Session, _sessao_atual, ao_trocar_banco, nova_sessao
+from .consultas import consulta_pratos_da_categoria
+from .modelos import Categoria, Prato
+
+#Cache do cardápio (categorias e pratos)
+#O cardápio muda poucas vezes por dia e é lido a cada pedido: as leituras passam por um cache LRU
+#com validade (TTL), invalidado pelas funções que alteram categorias e pratos. Os valores são
+#tuplas leves carregadas por uma sessão própria, então só dados confirmados entram no cache. Dentro de uma
+#unidade de trabalho que alterou o cardápio (invalidar_cardapio) as leituras vão direto à sessão dela.
+
+TAMANHO_CACHE_CARDAPIO = 1024
+TTL_CACHE_CARDAPIO = 300
+
+PratoCardapio = namedtuple("PratoCardapio", "id_prato nome_prato preco id_categoria")
+CategoriaCardapio = namedtuple("CategoriaCardapio", "id_categoria nome_categoria")
+
+class CacheLRU:
+    def __init__(self, tamanho_maximo=TAMANHO_CACHE_CARDAPIO, ttl=TTL_CACHE_CARDAPIO):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        #Incrementada a cada invalidação: uma carga iniciada antes dela não é guardada
+        self._geracao = 0
+
+    def obter(self, chave, carregar):
+        agora = time.monotonic()
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is not None and item[0] > agora:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[1]
+            self.falhas += 1
+            geracao = self._geracao
+        valor = carregar()
+        #Ausências não são guardadas: um registro criado em seguida precisa ser encontrado
+        if valor is not None:
+            with self._trava:
+                if geracao == self._geracao:
+                    self._itens[chave] = (agora + self.ttl, valor)
+                    self._itens.move_to_end(chave)
+                    while len(self._itens) > self.tamanho_maximo:
+                        self._itens.popitem(last=False)
+        return valor
+
+    @property
+    def geracao(self):
+        #Muda a cada invalidação: serve como versão do conteúdo em cache
+        return self._geracao
+
+    def invalidar(self):
+        with self._trava:
+            self._itens.clear()
+            self._geracao += 1
+
+    def estatisticas(self):
+        with self._trava:
+            total = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / total if total else 0.0,
+            }
+
+cache_cardapio = CacheLRU()
+ao_trocar_banco(cache_cardapio.invalidar)
+
+def _carregar_prato(session, id_prato):
+    linha = session.execute(select(Prato.id_prato, Prato.nome_prato, Prato.preco, Prato.id_categoria)
+                            .where(Prato.id_prato == id_prato)).first()
+    return PratoCardapio(*linha) if linha is not None else None
+
+def _carregar_categoria(session, id_categoria):
+    linha = session.execute(select(Categoria.id_categoria, Categoria.nome_categoria)
+                            .where(Categoria.id_categoria == id_categoria)).first()
+    return CategoriaCardapio(*linha) if linha is not None else None
+
+def _carregar_pratos_da_categoria(session, id_categoria):
+    consulta = consulta_pratos_da_categoria(id_categoria).execution_options(populate_existing=True)
+    return tuple(PratoCardapio(prato.id_prato, prato.nome_prato, prato.preco, prato.id_categoria)
+                 for prato in session.execute(consulta).scalars())
+
+def _obter(chave, carregar, *argumentos):
+    #carregar(session, *argumentos) recebe a sessão da unidade de trabalho ou uma sessão própria
+    sessao = _sessao_atual()
+    if sessao is not None and sessao.info.get("cardapio_alterado"):
+        return carregar(sessao, *argumentos)
+
+    def carregar_confirmado():
+        with nova_sessao() as session:
+            return carregar(session, *argumentos)
+
+    return cache_cardapio.obter(chave, carregar_confirmado)
+
+def obter_prato(id_prato):
+    return _obter(("prato", id_prato), _carregar_prato, id_prato)
+
+def obter_categoria(id_categoria):
+    return _obter(("categoria", id_categoria), _carregar_categoria, id_categoria)
+
+def preco_prato(id_prato):
+    prato = obter_prato(id_prato)
+    return prato.preco if prato is not None else None
+
+def pratos_da_categoria(id_categoria):
+    return _obter(("pratos_categoria", id_categoria), _carregar_pratos_da_categoria, id_categoria)
+
+def estatisticas_cache():
+    return cache_cardapio.estatisticas()
+
+def invalidar_cardapio(session):
+    #Invalida já e de novo no commit, caso outra thread recarregue antes da transação terminar
+    cache_cardapio.invalidar()
+    session.info["cardapio_alterado"] = True
+
+#after_commit também é chamado no RELEASE de um SAVEPOINT (begin_nested), que ainda não confirma nada:
+#a marca só é retirada no fim da transação mais externa
+@event.listens_for(Session, "after_transaction_end")
+def _invalidar_cardapio_no_fim(session, transacao):
+    if transacao.parent is None and session.info.pop("cardapio_alterado", False):
+        cache_cardapio.invalidar()
@@ -0,0 +1,650 @@
+from datetime import date
+from getpass import getpass
+import argparse
+import json
+import os
+import sys
+
+#Cada comando importa os módulos de que precisa: importar a CLI (e "python -m restaurante --help") não carrega
+#o SQLAlchemy nem cria o engine. O comando tempo-importacao confere esse custo contra um orçamento
+# Controle de acesso
+USUARIOS = {
+    "admin": "admin123",
+    "gerente": "gerente123"
+}
+
+def credenciais_validas(usuario, senha):
+    return USUARIOS.get(usuario) == senha
+
+def autenticar_usuario():
+    print("=== Autenticação ===")
+    usuario = input("Usuário: ")
+    senha = getpass("Senha: ")
+
+    if credenciais_validas(usuario, senha):
+        print("Acesso permitido")
+        return True
+    else:
+        print("Acesso negado, usuário ou senha incorretos")
+        return False
+
+#Funções para definir os menus para o usuário
+
+def exibir_menu():
+    print("--- MENU PRINCIPAL ---")
+    print("1. Categorias")
+    print("2. Pratos")
+    print("3. Clientes")
+    print("4. Pedidos")
+    print("5. Consultar todas as tabelas")
+    print("6. Operações de álgebra relacional")
+    print("7. Relatórios de vendas")
+    print("8. Pesquisar pratos e clientes")
+    print("9. Estatísticas de consultas")
+    print("0. Sair")
+    opcao = input("Escolha uma opção: ")
+    return opcao
+
+def menu_categoria():
+    print("--- MENU CATEGORIAS ---")
+    print("1. Criar categoria")
+    print("2. Ler categoria")
+    print("3. Atualizar categoria")
+    print("4. Excluir categoria")
+    opcao = input("Escolha uma opção: ")
+    return opcao
+
+def menu_prato():
+    print("--- MENU PRATOS ---")
+    print("1. Criar prato")
+    print("2. Ler prato")
+    print("3. Atualizar prato")
+    print("4. Excluir prato")
+    opcao = input("Escolha uma opção: ")
+    return opcao
+
+def menu_cliente():
+    print("--- MENU CLIENTES ---")
+    print("1. Criar cliente")
+    print("2. Ler cliente")
+    print("3. Atualizar cliente")
+    print("4. Excluir cliente")
+    opcao = input("Escolha uma opção: ")
+    return opcao
+
+def menu_pedido():
+    print("--- MENU PEDIDOS ---")
+    print("1. Criar pedido")
+    print("2. Ler pedido")
+    print("3. Atualizar pedido")
+    print("4. Excluir pedido")
+    print("5. Importar pedidos de arquivo (CSV/JSONL)")
+    opcao = input("Escolha uma opção: ")
+    return opcao
+
+def menu_algebra_relacional():
+    print("--- MENU ÁLGEBRA RELACIONAL ---")
+    print("1. Selecionar pratos por preço")
+    print("2. Projeção de clientes (nome e telefone)")
+    print("3. Junção de clientes e pedidos")
+    print("4. Diferença de pratos não pedidos")
+    opcao = input("Escolha uma operação: ")
+    return opcao
+
+def ler_filtros_relatorio():
+    data_inicio = input("Data inicial (AAAA-MM-DD) ou deixe vazio: ")
+    data_fim = input("Data final (AAAA-MM-DD) ou deixe vazio: ")
+    limite = input("Máximo de linhas ou deixe vazio: ")
+    return (
+        date.fromisoformat(data_inicio) if data_inicio else None,
+        date.fromisoformat(data_fim) if data_fim else None,
+        int(limite) if limite else None
+    )
+
+def menu_vendas():
+    print("--- MENU RELATÓRIOS DE VENDAS ---")
+    print("1. Receita por dia")
+    print("2. Pratos mais vendidos")
+    print("3. Receita por categoria")
+    print("4. Reconstruir resumo de vendas")
+    opcao = input("Escolha uma opção: ")
+    return opcao
+
+#Função para o menu principal
+
+def main():
+    from .analise import receita_por_dia, pratos_mais_vendidos, receita_por_categoria, reconstruir_vendas_diarias
+    from .busca import pesquisar
+    from .consultas import (consultar_todas_tabelas, selecionar_pratos_por_preco, projetar_clientes_nome_telefone,
+                            diferença_pratos_nao_pedidos)
+    from .crud import (criar_categoria, criar_prato, criar_cliente, criar_pedido_com_itens, ler_categoria, ler_prato,
+                       ler_cliente, ler_pedido, atualizar_categoria, atualizar_prato, atualizar_cliente,
+                       atualizar_pedido, excluir_categoria, excluir_prato, excluir_cliente, excluir_pedido,
+                       RegistroEmUso)
+    from .instrumentacao import imprimir_estatisticas, zerar_estatisticas
+    from .lote import importar_pedidos
+    from .particoes import junção_pedidos_periodo
+
+    if not autenticar_usuario():
+        print("Encerrando o programa devido a falha na autenticação.")
+        return
+    
+    while True:
+        opcao = exibir_menu()
+
+        if opcao == '1': #Categorias
+            escolha = menu_categoria()
+            if escolha == '1': #Criar categoria
+                nome_categoria = input("Digite o nome da nova categoria: ")
+                criar_categoria(nome_categoria)
+                print("Categoria criada com sucesso!")
+            elif escolha == '2': #Ler categoria
+                id_categoria = input("Digite o ID da categoria: ")
+                categoria = ler_categoria(int(id_categoria))
+                print(categoria)
+            elif escolha == '3': #Atualizar categoria
+                id_categoria = input("Digite o ID da categoria a ser atualizada: ")
+                nome_categoria = input("Digite o novo nome da categoria: ")
+                atualizar_categoria(int(id_categoria), nome_categoria)
+                print("Categoria atualizada com sucesso!")
+            elif escolha == '4': #Excluir categoria
+                id_categoria = input("Digite o ID da categoria: ")
+                if id_categoria.isdigit():
+                    try:
+                        excluir_categoria(int(id_categoria))
+                    except RegistroEmUso as e:
+                        print(e)
+                else:
+                    print("ID inválido. Por favor, insira um número inteiro.")
+        
+        elif opcao == '2': #Pratos
+            escolha = menu_prato()
+            if escolha == '1': #Criar prato
+                nome_prato = input("Digite o nome do novo prato: ")
+                preco = input("Digite o preço do prato: ")
+                id_categoria = input("Digite o ID da categoria do prato: ")
+                criar_prato(nome_prato, int(preco), int(id_categoria))
+                print("Prato criado com sucesso!")
+            elif escolha == '2': #Ler prato
+                id_prato = input("Digite o ID do prato: ")
+                prato = ler_prato(int(id_prato))
+                print(prato)
+            elif escolha == '3': #Atualizar prato
+                id_prato = input("Digite o ID do prato a ser atualizado: ")
+                nome_prato = input("Digite o novo nome do prato (ou deixe vazio para não alterar): ")
+                preco = input("Digite o novo preço do prato (ou deixe vazio para não alterar): ")
+                id_categoria = input("Digite o novo ID da categoria (ou deixe vazio para não alterar): ")
+                atualizar_prato(
+                    int(id_prato),
+                    nome_prato if nome_prato else None,
+                    int(preco) if preco else None,
+                    int(id_categoria) if id_categoria else None
+                )
+                print("Prato atualizado com sucesso!")
+            elif escolha == '4': #Excluir prato
+                id_prato = input("Digite o ID do prato: ")
+                if id_prato.isdigit():
+                    try:
+                        excluir_prato(int(id_prato))
+                    except RegistroEmUso as e:
+                        print(e)
+                else:
+                    print("ID inválido. Por favor, insira um número inteiro.")
+
+        elif opcao == '3': #Clientes
+            escolha = menu_cliente()
+            if escolha == '1': #Criar cliente
+                nome_cliente = input("Digite o nome do novo cliente: ")
+                telefone = input("Digite o telefone do cliente: ")
+                criar_cliente(nome_cliente, telefone)
+                print("Cliente criado com sucesso!")
+            elif escolha == '2': #Ler cliente
+                id_cliente = input("Digite o ID do cliente: ")
+                cliente = ler_cliente(int(id_cliente))
+                print(cliente)
+            elif escolha == '3': #Atualizar cliente
+                id_cliente = input("Digite o ID do cliente a ser atualizado: ")
+                nome_cliente = input("Digite o novo nome do cliente (ou deixe vazio para não alterar): ")
+                telefone = input("Digite o novo telefone do cliente (ou deixe vazio para não alterar): ")
+                atualizar_cliente(
+                    int(id_cliente),
+                    nome_cliente if nome_cliente else None,
+                    telefone if telefone else None
+                )
+                print("Cliente atualizado com sucesso!")
+            elif escolha == '4': #Excluir cliente
+                id_cliente = input("Digite o ID do cliente: ")
+                if id_cliente.isdigit():
+                    excluir_cliente(int(id_cliente))
+                else:
+                    print("ID inválido. Por favor, insira um número inteiro.")
+
+        elif opcao == '4': #Pedidos
+            escolha = menu_pedido()
+            if escolha == '1': #Criar pedido
+                id_cliente = input("Digite o ID do cliente: ")
+                data_pedido = input("Digite a data do pedido (AAAA-MM-DD): ")
+                itens = []
+                while True:
+                    id_prato = input("Digite o ID do prato (ou deixe vazio para encerrar o pedido): ")
+                    if not id_prato:
+                        break
+                    quantidade = input("Digite a quantidade (ou deixe vazio para 1): ")
+                    itens.append((int(id_prato), int(quantidade) if quantidade else 1))
+                criar_pedido_com_itens(int(id_cliente), date.fromisoformat(data_pedido), itens)
+            elif escolha == '2': #Ler pedido
+                id_pedido = input("Digite o ID do pedido: ")
+                pedido = ler_pedido(int(id_pedido))
+                print(pedido)
+                if pedido:
+                    for item in pedido.itens:
+                        print(f"    {item}")
+            elif escolha == '3': #Atualizar pedido
+                id_pedido = input("Digite o ID do pedido a ser atualizado: ")
+                id_cliente = input("Digite o novo ID do cliente (ou deixe vazio para não alterar): ")
+                id_prato = input("Digite o novo ID do prato (ou deixe vazio para não alterar): ")
+                data_pedido = input("Digite a nova data do pedido (AAAA-MM-DD) ou deixe vazio: ")
+                atualizar_pedido(
+                    int(id_pedido),
+                    int(id_cliente) if id_cliente else None,
+                    int(id_prato) if id_prato else None,
+                    date.fromisoformat(data_pedido) if data_pedido else None
+                )
+                print("Pedido atualizado com sucesso!")
+            elif escolha == '4': #Excluir pedido
+                id_pedido = input("Digite o ID do pedido: ")
+                if id_pedido.isdigit():
+                    excluir_pedido(int(id_pedido))
+                else:
+                    print("ID inválido. Por favor, insira um número inteiro.")
+            elif escolha == '5': #Importar pedidos
+                caminho = input("Digite o caminho do arquivo (.csv ou .jsonl): ")
+                resultado = importar_pedidos(caminho)
+                if resultado:
+                    for linha, motivo in resultado["rejeitados"]:
+                        print(f"Linha {linha} rejeitada: {motivo}")
+
+        elif opcao == '5': #Consultar todas as tabelas
+            secoes = input("Seções (categorias, pratos, clientes, pedidos) separadas por vírgula ou deixe vazio para todas: ")
+            data_inicio, data_fim, limite = ler_filtros_relatorio()
+            consultar_todas_tabelas(
+                [secao.strip() for secao in secoes.split(",")] if secoes else None,
+                data_inicio, data_fim, limite
+            )
+        
+        elif opcao == '6':  # Operações de álgebra relacional
+            operacao = menu_algebra_relacional()
+            if operacao == '1':  # Seleção por preço
+                preco = float(input("Digite o preço mínimo: "))
+                selecionar_pratos_por_preco(preco)
+            elif operacao == '2':  # Projeção de clientes
+                projetar_clientes_nome_telefone()
+            elif operacao == '3':  # Junção de clientes e pedidos (inclui meses arquivados do período)
+                junção_pedidos_periodo(*ler_filtros_relatorio())
+            elif operacao == '4':  # Diferença de pratos não pedidos
+                dias = input("Considerar apenas os últimos N dias (ou deixe vazio para todo o histórico): ")
+                diferença_pratos_nao_pedidos(int(dias) if dias else None)
+
+        elif opcao == '7': #Relatórios de vendas
+            escolha = menu_vendas()
+            if escolha in ('1', '2', '3'):
+                data_inicio, data_fim, limite = ler_filtros_relatorio()
+            if escolha == '1': #Receita por dia
+                for linha in receita_por_dia(data_inicio, data_fim)[:limite]:
+                    print(f"{linha.data}: {linha.qtd} pratos, receita {linha.receita}")
+            elif escolha == '2': #Pratos mais vendidos
+                for linha in pratos_mais_vendidos(limite or 10, data_inicio, data_fim):
+                    print(f"{linha.nome_prato} (ID {linha.id_prato}): {linha.qtd} vendidos, receita {linha.receita}")
+            elif escolha == '3': #Receita por categoria
+                for linha in receita_por_categoria(data_inicio, data_fim)[:limite]:
+                    print(f"{linha.nome_categoria} (ID {linha.id_categoria}): {linha.qtd} pratos, receita {linha.receita}")
+            elif escolha == '4': #Reconstruir resumo
+                desde = input("Reconstruir a partir da data (AAAA-MM-DD) ou deixe vazio para todo o histórico: ")
+                reconstruir_vendas_diarias(date.fromisoformat(desde) if desde else None)
+
+        elif opcao == '8': #Pesquisar
+            texto = input("Digite parte do nome do prato, do nome do cliente ou do telefone: ")
+            limite = input("Quantidade máxima de resultados (ou deixe vazio para 10): ")
+            pesquisar(texto, int(limite) if limite else 10)
+
+        elif opcao == '9': #Estatísticas de consultas
+            imprimir_estatisticas()
+            if input("Zerar as estatísticas? (s/n): ").lower() == 's':
+                zerar_estatisticas()
+
+        elif opcao == '0': #Sair
+            print("Saindo")
+            break
+
+        else:
+            print("Opção inválida. Por favor, escolha uma opção válida.")
+
+def executar_roteiro_autenticado(arquivo, usuario, lote, parar_no_erro, atomico, saida):
+    #Autentica uma vez (senha em RESTAURANTE_SENHA ou digitada) e executa todo o roteiro no mesmo processo;
+    #as mensagens de autenticação vão para stderr, stdout fica só com os resultados JSON
+    from .roteiro import LOTE_ROTEIRO, executar_roteiro
+    senha = os.environ.get("RESTAURANTE_SENHA")
+    if senha is None:
+        senha = getpass(f"Senha de {usuario}: ", stream=sys.stderr)
+    if not credenciais_validas(usuario, senha):
+        print("Acesso negado, usuário ou senha incorretos", file=sys.stderr)
+        return 2
+    entrada = sys.stdin if arquivo == "-" else open(arquivo, encoding="utf-8")
+    destino = open(saida, "w", encoding="utf-8") if saida else sys.stdout
+    try:
+        resumo = executar_roteiro(entrada, _padrao(lote, LOTE_ROTEIRO), parar_no_erro, atomico, destino)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if destino is not sys.stdout:
+            destino.close()
+    print(f"{resumo['comandos']} comandos ({resumo['ok']} ok, {resumo['erros']} com erro) em "
+          f"{resumo['transacoes']} transações, {resumo['segundos']:.2f} s"
+          f"{'; roteiro desfeito' if resumo['desfeito'] else ''}.", file=sys.stderr)
+    return 1 if resumo["erros"] else 0
+
+def _usar_banco(arquivo):
+    from .banco import configurar_banco
+    configurar_banco(f"sqlite:///{arquivo}")
+
+def _padrao(valor, padrao):
+    #Opções cujo padrão é constante de outro módulo ficam com None no argparse, para não importá-lo antes da hora
+    return padrao if valor is None else valor
+
+async def _executar_carga_assincrona(banco, niveis, pedidos_por_cliente):
+    #Importado aqui para que a CLI funcione sem o aiosqlite instalado
+    from . import assincrono
+    await assincrono.configurar_banco_assincrono(f"sqlite+aiosqlite:///{banco}")
+    try:
+        await assincrono.teste_carga(niveis, pedidos_por_cliente)
+    finally:
+        await assincrono.encerrar()
+
+#Comandos de linha de comando: sem argumentos abre o menu interativo
+
+def executar_comando(argumentos=None):
+    parser = argparse.ArgumentParser(description="Sistema de pedidos do restaurante")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="mede as consultas executadas (o menu interativo e o serviço já medem)")
+    parser.add_argument("--lento-ms", type=float,
+                        help="duração a partir da qual uma consulta entra no registro de lentas")
+    parser.add_argument("--log-lento", help="arquivo JSONL onde as consultas lentas são acrescentadas")
+    parser.add_argument("--stats-json", help="grava as estatísticas de consultas neste arquivo ao terminar")
+    comandos = parser.add_subparsers(dest="comando")
+    comandos.add_parser("migrar", help="cria tabelas e índices que faltam no banco existente")
+    comandos.add_parser("planos", help="verifica se as consultas publicadas usam índices")
+    importacao = comandos.add_parser("tempo-importacao",
+                                     help="mede a importação do pacote e da CLI e falha acima do orçamento")
+    importacao.add_argument("--repeticoes", type=int, default=5, help="processos medidos por módulo (vale o menor)")
+    reconstruir = comandos.add_parser("reconstruir-vendas", help="recalcula o resumo vendas_diarias")
+    reconstruir.add_argument("--desde", type=date.fromisoformat, help="data inicial (AAAA-MM-DD)")
+    gerar = comandos.add_parser("gerar-dados", help="preenche um banco com dados sintéticos")
+    gerar.add_argument("banco", help="arquivo SQLite de destino")
+    gerar.add_argument("--pedidos", type=int, default=100000)
+    gerar.add_argument("--clientes", type=int)
+    gerar.add_argument("--pratos", type=int)
+    gerar.add_argument("--categorias", type=int)
+    gerar.add_argument("--semente", type=int, default=42)
+    gerar.add_argument("--assimetria", type=float, default=1.1, help="expoente da distribuição de Zipf")
+    benchmark = comandos.add_parser("benchmark", help="mede as funções públicas em várias escalas")
+    benchmark.add_argument("--escalas", default="1000,10000,100000",
+                           help="quantidades de pedidos separadas por vírgula")
+    benchmark.add_argument("--repeticoes", type=int, default=3)
+    benchmark.add_argument("--diretorio", default=".", help="onde criar os bancos de benchmark")
+    benchmark.add_argument("--saida", help="arquivo JSON com os resultados")
+    benchmark.add_argument("--semente", type=int, default=42)
+    leituras = comandos.add_parser("benchmark-leituras",
+                                   help="compara a latência da leitura por chave primária antes e depois")
+    leituras.add_argument("banco", help="arquivo SQLite (recebe dados sintéticos se não tiver pratos)")
+    leituras.add_argument("--chamadas", type=int, default=2000)
+    concorrencia = comandos.add_parser("benchmark-atualizacoes",
+                                       help="compara atualizações concorrentes antes e depois (altera preços)")
+    concorrencia.add_argument("banco", help="arquivo SQLite (recebe dados sintéticos se não tiver pratos)")
+    concorrencia.add_argument("--threads", type=int, default=8)
+    concorrencia.add_argument("--atualizacoes", type=int, default=300, help="atualizações por thread")
+    concorrencia.add_argument("--incrementos", type=int, default=100, help="incrementos por thread")
+    sincronizacao = comandos.add_parser("benchmark-sincronizacao",
+                                        help="compara reler as tabelas com ler o registro de alterações")
+    sincronizacao.add_argument("banco", help="arquivo SQLite (recebe dados sintéticos se não tiver pratos)")
+    sincronizacao.add_argument("--alteracoes", default="10,100,1000,10000",
+                               help="quantidades de pedidos alterados separadas por vírgula")
+    copia_carga = comandos.add_parser("benchmark-copia",
+                                      help="mede a gravação de pedidos sem cópia, com cópia a quente e com trava")
+    copia_carga.add_argument("banco", help="arquivo SQLite (recebe dados sintéticos se não tiver pratos)")
+    copia_carga.add_argument("--segundos", type=float, default=5, help="duração da medição sem cópia")
+    copia_carga.add_argument("--escritores", type=int, default=4, help="threads criando pedidos")
+    copia_carga.add_argument("--paginas", type=int, help="páginas copiadas por passo")
+    copia_carga.add_argument("--pausa", type=float, help="segundos entre os passos")
+    roteiro_carga = comandos.add_parser("benchmark-roteiro",
+                                        help="compara um processo por comando com o modo roteiro em lotes")
+    roteiro_carga.add_argument("banco", help="arquivo SQLite (recebe dados sintéticos se não tiver pratos)")
+    roteiro_carga.add_argument("--comandos", type=int, default=2000)
+    roteiro_carga.add_argument("--lotes", default="1,10,100,1000",
+                               help="comandos por transação, separados por vírgula")
+    roteiro_carga.add_argument("--processos", type=int, default=20, help="comandos medidos com um processo cada")
+    carga = comandos.add_parser("carga-assincrona", help="mede a vazão de pedidos da camada assíncrona")
+    carga.add_argument("banco", help="arquivo SQLite (recebe dados sintéticos se não tiver pratos)")
+    carga.add_argument("--clientes", default="1,2,4,8,16,32,64",
+                       help="quantidades de clientes simultâneos separadas por vírgula")
+    carga.add_argument("--pedidos-por-cliente", type=int, default=200)
+    arquivar = comandos.add_parser("arquivar", help="move meses antigos de pedidos para arquivos mensais")
+    arquivar.add_argument("--antes", type=date.fromisoformat, required=True,
+                          help="arquiva os meses completos anteriores a esta data (AAAA-MM-DD)")
+    arquivar.add_argument("--diretorio", help="diretório das partições, relativo ao banco principal")
+    arquivar.add_argument("--sem-vacuum", action="store_true", help="não compacta o banco principal")
+    comandos.add_parser("particoes", help="lista as partições de pedidos arquivadas")
+    reajuste = comandos.add_parser("reajustar-precos", help="reajusta os preços dos pratos em um percentual")
+    reajuste.add_argument("percentual", type=float, help="por exemplo 8 para +8%% ou -5 para -5%%")
+    reajuste.add_argument("--categoria", type=int, help="apenas os pratos desta categoria")
+    expurgo = comandos.add_parser("excluir-pedidos", help="exclui os pedidos anteriores a uma data")
+    expurgo.add_argument("--antes", type=date.fromisoformat, required=True,
+                         help="exclui os pedidos com data anterior a esta (AAAA-MM-DD)")
+    alteracoes = comandos.add_parser("alteracoes", help="mostra as alterações pendentes de um consumidor")
+    alteracoes.add_argument("consumidor", help="nome do consumidor (a posição fica salva no banco)")
+    alteracoes.add_argument("--lote", type=int, help="alterações lidas por vez")
+    alteracoes.add_argument("--tabelas", help="apenas estas tabelas, separadas por vírgula")
+    alteracoes.add_argument("--seguir", type=float, metavar="SEGUNDOS",
+                            help="continua esperando novas alterações, consultando a cada SEGUNDOS")
+    alteracoes.add_argument("--registrar", action="store_true",
+                            help="só registra o consumidor na última alteração (após uma carga completa)")
+    comandos.add_parser("consumidores", help="lista os consumidores do registro de alterações")
+    comandos.add_parser("compactar-alteracoes", help="apaga as alterações confirmadas por todos os consumidores")
+    copiar = comandos.add_parser("copiar",
+                                 help="grava uma cópia de segurança (banco e partições) sem parar as gravações")
+    copiar.add_argument("--diretorio", help="diretório das cópias, relativo ao banco")
+    copiar.add_argument("--paginas", type=int, help="páginas copiadas por passo")
+    copiar.add_argument("--pausa", type=float, help="segundos entre os passos")
+    copiar.add_argument("--sem-gzip", action="store_true", help="grava a cópia sem compactar")
+    copiar.add_argument("--manter", type=int,
+                        help="quantas cópias manter no diretório (0 mantém todas)")
+    copiar.add_argument("--banco", help="arquivo SQLite (padrão: banco_restaurante.db)")
+    restaurar = comandos.add_parser("restaurar-copia", help="restaura uma cópia em um novo arquivo")
+    restaurar.add_argument("copia", help="diretório gravado por 'copiar' (ou arquivo .db/.db.gz antigo)")
+    restaurar.add_argument("destino", help="arquivo SQLite a criar (não pode existir); as partições ficam ao lado")
+    roteiro = comandos.add_parser("roteiro", help="executa comandos JSON (um por linha) sem o menu interativo")
+    roteiro.add_argument("arquivo", nargs="?", default="-", help="arquivo JSONL (padrão: entrada padrão)")
+    roteiro.add_argument("--usuario", default=os.environ.get("RESTAURANTE_USUARIO"),
+                         help="usuário (ou RESTAURANTE_USUARIO); a senha vem de RESTAURANTE_SENHA ou é pedida")
+    roteiro.add_argument("--lote", type=int, help="comandos por transação")
+    roteiro.add_argument("--parar-no-erro", action="store_true",
+                         help="para no primeiro erro, mantendo os comandos anteriores")
+    roteiro.add_argument("--atomico", action="store_true", help="tudo em uma transação; um erro desfaz tudo")
+    roteiro.add_argument("--saida", help="arquivo JSONL de resultados (padrão: saída padrão)")
+    roteiro.add_argument("--banco", help="arquivo SQLite (padrão: banco_restaurante.db)")
+    servidor = comandos.add_parser("servir", help="inicia o serviço HTTP/JSON local")
+    servidor.add_argument("--host", default="127.0.0.1")
+    servidor.add_argument("--porta", type=int, default=8000)
+    servidor.add_argument("--trabalhadores", type=int,
+                          help="threads que atendem as conexões")
+    servidor.add_argument("--banco", help="arquivo SQLite (padrão: banco_restaurante.db)")
+    exportar = comandos.add_parser("exportar", help="exporta as tabelas em arquivos colunares NumPy (.npy)")
+    exportar.add_argument("destino", help="diretório de destino")
+    exportar.add_argument("--bloco", type=int, default=100_000, help="linhas lidas por vez")
+    exportar.add_argument("--banco", help="arquivo SQLite (padrão: banco_restaurante.db)")
+    importar = comandos.add_parser("importar", help="importa um diretório gerado por 'exportar'")
+    importar.add_argument("origem", help="diretório com o manifesto.json")
+    importar.add_argument("--substituir", action="store_true", help="apaga os dados existentes antes de importar")
+    importar.add_argument("--bloco", type=int, default=100_000, help="linhas gravadas por executemany")
+    importar.add_argument("--banco", help="arquivo SQLite (padrão: banco_restaurante.db)")
+    conferir = comandos.add_parser("conferir-algebra",
+                                   help="executa a álgebra relacional vetorizada e compara com o SQL")
+    conferir.add_argument("--origem", help="diretório gerado por 'exportar' (padrão: lê do banco)")
+    conferir.add_argument("--preco-minimo", type=int, default=30)
+    conferir.add_argument("--dias", type=int, default=30)
+    conferir.add_argument("--data-inicio", type=date.fromisoformat)
+    conferir.add_argument("--data-fim", type=date.fromisoformat)
+    conferir.add_argument("--banco", help="arquivo SQLite (padrão: banco_restaurante.db)")
+    estatisticas = comandos.add_parser("stats", help="mostra estatísticas de consultas gravadas com --stats-json")
+    estatisticas.add_argument("arquivo", help="arquivo JSON gravado com --stats-json")
+    estatisticas.add_argument("--limite", type=int, default=10, help="linhas por seção")
+    args = parser.parse_args(argumentos)
+
+    if args.instrumentar or args.log_lento or args.stats_json or args.comando in (None, "servir"):
+        from .instrumentacao import ativar_instrumentacao
+        ativar_instrumentacao(args.lento_ms, args.log_lento)
+    try:
+        return _despachar(args)
+    finally:
+        if args.stats_json:
+            from .instrumentacao import salvar_estatisticas
+            salvar_estatisticas(args.stats_json)
+
+def _despachar(args):
+    if args.comando == "migrar":
+        from .migracao import migrar_banco
+        migrar_banco()
+    elif args.comando == "planos":
+        from .migracao import verificar_planos_consulta
+        resultados = verificar_planos_consulta()
+        return 0 if all(usa_indice for _, _, usa_indice in resultados) else 1
+    elif args.comando == "tempo-importacao":
+        from .benchmark import verificar_tempo_importacao
+        return 0 if verificar_tempo_importacao(args.repeticoes) else 1
+    elif args.comando == "reconstruir-vendas":
+        from .analise import reconstruir_vendas_diarias
+        reconstruir_vendas_diarias(args.desde)
+    elif args.comando == "gerar-dados":
+        from .benchmark import gerar_dados_sinteticos
+        _usar_banco(args.banco)
+        gerar_dados_sinteticos(args.pedidos, args.clientes, args.pratos, args.categorias,
+                               args.semente, args.assimetria)
+    elif args.comando == "benchmark":
+        from .benchmark import executar_benchmark
+        escalas = [int(escala) for escala in args.escalas.split(",")]
+        executar_benchmark(escalas, args.repeticoes, args.diretorio, args.saida, args.semente)
+    elif args.comando in ("benchmark-leituras", "benchmark-atualizacoes", "benchmark-sincronizacao", "benchmark-copia",
+                          "benchmark-roteiro", "carga-assincrona"):
+        from . import benchmark
+        from .cache import pratos_da_categoria
+        _usar_banco(args.banco)
+        if not pratos_da_categoria(1):
+            benchmark.gerar_dados_sinteticos(10000)
+        if args.comando == "benchmark-leituras":
+            benchmark.comparar_leituras_por_id(args.chamadas)
+        elif args.comando == "benchmark-atualizacoes":
+            resultados = benchmark.comparar_atualizacoes_concorrentes(args.threads, args.atualizacoes,
+                                                                      args.incrementos)
+            #A forma anterior perde incrementos por construção; a atual (a última) não pode perder nenhum
+            if resultados[-1]["atualizacoes_perdidas"]:
+                return 1
+        elif args.comando == "benchmark-sincronizacao":
+            benchmark.comparar_sincronizacao([int(quantidade) for quantidade in args.alteracoes.split(",")])
+        elif args.comando == "benchmark-copia":
+            benchmark.comparar_copias_sob_carga(args.segundos, args.escritores,
+                                                _padrao(args.paginas, benchmark.PAGINAS_POR_PASSO),
+                                                _padrao(args.pausa, benchmark.PAUSA_ENTRE_PASSOS))
+        elif args.comando == "benchmark-roteiro":
+            benchmark.comparar_roteiro(args.comandos, [int(lote) for lote in args.lotes.split(",")], args.processos)
+        elif args.comando == "carga-assincrona":
+            import asyncio
+            niveis = [int(clientes) for clientes in args.clientes.split(",")]
+            asyncio.run(_executar_carga_assincrona(args.banco, niveis, args.pedidos_por_cliente))
+    elif args.comando == "arquivar":
+        from .particoes import DIRETORIO_ARQUIVO, arquivar_pedidos
+        if arquivar_pedidos(args.antes, _padrao(args.diretorio, DIRETORIO_ARQUIVO), not args.sem_vacuum) is None:
+            return 1
+    elif args.comando == "particoes":
+        from .particoes import listar_particoes
+        for particao in listar_particoes():
+            print(f"{particao.mes}: {particao.pedidos} pedidos, {particao.itens} itens em {particao.caminho}")
+    elif args.comando == "reajustar-precos":
+        from .crud import reajustar_precos
+        if reajustar_precos(args.percentual, args.categoria) is None:
+            return 1
+    elif args.comando == "excluir-pedidos":
+        from .crud import excluir_pedidos_anteriores
+        if excluir_pedidos_anteriores(args.antes) is None:
+            return 1
+    elif args.comando == "alteracoes":
+        from .alteracoes import LOTE_ALTERACOES, acompanhar_alteracoes, registrar_consumidor
+        if args.registrar:
+            return 0 if registrar_consumidor(args.consumidor) is not None else 1
+        tabelas = args.tabelas.split(",") if args.tabelas else None
+        try:
+            for lote in acompanhar_alteracoes(args.consumidor, _padrao(args.lote, LOTE_ALTERACOES), tabelas,
+                                              args.seguir):
+                for alteracao in lote:
+                    print(f"{alteracao.seq}: {alteracao.operacao} {alteracao.tabela} {alteracao.id_registro or ''} "
+                          f"(versão {alteracao.versao})")
+        except ValueError as e:
+            print(f"Erro ao ler alterações: {e}")
+            return 1
+    elif args.comando == "consumidores":
+        from .alteracoes import listar_consumidores
+        for consumidor in listar_consumidores():
+            print(f"{consumidor.nome}: alteração {consumidor.posicao}")
+    elif args.comando == "compactar-alteracoes":
+        from .alteracoes import compactar_alteracoes
+        if compactar_alteracoes() is None:
+            return 1
+    elif args.comando == "copiar":
+        from . import copias
+        if args.banco:
+            _usar_banco(args.banco)
+        if copias.copiar_banco(_padrao(args.diretorio, copias.DIRETORIO_COPIAS),
+                               _padrao(args.paginas, copias.PAGINAS_POR_PASSO),
+                               _padrao(args.pausa, copias.PAUSA_ENTRE_PASSOS), not args.sem_gzip,
+                               _padrao(args.manter, copias.COPIAS_MANTIDAS)) is None:
+            return 1
+    elif args.comando == "restaurar-copia":
+        from .copias import restaurar_copia
+        if restaurar_copia(args.copia, args.destino) is None:
+            return 1
+    elif args.comando == "roteiro":
+        if not args.usuario:
+            print("Informe --usuario ou RESTAURANTE_USUARIO.", file=sys.stderr)
+            return 2
+        if args.banco:
+            _usar_banco(args.banco)
+        return executar_roteiro_autenticado(args.arquivo, args.usuario, args.lote, args.parar_no_erro,
+                                            args.atomico, args.saida)
+    elif args.comando == "servir":
+        from .servico import TRABALHADORES_PADRAO, servir
+        if args.banco:
+            _usar_banco(args.banco)
+        servir(args.host, args.porta, _padrao(args.trabalhadores, TRABALHADORES_PADRAO))
+    elif args.comando in ("exportar", "importar"):
+        #Importado aqui para que a CLI funcione sem o NumPy instalado
+        from . import colunar
+        if args.banco:
+            _usar_banco(args.banco)
+        if args.comando == "exportar":
+            resultado = colunar.exportar_colunar(args.destino, args.bloco)
+        else:
+            resultado = colunar.importar_colunar(args.origem, args.substituir, args.bloco)
+        if resultado is None:
+            return 1
+    elif args.comando == "conferir-algebra":
+        #Importado aqui para que a CLI funcione sem o NumPy instalado
+        from . import algebra
+        if args.banco:
+            _usar_banco(args.banco)
+        if not algebra.conferir_algebra(args.origem, args.preco_minimo, args.dias, args.data_inicio, args.data_fim):
+            return 1
+    elif args.comando == "stats":
+        from .instrumentacao import imprimir_estatisticas
+        with open(args.arquivo, encoding="utf-8") as arquivo:
+            imprimir_estatisticas(json.load(arquivo), args.limite)
+    else:
+        main()
+    return 0
@@ -0,0 +1,322 @@
+import json
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.format import dtype_to_descr, write_array_header_1_0
+from sqlalchemy import Date, Integer, create_engine, delete, select
+
+from .banco import obter_engine
+from .cache import cache_cardapio
+from .modelos import (Categoria, Prato, Cliente, Pedido, ItemPedido, VendaDiaria, ParticaoPedidos, Alteracao,
+                      TABELAS_RASTREADAS, criar_busca_textual, criar_registro_alteracoes, preencher_vendas_diarias,
+                      remover_busca_textual, remover_registro_alteracoes)
+from .particoes import _caminho_absoluto, particoes_do_periodo
+
+#Exportação e importação colunar do banco (NumPy)
+#Cada tabela vira um diretório com um arquivo .npy por coluna (inteiros em int64, datas em datetime64[D]
+#com NaT para nulos, textos em unicode de largura fixa) e, para colunas inteiras ou de texto que aceitam
+#nulo, um <coluna>.nulos.npy booleano. O manifesto.json descreve tabelas, colunas e linhas e é gravado
+#por último: um diretório sem manifesto é uma exportação incompleta.
+#A leitura é feita em blocos (fetchmany) acrescentados a cada arquivo, então o consumo de memória não
+#depende do tamanho do banco. Os meses arquivados (particoes.py) entram em pedidos e itens_pedido.
+#O resumo vendas_diarias também é exportado (inclui os meses arquivados) e só é recalculado na importação
+#de um diretório que não o tenha. A importação grava tudo em uma única transação, com executemany por bloco.
+#Em vez de uma alteração por linha, o registro de alterações recebe uma alteração "R" (recarga) por tabela
+#rastreada importada: os consumidores releem essas tabelas inteiras.
+#As chaves estrangeiras são verificadas só no fim da carga (PRAGMA defer_foreign_keys). As partições não
+#acompanham as exclusões em cascata do banco principal: um cliente excluído depois do arquivamento deixa
+#pedidos sem cliente nos meses arquivados. Essas linhas são removidas na importação, como a cascata teria
+#feito, e informadas, em vez de fazer a importação inteira falhar.
+
+TAMANHO_BLOCO = 100_000
+ARQUIVO_MANIFESTO = "manifesto.json"
+FORMATO = "restaurante-colunar"
+VERSAO_FORMATO = 1
+#Ordem das chaves estrangeiras: a importação segue esta ordem e a limpeza a ordem inversa
+TABELAS_EXPORTADAS = (Categoria.__table__, Prato.__table__, Cliente.__table__, Pedido.__table__,
+                      ItemPedido.__table__, VendaDiaria.__table__)
+TABELAS_PARTICIONADAS = {Pedido.__tablename__, ItemPedido.__tablename__}
+#Controle de concorrência, não dado: não existe nas partições e recomeça em 1 na importação
+COLUNAS_NAO_EXPORTADAS = {"versao"}
+
+def _caminho_coluna(diretorio, tabela, coluna, sufixo=""):
+    return os.path.join(diretorio, tabela, f"{coluna}{sufixo}.npy")
+
+def _descrever_colunas(fontes, tabela):
+    #Tipo NumPy de cada coluna; a largura dos textos é o maior comprimento encontrado
+    colunas = []
+    for coluna in tabela.columns:
+        if coluna.name in COLUNAS_NAO_EXPORTADAS:
+            continue
+        if isinstance(coluna.type, Date):
+            tipo = "datetime64[D]"
+        elif isinstance(coluna.type, Integer):
+            tipo = "int64"
+        else:
+            largura = max((fonte.exec_driver_sql(f'SELECT max(length("{coluna.name}")) FROM {tabela.name}').scalar()
+                           or 0) for fonte in fontes)
+            tipo = f"<U{max(largura, 1)}"
+        colunas.append({"nome": coluna.name, "tipo": tipo,
+                        "nulos": bool(coluna.nullable) and not tipo.startswith("datetime64")})
+    return colunas
+
+def _sql_exportacao(tabela, colunas):
+    #Nulos são resolvidos no próprio SQLite: datas viram dias desde 1970-01-01 (NaT para nulo); as demais
+    #colunas que aceitam nulo recebem um valor neutro e uma coluna "é nulo" ao lado
+    expressoes = []
+    for coluna in colunas:
+        nome = f'"{coluna["nome"]}"'
+        if coluna["tipo"].startswith("datetime64"):
+            expressoes.append(f"coalesce(CAST(julianday({nome}) - 2440587.5 AS INTEGER), {np.iinfo(np.int64).min})")
+        elif coluna["nulos"]:
+            neutro = "0" if coluna["tipo"] == "int64" else "''"
+            expressoes += [f"coalesce({nome}, {neutro})", f"{nome} IS NULL"]
+        else:
+            expressoes.append(nome)
+    chave = ", ".join(f'"{coluna.name}"' for coluna in tabela.primary_key.columns)
+    return f"SELECT {', '.join(expressoes)} FROM {tabela.name} ORDER BY {chave}"
+
+def _arquivos_da_tabela(destino, tabela, colunas):
+    #(caminho, tipo gravado no cabeçalho, tipo do campo lido do SQLite) de cada expressão da consulta
+    arquivos = []
+    for coluna in colunas:
+        campo = "int64" if coluna["tipo"].startswith("datetime64") else coluna["tipo"]
+        arquivos.append((_caminho_coluna(destino, tabela.name, coluna["nome"]), coluna["tipo"], campo))
+        if coluna["nulos"]:
+            arquivos.append((_caminho_coluna(destino, tabela.name, coluna["nome"], ".nulos"), "bool", "bool"))
+    return arquivos
+
+def _blocos_estruturados(fontes, tabela, colunas, linhas, tamanho_bloco):
+    #Cada bloco do fetchmany vira um array estruturado (uma conversão em C), com um campo por expressão
+    #da consulta; o total é conferido com a contagem feita no início da leitura
+    estrutura = np.dtype([(f"c{posicao}", campo)
+                          for posicao, (_, _, campo) in enumerate(_arquivos_da_tabela("", tabela, colunas))])
+    sql = _sql_exportacao(tabela, colunas)
+    lidas = 0
+    for fonte in fontes:
+        resultado = fonte.exec_driver_sql(sql)
+        try:
+            while bloco := resultado.cursor.fetchmany(tamanho_bloco):
+                lidas += len(bloco)
+                if lidas > linhas:
+                    raise RuntimeError(f"{tabela.name} tem mais linhas do que as contadas no início da leitura")
+                yield np.array(bloco, dtype=estrutura)
+        finally:
+            resultado.close()
+    if lidas != linhas:
+        raise RuntimeError(f"{tabela.name}: {lidas} linhas lidas, {linhas} esperadas")
+
+def _exportar_tabela(fontes, tabela, colunas, linhas, destino, tamanho_bloco):
+    #Cada campo do bloco é acrescentado ao seu .npy; o cabeçalho já leva o total de linhas, então nada
+    #além do bloco atual fica em memória
+    os.makedirs(os.path.join(destino, tabela.name), exist_ok=True)
+    with ExitStack() as pilha:
+        arquivos = []
+        for caminho, tipo, _ in _arquivos_da_tabela(destino, tabela, colunas):
+            arquivo = pilha.enter_context(open(caminho, "wb"))
+            write_array_header_1_0(arquivo, {"descr": dtype_to_descr(np.dtype(tipo)), "fortran_order": False,
+                                             "shape": (linhas,)})
+            arquivos.append(arquivo)
+        for registros in _blocos_estruturados(fontes, tabela, colunas, linhas, tamanho_bloco):
+            for arquivo, campo in zip(arquivos, registros.dtype.names):
+                arquivo.write(registros[campo].tobytes())
+
+@contextmanager
+def _conectar_particao(caminho):
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Partição não encontrada: {caminho}")
+    engine = create_engine(f"sqlite:///{caminho}")
+    try:
+        with engine.connect() as conexao:
+            yield conexao
+    finally:
+        engine.dispose()
+
+@contextmanager
+def _leitura_consistente():
+    #Transação de leitura explícita: todas as tabelas (e o catálogo de partições) vêm do mesmo instante
+    #do banco, mesmo com gravações acontecendo durante a leitura. Devolve uma função que indica as
+    #fontes de cada tabela (o banco principal e, para pedidos e itens, as partições)
+    with obter_engine().connect() as conexao, ExitStack() as pilha:
+        conexao.exec_driver_sql("BEGIN")
+        particoes = [pilha.enter_context(_conectar_particao(_caminho_absoluto(caminho)))
+                     for _, caminho in particoes_do_periodo(conexao)]
+        try:
+            yield lambda tabela: [conexao] + (particoes if tabela.name in TABELAS_PARTICIONADAS else [])
+        finally:
+            conexao.rollback()
+
+def _contar(fontes, tabela):
+    return sum(fonte.exec_driver_sql(f"SELECT count(*) FROM {tabela.name}").scalar() for fonte in fontes)
+
+def exportar_colunar(destino, tamanho_bloco=TAMANHO_BLOCO):
+    try:
+        inicio = time.perf_counter()
+        tabelas = {}
+        with _leitura_consistente() as fontes_da_tabela:
+            for tabela in TABELAS_EXPORTADAS:
+                fontes = fontes_da_tabela(tabela)
+                colunas = _descrever_colunas(fontes, tabela)
+                linhas = _contar(fontes, tabela)
+                _exportar_tabela(fontes, tabela, colunas, linhas, destino, tamanho_bloco)
+                tabelas[tabela.name] = {"linhas": linhas, "colunas": colunas}
+        manifesto = {"formato": FORMATO, "versao": VERSAO_FORMATO,
+                     "exportado_em": datetime.now().isoformat(timespec="seconds"), "tabelas": tabelas}
+        with open(os.path.join(destino, ARQUIVO_MANIFESTO), "w", encoding="utf-8") as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+        resumo = ", ".join(f"{dados['linhas']} {nome}" for nome, dados in tabelas.items())
+        print(f"Exportados {resumo} para {destino} em {time.perf_counter() - inicio:.1f} s.")
+        return tabelas
+    except Exception as e:
+        print(f"Erro ao exportar dados colunares: {e}")
+
+#Carga em memória: {tabela: (colunas, nulos)}, com um array por coluna e, em nulos, as máscaras das
+#colunas que têm algum valor nulo. Lida do banco ou de um diretório exportado (mapeado em memória)
+
+def _tabela_por_nome(nome):
+    for tabela in TABELAS_EXPORTADAS:
+        if tabela.name == nome:
+            return tabela
+    raise ValueError(f"tabela desconhecida: {nome}")
+
+def _separar_nulos(arrays, colunas):
+    valores, nulos = {}, {}
+    posicao = 0
+    for coluna in colunas:
+        array = arrays[posicao]
+        valores[coluna["nome"]] = array.view(coluna["tipo"]) if coluna["tipo"].startswith("datetime64") else array
+        posicao += 1
+        if coluna["nulos"]:
+            if arrays[posicao].any():
+                nulos[coluna["nome"]] = arrays[posicao]
+            posicao += 1
+    return valores, nulos
+
+def carregar_tabelas(nomes, origem=None, tamanho_bloco=TAMANHO_BLOCO):
+    tabelas = [_tabela_por_nome(nome) for nome in nomes]
+    carregadas = {}
+    if origem is not None:
+        manifesto = ler_manifesto(origem)
+        for tabela in tabelas:
+            colunas = manifesto["tabelas"][tabela.name]["colunas"]
+            arrays = [np.load(caminho, mmap_mode="r") for caminho, _, _ in _arquivos_da_tabela(origem, tabela, colunas)]
+            carregadas[tabela.name] = _separar_nulos(arrays, colunas)
+        return carregadas
+    with _leitura_consistente() as fontes_da_tabela:
+        for tabela in tabelas:
+            fontes = fontes_da_tabela(tabela)
+            colunas = _descrever_colunas(fontes, tabela)
+            linhas = _contar(fontes, tabela)
+            arrays = [np.empty(linhas, dtype=campo) for _, _, campo in _arquivos_da_tabela("", tabela, colunas)]
+            posicao = 0
+            for registros in _blocos_estruturados(fontes, tabela, colunas, linhas, tamanho_bloco):
+                for array, campo in zip(arrays, registros.dtype.names):
+                    array[posicao:posicao + len(registros)] = registros[campo]
+                posicao += len(registros)
+            carregadas[tabela.name] = _separar_nulos(arrays, colunas)
+    return carregadas
+
+#Importação
+
+def ler_manifesto(origem):
+    with open(os.path.join(origem, ARQUIVO_MANIFESTO), encoding="utf-8") as arquivo:
+        manifesto = json.load(arquivo)
+    if manifesto.get("formato") != FORMATO or manifesto.get("versao") != VERSAO_FORMATO:
+        raise ValueError(f"{origem} não é uma exportação colunar na versão {VERSAO_FORMATO}")
+    return manifesto
+
+def _colunas_python(array, nulos, inicio, fim):
+    #Valores de um bloco como objetos Python prontos para o sqlite3 (datas em texto AAAA-MM-DD)
+    parte = array[inicio:fim]
+    if parte.dtype.kind == "M":
+        valores = np.datetime_as_string(parte).tolist()
+        if np.isnat(parte).any():
+            valores = [None if valor == "NaT" else valor for valor in valores]
+        return valores
+    valores = parte.tolist()
+    if nulos is not None and nulos[inicio:fim].any():
+        valores = [None if nulo else valor for valor, nulo in zip(valores, nulos[inicio:fim].tolist())]
+    return valores
+
+def blocos_tabela(origem, nome, dados, tamanho_bloco=TAMANHO_BLOCO):
+    #Linhas (tuplas) de uma tabela exportada, em blocos, lidas dos arquivos mapeados em memória
+    colunas = []
+    for coluna in dados["colunas"]:
+        array = np.load(_caminho_coluna(origem, nome, coluna["nome"]), mmap_mode="r")
+        nulos = (np.load(_caminho_coluna(origem, nome, coluna["nome"], ".nulos"), mmap_mode="r")
+                 if coluna["nulos"] else None)
+        colunas.append((array, nulos))
+    for inicio in range(0, dados["linhas"], tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, dados["linhas"])
+        yield list(zip(*(_colunas_python(array, nulos, inicio, fim) for array, nulos in colunas)))
+
+def _remover_orfaos(conexao):
+    #Na ordem das chaves estrangeiras: a exclusão de um pai em cascata alcança os filhos antes da verificação deles
+    removidos = {}
+    for tabela in TABELAS_EXPORTADAS:
+        if not tabela.foreign_keys:
+            continue
+        linhas = sorted({linha[1] for linha in conexao.exec_driver_sql(f"PRAGMA foreign_key_check({tabela.name})")})
+        if linhas:
+            conexao.exec_driver_sql(f"DELETE FROM {tabela.name} WHERE rowid = ?", [(linha,) for linha in linhas])
+            removidos[tabela.name] = len(linhas)
+    return removidos
+
+def importar_colunar(origem, substituir=False, tamanho_bloco=TAMANHO_BLOCO):
+    try:
+        inicio = time.perf_counter()
+        manifesto = ler_manifesto(origem)
+        importadas = {}
+        with obter_engine().begin() as conexao:
+            ocupadas = [tabela.name for tabela in TABELAS_EXPORTADAS
+                        if conexao.execute(select(tabela).limit(1)).first() is not None]
+            if ocupadas and not substituir:
+                raise ValueError(f"o banco de destino já tem dados em {', '.join(ocupadas)} (use substituir)")
+            remover_registro_alteracoes(conexao)
+            if substituir:
+                #Os meses arquivados também vêm na exportação: o catálogo de partições é esvaziado
+                for tabela in (ParticaoPedidos.__table__,) + TABELAS_EXPORTADAS[::-1]:
+                    conexao.execute(delete(tabela))
+            remover_busca_textual(conexao)
+            conexao.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+            for tabela in TABELAS_EXPORTADAS:
+                dados = manifesto["tabelas"].get(tabela.name)
+                if dados is None:
+                    continue
+                nomes = [coluna["nome"] for coluna in dados["colunas"]]
+                sql = (f"INSERT INTO {tabela.name} ({', '.join(nomes)}) "
+                       f"VALUES ({', '.join('?' * len(nomes))})")
+                #A tabela está vazia: os índices secundários são refeitos de uma vez no fim, ordenando os
+                #dados uma única vez em vez de atualizar cada índice a cada linha
+                for indice in tabela.indexes:
+                    indice.drop(bind=conexao)
+                for linhas in blocos_tabela(origem, tabela.name, dados, tamanho_bloco):
+                    conexao.exec_driver_sql(sql, linhas)
+                for indice in tabela.indexes:
+                    indice.create(bind=conexao)
+                importadas[tabela.name] = dados["linhas"]
+            orfaos = _remover_orfaos(conexao)
+            for nome, quantidade in orfaos.items():
+                print(f"Aviso: {quantidade} linhas de {nome} apontavam para registros excluídos "
+                      "e não foram importadas.")
+            if orfaos:
+                for nome in importadas:
+                    importadas[nome] = conexao.exec_driver_sql(f"SELECT count(*) FROM {nome}").scalar()
+            criar_busca_textual(conexao)
+            criar_registro_alteracoes(conexao)
+            recarregadas = [modelo.__tablename__ for modelo in TABELAS_RASTREADAS
+                            if modelo.__tablename__ in importadas or substituir]
+            if recarregadas:
+                conexao.execute(Alteracao.__table__.insert(),
+                                [{"tabela": tabela, "operacao": "R"} for tabela in recarregadas])
+            if VendaDiaria.__tablename__ not in importadas:
+                preencher_vendas_diarias(conexao)
+        cache_cardapio.invalidar()
+        resumo = ", ".join(f"{linhas} {nome}" for nome, linhas in importadas.items())
+        print(f"Importados {resumo} de {origem} em {time.perf_counter() - inicio:.1f} s.")
+        return importadas
+    except Exception as e:
+        print(f"Erro ao importar dados colunares: {e}")
@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from .banco import abrir_sessao
+from .modelos import Categoria, Prato, Cliente, Pedido, ItemPedido
+
+#Função para consultar todas as tabelas
+#Cada seção é uma única consulta; os pedidos podem ser limitados por período e por quantidade de linhas
+
+SECOES_RELATORIO = ("categorias", "pratos", "clientes", "pedidos")
+
+def _imprimir_secao(titulo, linhas, mensagem_vazia, formatar=str):
+    print(f"{titulo}:")
+    vazia = True
+    for linha in linhas:
+        vazia = False
+        print(formatar(linha))
+    if vazia:
+        print(mensagem_vazia)
+
+def _formatar_linha_pedido(linha):
+    return (f"Pedido {linha.id_pedido}: Cliente {linha.nome_cliente}, "
+            f"Prato {linha.nome_prato} x{linha.quantidade}, Data {linha.data_pedido}")
+
+def consultar_todas_tabelas(secoes=None, data_inicio=None, data_fim=None, limite=None):
+    secoes = secoes or SECOES_RELATORIO
+    with abrir_sessao() as session:
+        if "categorias" in secoes:
+            categorias = session.execute(select(Categoria).order_by(Categoria.id_categoria).limit(limite)).scalars()
+            _imprimir_secao("Categorias", categorias, "Nenhuma categoria cadastrada.")
+
+        if "pratos" in secoes:
+            pratos = session.execute(select(Prato).order_by(Prato.id_prato).limit(limite)).scalars()
+            _imprimir_secao("Pratos", pratos, "Nenhum prato cadastrado.")
+
+        if "clientes" in secoes:
+            clientes = session.execute(select(Cliente).order_by(Cliente.id_cliente).limit(limite)).scalars()
+            _imprimir_secao("Clientes", clientes, "Nenhum cliente cadastrado.")
+
+        if "pedidos" in secoes:
+            pedidos = session.execute(consulta_clientes_pedidos(data_inicio, data_fim, limite))
+            _imprimir_secao("Pedidos", pedidos, "Nenhum pedido cadastrado.", _formatar_linha_pedido)
+
+#Álgebra relacional
+
+#Consultas usadas pelas operações abaixo (também verificadas por verificar_planos_consulta)
+
+def consulta_pratos_por_preco(preco_minimo):
+    return select(Prato).where(Prato.preco >= preco_minimo)
+
+def consulta_clientes_pedidos(data_inicio=None, data_fim=None, limite=None):
+    #Projeção explícita das colunas exibidas: uma consulta, sem carregamento tardio por linha;
+    #uma linha por item do pedido
+    consulta = (select(Pedido.id_pedido, Cliente.nome_cliente, Prato.nome_prato, ItemPedido.quantidade,
+                       Pedido.data_pedido)
+                .join(Pedido.cliente)
+                .join(Pedido.itens)
+                .join(ItemPedido.prato)
+                .order_by(ItemPedido.id_pedido, ItemPedido.id_item)
+                .limit(limite))
+    if data_inicio is not None:
+        consulta = consulta.where(Pedido.data_pedido >= data_inicio)
+    if data_fim is not None:
+        consulta = consulta.where(Pedido.data_pedido <= data_fim)
+    return consulta
+
+def consulta_pratos_nao_pedidos(dias=None, referencia=None):
+    pedidos_do_prato = select(ItemPedido.id_item).where(ItemPedido.id_prato == Prato.id_prato)
+    if dias is not None:
+        inicio = (referencia or date.today()) - timedelta(days=dias)
+        pedidos_do_prato = pedidos_do_prato.join(ItemPedido.pedido).where(Pedido.data_pedido > inicio)
+    return (select(Prato.id_prato, Prato.nome_prato)
+            .where(~pedidos_do_prato.exists())
+            .order_by(Prato.id_prato))
+
+def consulta_clientes_por_telefone(telefone):
+    return select(Cliente).where(Cliente.telefone == telefone)
+
+def consulta_pratos_da_categoria(id_categoria):
+    return select(Prato).where(Prato.id_categoria == id_categoria).order_by(Prato.id_prato)
+
+def selecionar_pratos_por_preco(preco_minimo):
+    with abrir_sessao() as session:
+        try:
+            pratos = session.execute(consulta_pratos_por_preco(preco_minimo)).scalars()
+            for prato in pratos:
+                print(f"{prato}")
+        except Exception as e:
+            print(f"Erro ao selecionar pratos por preço: {e}")
+
+def projetar_clientes_nome_telefone():
+    with abrir_sessao() as session:
+        try:
+            clientes = session.query(Cliente.nome_cliente, Cliente.telefone).all()
+            for cliente in clientes:
+                print(f"Nome: {cliente.nome_cliente}, Telefone: {cliente.telefone}")
+        except Exception as e:
+            print(f"Erro ao projetar nome e telefone dos clientes: {e}")
+
+def linhas_clientes_pedidos(data_inicio=None, data_fim=None, limite=None):
+    with abrir_sessao() as session:
+        yield from session.execute(consulta_clientes_pedidos(data_inicio, data_fim, limite)).yield_per(1000)
+
+def junção_clientes_pedidos(data_inicio=None, data_fim=None, limite=None):
+    try:
+        for linha in linhas_clientes_pedidos(data_inicio, data_fim, limite):
+            print(_formatar_linha_pedido(linha))
+    except Exception as e:
+        print(f"Erro ao realizar junção entre clientes e pedidos: {e}")
+
+def pratos_nao_pedidos(dias=None, referencia=None):
+    #Diferença calculada no banco: pratos sem pedidos (ou sem pedidos nos últimos `dias` dias)
+    with abrir_sessao() as session:
+        yield from session.execute(consulta_pratos_nao_pedidos(dias, referencia)).yield_per(1000)
+
+def diferença_pratos_nao_pedidos(dias=None):
+    try:
+        for prato in pratos_nao_pedidos(dias):
+            print(f"Prato não pedido: {prato.nome_prato}")
+    except Exception as e:
+        print(f"Erro ao selecionar pratos não pedidos: {e}")
@@ -0,0 +1,244 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+from .banco import PRAGMAS_PADRAO, obter_engine
+from .particoes import DIRETORIO_ARQUIVO, _caminho_absoluto
+
+#Cópias de segurança a quente (API de backup online do SQLite)
+#O banco é copiado em passos de paginas_por_passo páginas, com uma pausa entre eles para a cópia não disputar
+#o disco com as gravações. Em modo WAL a conexão de origem mantém uma transação de leitura aberta durante
+#toda a cópia: os escritores continuam gravando no WAL e a cópia é o retrato do banco no início, sem
+#recomeçar (sem essa transação o SQLite recomeça a cópia sempre que outra conexão grava entre dois passos).
+#Cada cópia é um diretório restaurante_AAAAMMDD_HHMMSS com o banco principal (banco.db) e as partições mensais
+#de pedidos do catálogo copiado (particoes.py), nos mesmos caminhos relativos: restaurar a cópia devolve também
+#o histórico arquivado. As partições não mudam depois do arquivamento e são copiadas do mesmo jeito, depois do
+#banco principal. O diretório é montado com o sufixo .parcial, cada arquivo passa por PRAGMA integrity_check e
+#é compactado com gzip (opcional), e só então o diretório recebe o nome final; as cópias mais antigas além de
+#"manter" são apagadas inteiras.
+
+DIRETORIO_COPIAS = "copias"
+PAGINAS_POR_PASSO = 1024
+PAUSA_ENTRE_PASSOS = 0.005
+COPIAS_MANTIDAS = 7
+PREFIXO_COPIA = "restaurante_"
+SUFIXO_PARCIAL = ".parcial"
+ARQUIVO_PRINCIPAL = "banco.db"
+#Sem o modo WAL, gravações constantes podem fazer a cópia recomeçar indefinidamente
+MAXIMO_REINICIOS = 20
+
+def _banco_atual():
+    banco = obter_engine().url.database
+    if not banco or banco == ":memory:":
+        raise ValueError("o banco atual não é um arquivo")
+    return banco
+
+def listar_copias(diretorio=DIRETORIO_COPIAS):
+    #Cópias completas, da mais antiga para a mais recente: diretórios e, de versões anteriores, arquivos
+    #.db ou .db.gz só com o banco principal
+    diretorio = _caminho_absoluto(diretorio)
+    if not os.path.isdir(diretorio):
+        return []
+    copias = []
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if not nome.startswith(PREFIXO_COPIA) or nome.endswith(SUFIXO_PARCIAL):
+            continue
+        if os.path.isdir(caminho) or nome.endswith((".db", ".db.gz")):
+            copias.append(caminho)
+    return sorted(copias)
+
+def _apagar(caminho):
+    if os.path.isdir(caminho):
+        shutil.rmtree(caminho)
+    elif os.path.exists(caminho):
+        os.remove(caminho)
+
+def _rotacionar(diretorio, manter):
+    copias = listar_copias(diretorio)
+    removidas = copias[:-manter] if manter else []
+    for caminho in removidas:
+        _apagar(caminho)
+    return removidas
+
+def _copiar_paginas(origem, destino, paginas_por_passo, pausa):
+    fonte = sqlite3.connect(origem, isolation_level=None)
+    copia = sqlite3.connect(destino)
+    try:
+        fonte.execute(f"PRAGMA busy_timeout = {PRAGMAS_PADRAO['busy_timeout']}")
+        retrato = fonte.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        if retrato:
+            fonte.execute("BEGIN")
+            fonte.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        estado = {"passos": 0, "reinicios": 0, "restantes": None}
+
+        def progresso(status, restantes, total):
+            if estado["restantes"] is not None and restantes > estado["restantes"]:
+                estado["reinicios"] += 1
+                if estado["reinicios"] > MAXIMO_REINICIOS:
+                    raise RuntimeError("a cópia recomeçou várias vezes por causa de gravações; use o modo WAL")
+            estado["passos"] += 1
+            estado["restantes"] = restantes
+            if restantes and pausa:
+                time.sleep(pausa)
+
+        inicio = time.perf_counter()
+        fonte.backup(copia, pages=paginas_por_passo, progress=progresso)
+        segundos = time.perf_counter() - inicio
+        if retrato:
+            fonte.execute("COMMIT")
+        #A cópia herda o modo WAL da origem; como arquivo guardado fica melhor em um arquivo só
+        copia.execute("PRAGMA journal_mode = DELETE")
+        paginas = copia.execute("PRAGMA page_count").fetchone()[0]
+        tamanho_pagina = copia.execute("PRAGMA page_size").fetchone()[0]
+        return {"paginas": paginas, "bytes": paginas * tamanho_pagina, "copia_s": segundos,
+                "passos": estado["passos"], "reinicios": estado["reinicios"], "retrato": retrato}
+    finally:
+        copia.close()
+        fonte.close()
+
+def _verificar_integridade(caminho):
+    conexao = sqlite3.connect(caminho)
+    try:
+        problemas = [linha for (linha,) in conexao.execute("PRAGMA integrity_check")]
+    finally:
+        conexao.close()
+    if problemas != ["ok"]:
+        raise ValueError(f"integrity_check falhou em {caminho}: {'; '.join(problemas[:5])}")
+
+def _compactar(origem, destino, nivel):
+    with open(origem, "rb") as entrada, gzip.open(destino, "wb", compresslevel=nivel) as saida:
+        shutil.copyfileobj(entrada, saida, 1024 * 1024)
+
+def _particoes_da_copia(copia):
+    #(mes, caminho) do catálogo gravado na cópia do banco principal: as partições do mesmo instante da cópia
+    conexao = sqlite3.connect(copia)
+    try:
+        if conexao.execute("SELECT 1 FROM sqlite_master WHERE name = 'particoes_pedidos'").fetchone() is None:
+            return []
+        return conexao.execute("SELECT mes, caminho FROM particoes_pedidos ORDER BY mes").fetchall()
+    finally:
+        conexao.close()
+
+def _copiar_particoes(copia, parcial, paginas_por_passo, pausa):
+    #Partições com caminho absoluto vão para DIRETORIO_ARQUIVO dentro da cópia e o catálogo copiado passa a
+    #apontar para lá, para a cópia não depender de nada fora do próprio diretório
+    copiadas = []
+    relocadas = []
+    for mes, caminho in _particoes_da_copia(copia):
+        origem = _caminho_absoluto(caminho)
+        if not os.path.exists(origem):
+            raise FileNotFoundError(f"partição {mes} não encontrada em {origem}")
+        relativo = caminho
+        if os.path.isabs(caminho):
+            relativo = os.path.join(DIRETORIO_ARQUIVO, os.path.basename(caminho))
+            relocadas.append((relativo, mes))
+        destino = os.path.join(parcial, relativo)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        metricas = _copiar_paginas(origem, destino, paginas_por_passo, pausa)
+        copiadas.append((destino, metricas["bytes"]))
+    if relocadas:
+        conexao = sqlite3.connect(copia)
+        try:
+            conexao.executemany("UPDATE particoes_pedidos SET caminho = ? WHERE mes = ?", relocadas)
+            conexao.commit()
+        finally:
+            conexao.close()
+    return copiadas
+
+def copiar_banco(diretorio=DIRETORIO_COPIAS, paginas_por_passo=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS,
+                 compactar=True, manter=COPIAS_MANTIDAS, nivel_gzip=6):
+    #Copia o banco atual e suas partições para diretorio (relativo ao banco) e retorna as métricas da cópia
+    parcial = None
+    try:
+        inicio = time.perf_counter()
+        origem = _banco_atual()
+        diretorio = _caminho_absoluto(diretorio)
+        final = os.path.join(diretorio, f"{PREFIXO_COPIA}{datetime.now():%Y%m%d_%H%M%S}")
+        if os.path.exists(final):
+            raise FileExistsError(f"{final} já existe")
+        parcial = final + SUFIXO_PARCIAL
+        _apagar(parcial)
+        os.makedirs(parcial)
+        principal = os.path.join(parcial, ARQUIVO_PRINCIPAL)
+        metricas = _copiar_paginas(origem, principal, paginas_por_passo, pausa)
+        particoes = _copiar_particoes(principal, parcial, paginas_por_passo, pausa)
+        arquivos = [principal] + [caminho for caminho, _ in particoes]
+        inicio_verificacao = time.perf_counter()
+        for arquivo in arquivos:
+            _verificar_integridade(arquivo)
+        metricas["verificacao_s"] = time.perf_counter() - inicio_verificacao
+        if compactar:
+            inicio_gzip = time.perf_counter()
+            for arquivo in arquivos:
+                _compactar(arquivo, arquivo + ".gz", nivel_gzip)
+                os.remove(arquivo)
+            metricas["gzip_s"] = time.perf_counter() - inicio_gzip
+        os.replace(parcial, final)
+        parcial = None
+        removidas = _rotacionar(diretorio, manter)
+        tamanho_arquivo = sum(os.path.getsize(os.path.join(raiz, nome))
+                              for raiz, _, nomes in os.walk(final) for nome in nomes)
+        metricas.update({"arquivo": final, "tamanho_arquivo": tamanho_arquivo,
+                         "particoes": len(particoes), "bytes_particoes": sum(tamanho for _, tamanho in particoes),
+                         "mb_por_segundo": metricas["bytes"] / 1e6 / metricas["copia_s"],
+                         "total_s": time.perf_counter() - inicio, "removidas": removidas})
+        print(f"Cópia gravada em {final}: {metricas['bytes'] / 1e6:.1f} MB em {metricas['copia_s']:.1f} s "
+              f"({metricas['mb_por_segundo']:.1f} MB/s, {metricas['passos']} passos) e {len(particoes)} partições "
+              f"({metricas['bytes_particoes'] / 1e6:.1f} MB), integridade ok, "
+              f"{tamanho_arquivo / 1e6:.1f} MB no disco.")
+        if removidas:
+            print(f"{len(removidas)} cópias antigas removidas.")
+        return metricas
+    except Exception as e:
+        if parcial:
+            _apagar(parcial)
+        print(f"Erro ao copiar o banco: {e}")
+
+def _descompactar(origem, destino):
+    abrir = gzip.open if origem.endswith(".gz") else open
+    with abrir(origem, "rb") as entrada, open(destino, "wb") as saida:
+        shutil.copyfileobj(entrada, saida, 1024 * 1024)
+    _verificar_integridade(destino)
+
+def _na_copia(copia, relativo):
+    #Arquivo de uma cópia em diretório, compactado ou não
+    caminho = os.path.join(copia, relativo)
+    return caminho + ".gz" if os.path.exists(caminho + ".gz") else caminho
+
+def restaurar_copia(copia, destino):
+    #Grava uma cópia em destino, que não pode existir, e as partições dela nos caminhos do catálogo, relativos
+    #a destino; tudo é conferido antes de receber o nome final. Para voltar a usar o banco restaurado, aponte
+    #configurar_banco para ele
+    parciais = []
+    try:
+        if os.path.exists(destino):
+            raise ValueError(f"{destino} já existe")
+        principal = _na_copia(copia, ARQUIVO_PRINCIPAL) if os.path.isdir(copia) else copia
+        base = os.path.dirname(os.path.abspath(destino))
+        os.makedirs(base, exist_ok=True)
+        parciais.append((destino + SUFIXO_PARCIAL, destino))
+        _descompactar(principal, destino + SUFIXO_PARCIAL)
+        particoes = _particoes_da_copia(destino + SUFIXO_PARCIAL) if os.path.isdir(copia) else []
+        for mes, caminho in particoes:
+            alvo = caminho if os.path.isabs(caminho) else os.path.join(base, caminho)
+            if os.path.exists(alvo):
+                raise ValueError(f"a partição {mes} já existe em {alvo}")
+            os.makedirs(os.path.dirname(alvo), exist_ok=True)
+            parciais.append((alvo + SUFIXO_PARCIAL, alvo))
+            _descompactar(_na_copia(copia, caminho), alvo + SUFIXO_PARCIAL)
+        #O banco principal por último: enquanto ele não existe, nada aponta para as partições restauradas
+        for parcial, alvo in reversed(parciais):
+            os.replace(parcial, alvo)
+        parciais = []
+        print(f"Cópia {copia} restaurada em {destino}" + (f" com {len(particoes)} partições." if particoes else "."))
+        return destino
+    except Exception as e:
+        print(f"Erro ao restaurar a cópia: {e}")
+    finally:
+        for parcial, _ in parciais:
+            if os.path.exists(parcial):
+                os.remove(parcial)
@@ -0,0 +1,533 @@
+from sqlalchemy import Integer, bindparam, cast, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .analise import descontar_vendas, registrar_vendas, vendas_dos_itens
+from .banco import abrir_sessao, confirmar, desfazer
+from .cache import invalidar_cardapio, obter_categoria, obter_prato
+from .consultas import consulta_clientes_por_telefone
+from .modelos import Categoria, Prato, Cliente, Pedido, ItemPedido
+
+#Operações CRUD (Create, Read, Update, Delete)
+
+#Leitura por chave primária
+#As consultas são montadas uma única vez com um parâmetro: o SQLAlchemy reaproveita a compilação e
+#cada chamada só troca o valor. Um pedido vem com os itens na mesma consulta (joinedload).
+#Dentro de uma unidade de trabalho o mapa de identidade da sessão é consultado antes, sem SQL.
+
+def _consulta_por_id(modelo, *opcoes):
+    chave = modelo.__mapper__.primary_key[0]
+    return select(modelo).where(chave == bindparam("id")).options(*opcoes)
+
+CONSULTAS_POR_ID = {
+    Categoria: _consulta_por_id(Categoria),
+    Prato: _consulta_por_id(Prato),
+    Cliente: _consulta_por_id(Cliente),
+    Pedido: _consulta_por_id(Pedido, joinedload(Pedido.itens)),
+}
+
+def _ler_por_id(session, modelo, id_registro):
+    carregado = session.identity_map.get(Session.identity_key(modelo, id_registro))
+    if carregado is not None and carregado not in session.deleted:
+        return carregado
+    return session.execute(CONSULTAS_POR_ID[modelo], {"id": id_registro}).unique().scalar_one_or_none()
+
+#Criar
+
+def criar_categoria(nome_categoria):
+    with abrir_sessao() as session:
+        nova_categoria = Categoria(nome_categoria=nome_categoria)
+        session.add(nova_categoria)
+        try:
+            invalidar_cardapio(session)
+            confirmar(session)
+            print("Categoria criada com sucesso!")
+            return nova_categoria
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao criar categoria: {e}")
+
+def criar_prato(nome_prato, preco, id_categoria):
+    with abrir_sessao() as session:
+        # Verificar se a categoria existe (pelo cache; uma categoria ainda não confirmada é buscada na sessão)
+        categoria = obter_categoria(id_categoria) or session.get(Categoria, id_categoria)
+        if categoria:
+            novo_prato = Prato(nome_prato=nome_prato, preco=preco, id_categoria=id_categoria)
+            session.add(novo_prato)
+            try:
+                invalidar_cardapio(session)
+                confirmar(session)
+                print(f"Prato '{nome_prato}' criado com sucesso!")
+                return novo_prato
+            except Exception as e:
+                desfazer(session, e)
+                print(f"Erro ao criar prato: {e}")
+        else:
+            print(f"Categoria com ID {id_categoria} não encontrada. Não é possível criar o prato.")
+
+def criar_cliente(nome_cliente, telefone):
+     with abrir_sessao() as session:
+        novo_cliente = Cliente(nome_cliente=nome_cliente, telefone=telefone)
+        session.add(novo_cliente)
+        try:
+            confirmar(session)
+            print("Cliente criado com sucesso!")
+            return novo_cliente
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao criar cliente: {e}")
+
+def _normalizar_itens(itens):
+    #Aceita IDs de prato ou pares (id_prato, quantidade)
+    normalizados = []
+    for item in itens:
+        id_prato, quantidade = (item, 1) if isinstance(item, int) else item
+        if int(quantidade) < 1:
+            raise ValueError(f"Quantidade inválida para o prato {id_prato}: {quantidade}")
+        normalizados.append((int(id_prato), int(quantidade)))
+    if not normalizados:
+        raise ValueError("O pedido precisa de pelo menos um item.")
+    return normalizados
+
+def criar_pedido_com_itens(id_cliente, data_pedido, itens):
+    #Cria o cabeçalho e todos os itens em uma única transação; itens: [id_prato] ou [(id_prato, quantidade)]
+    with abrir_sessao() as session:
+        # Verificar se o cliente existe
+        cliente = _ler_por_id(session, Cliente, id_cliente)
+        if not cliente:
+            print(f"Cliente com ID {id_cliente} não encontrado.")
+            return None
+        try:
+            itens = _normalizar_itens(itens)
+        except (TypeError, ValueError) as e:
+            print(f"Erro ao criar pedido: {e}")
+            return None
+        pratos = {id_prato: obter_prato(id_prato) or session.get(Prato, id_prato) for id_prato, _ in itens}
+        faltando = [id_prato for id_prato, prato in pratos.items() if prato is None]
+        if faltando:
+            for id_prato in faltando:
+                print(f"Prato com ID {id_prato} não encontrado.")
+            return None
+        novo_pedido = Pedido(id_cliente=id_cliente, data_pedido=data_pedido, itens=[
+            ItemPedido(id_prato=id_prato, quantidade=quantidade, preco_unitario=pratos[id_prato].preco)
+            for id_prato, quantidade in itens])
+        session.add(novo_pedido)
+        try:
+            registrar_vendas(session, vendas_dos_itens(session, data_pedido, novo_pedido.itens))
+            confirmar(session)
+            print(f"Pedido criado com sucesso!")
+            return novo_pedido
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao criar pedido: {e}")
+
+def criar_pedido(id_cliente, id_prato, data_pedido):
+    #Pedido de um único prato
+    return criar_pedido_com_itens(id_cliente, data_pedido, [(id_prato, 1)])
+
+#Ler um registro pela ID
+
+def ler_categoria(id_categoria):
+    with abrir_sessao() as session:
+        try:
+            categoria = _ler_por_id(session, Categoria, id_categoria)
+            return categoria
+        except Exception as e:
+            print(f"Erro ao ler categoria: {e}")
+
+def ler_prato(id_prato):
+    with abrir_sessao() as session:
+        try:
+            prato = _ler_por_id(session, Prato, id_prato)
+            return prato
+        except Exception as e:
+            print(f"Erro ao ler prato: {e}")
+
+def ler_cliente(id_cliente):
+    with abrir_sessao() as session:
+        try:
+            cliente = _ler_por_id(session, Cliente, id_cliente)
+            return cliente
+        except Exception as e:
+            print(f"Erro ao ler cliente: {e}")
+
+def ler_pedido(id_pedido):
+    with abrir_sessao() as session:
+        try:
+            pedido = _ler_por_id(session, Pedido, id_pedido)
+            return pedido
+        except Exception as e:
+            print(f"Erro ao ler pedido: {e}")
+
+def ler_clientes_por_telefone(telefone):
+    with abrir_sessao() as session:
+        try:
+            return session.execute(consulta_clientes_por_telefone(telefone)).scalars().all()
+        except Exception as e:
+            print(f"Erro ao buscar cliente por telefone: {e}")
+
+#Ler todos os registros
+#Exemplo de print:
+#clientes =ler_todos_clientes()
+#for cliente in clientes:
+    #print(cliente)
+
+def ler_todos_clientes():
+    with abrir_sessao() as session:
+        return session.query(Cliente).all()
+
+def ler_todos_pratos():
+    with abrir_sessao() as session:
+        return session.query(Prato).all()
+
+def ler_todas_categorias():
+    with abrir_sessao() as session:
+        return session.query(Categoria).all()
+
+def ler_todos_pedidos():
+    with abrir_sessao() as session:
+        return session.query(Pedido).options(selectinload(Pedido.itens)).all()
+
+#Ler todos os registros em páginas, sem carregar a tabela inteira
+#Exemplo de print:
+#for cliente in iterar_clientes():
+    #print(cliente)
+#for id_cliente, nome_cliente, telefone in iterar_clientes(apenas_colunas=True):
+    #print(nome_cliente)
+
+TAMANHO_PAGINA = 1000
+
+def _iterar_tabela(modelo, chave, tamanho_pagina, apenas_colunas, apos=None):
+    #Paginação por chave (WHERE id > último LIMIT n): cada página é uma consulta curta,
+    #a memória não cresce com a tabela e a sessão fica aberta enquanto o gerador é consumido
+    if apenas_colunas:
+        colunas = list(modelo.__table__.columns)
+        posicao_chave = colunas.index(chave.expression)
+    else:
+        colunas = [modelo]
+    ultimo = apos
+    with abrir_sessao() as session:
+        while True:
+            consulta = select(*colunas).order_by(chave).limit(tamanho_pagina)
+            if ultimo is not None:
+                consulta = consulta.where(chave > ultimo)
+            if apenas_colunas:
+                pagina = session.execute(consulta).all()
+                if not pagina:
+                    return
+                yield from pagina
+                ultimo = pagina[-1][posicao_chave]
+            else:
+                pagina = session.execute(consulta).scalars().all()
+                if not pagina:
+                    return
+                yield from pagina
+                ultimo = getattr(pagina[-1], chave.key)
+            if len(pagina) < tamanho_pagina:
+                return
+
+def iterar_clientes(tamanho_pagina=TAMANHO_PAGINA, apenas_colunas=False, apos=None):
+    return _iterar_tabela(Cliente, Cliente.id_cliente, tamanho_pagina, apenas_colunas, apos)
+
+def iterar_pratos(tamanho_pagina=TAMANHO_PAGINA, apenas_colunas=False, apos=None):
+    return _iterar_tabela(Prato, Prato.id_prato, tamanho_pagina, apenas_colunas, apos)
+
+def iterar_categorias(tamanho_pagina=TAMANHO_PAGINA, apenas_colunas=False, apos=None):
+    return _iterar_tabela(Categoria, Categoria.id_categoria, tamanho_pagina, apenas_colunas, apos)
+
+def iterar_pedidos(tamanho_pagina=TAMANHO_PAGINA, apenas_colunas=False, apos=None):
+    return _iterar_tabela(Pedido, Pedido.id_pedido, tamanho_pagina, apenas_colunas, apos)
+
+#Atualizar
+#Cada alteração é um único UPDATE ... SET ..., versao = versao + 1 WHERE id = ? [AND versao = ?] RETURNING,
+#sem um SELECT antes: o registro alterado volta na mesma instrução. Com versao (a lida pelo chamador) a
+#alteração só é aplicada se ninguém gravou o registro depois da leitura; senão é lançado ConflitoDeVersao,
+#que não é tratado aqui: quem chamou decide se relê o registro e tenta de novo. Sem versao, a última gravação
+#prevalece, como antes, mas campos não informados nunca são sobrescritos com valores lidos antes.
+#Se os valores informados já são os gravados, nada é escrito: a versão (e o ETag do serviço) não muda e o
+#registro de alterações não recebe um "A" vazio.
+
+class ConflitoDeVersao(Exception):
+    def __init__(self, modelo, id_registro, versao_esperada, versao_atual):
+        super().__init__(f"{modelo.__name__} {id_registro} foi alterado por outra operação "
+                         f"(versão esperada {versao_esperada}, atual {versao_atual}).")
+        self.modelo = modelo
+        self.id_registro = id_registro
+        self.versao_esperada = versao_esperada
+        self.versao_atual = versao_atual
+
+def _informados(**campos):
+    return {campo: valor for campo, valor in campos.items() if valor is not None}
+
+def _versao_atual(session, modelo, id_registro):
+    chave = modelo.__mapper__.primary_key[0]
+    return session.execute(select(modelo.versao).where(chave == id_registro)).scalar()
+
+#Como nas leituras, a instrução de cada combinação de campos é montada uma única vez, com parâmetros
+_ATUALIZACOES = {}
+
+def _instrucao_atualizacao(modelo, campos, com_versao):
+    chave = (modelo, campos, com_versao)
+    instrucao = _ATUALIZACOES.get(chave)
+    if instrucao is None:
+        instrucao = update(modelo).where(modelo.__mapper__.primary_key[0] == bindparam("id"))
+        if com_versao:
+            instrucao = instrucao.where(modelo.versao == bindparam("versao_lida"))
+        instrucao = instrucao.where(or_(*(getattr(modelo, campo).is_distinct_from(bindparam(f"{campo}_novo"))
+                                          for campo in campos)))
+        instrucao = (instrucao.values({**{campo: bindparam(campo) for campo in campos}, "versao": modelo.versao + 1})
+                     .returning(modelo)
+                     .execution_options(synchronize_session=False, populate_existing=True))
+        _ATUALIZACOES[chave] = instrucao
+    return instrucao
+
+def _atualizar_por_id(session, modelo, id_registro, valores, versao=None):
+    #Retorna o registro alterado, None se ele não existe ou lança ConflitoDeVersao
+    if not valores:
+        return _ler_por_id(session, modelo, id_registro)
+    instrucao = _instrucao_atualizacao(modelo, tuple(sorted(valores)), versao is not None)
+    parametros = dict(valores, id=id_registro, versao_lida=versao)
+    parametros.update({f"{campo}_novo": valor for campo, valor in valores.items()})
+    registro = session.execute(instrucao, parametros).scalar_one_or_none()
+    if registro is None:
+        #Não existe, a versão mudou ou os valores já eram esses; relê do banco para comparar a versão
+        registro = session.execute(CONSULTAS_POR_ID[modelo].execution_options(populate_existing=True),
+                                   {"id": id_registro}).unique().scalar_one_or_none()
+        if registro is not None and versao is not None and registro.versao != versao:
+            raise ConflitoDeVersao(modelo, id_registro, versao, registro.versao)
+    return registro
+
+def atualizar_categoria(id_categoria, nome_categoria, versao=None):
+    with abrir_sessao() as session:
+        try:
+            categoria = _atualizar_por_id(session, Categoria, id_categoria,
+                                          _informados(nome_categoria=nome_categoria), versao)
+            if categoria:
+                invalidar_cardapio(session)
+                confirmar(session)
+                print("Categoria atualizada com sucesso!")
+            return categoria
+        except ConflitoDeVersao as e:
+            desfazer(session, e)
+            raise
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao atualizar categoria: {e}")
+
+def atualizar_prato(id_prato, nome_prato=None, preco=None, id_categoria=None, versao=None):
+    with abrir_sessao() as session:
+        try:
+            prato = _atualizar_por_id(session, Prato, id_prato, _informados(
+                nome_prato=nome_prato, preco=preco, id_categoria=id_categoria), versao)
+            if prato:
+                invalidar_cardapio(session)
+                confirmar(session)
+            return prato
+        except ConflitoDeVersao as e:
+            desfazer(session, e)
+            raise
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao atualizar prato: {e}")
+
+def atualizar_cliente(id_cliente, nome_cliente=None, telefone=None, versao=None):
+    with abrir_sessao() as session:
+        try:
+            cliente = _atualizar_por_id(session, Cliente, id_cliente,
+                                        _informados(nome_cliente=nome_cliente, telefone=telefone), versao)
+            if cliente:
+                confirmar(session)
+            return cliente
+        except ConflitoDeVersao as e:
+            desfazer(session, e)
+            raise
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao atualizar cliente: {e}")
+
+def alterar_pedido(session, pedido, id_cliente=None, id_prato=None, data_pedido=None, versao=None):
+    #Aplica as alterações e ajusta vendas_diarias; id_prato troca o prato de um pedido de item único
+    #e captura o preço atual do novo prato. Lança ValueError se a troca não for possível.
+    #As vendas são recalculadas a partir do pedido carregado, então a versão é reservada antes de qualquer
+    #alteração: se outro escritor mudou o pedido desde a leitura, nada é gravado (ConflitoDeVersao).
+    #Se nenhum campo muda, a versão também não é reservada
+    novo_prato = None
+    if id_prato is not None and [item.id_prato for item in pedido.itens] != [id_prato]:
+        if len(pedido.itens) != 1:
+            raise ValueError(f"Pedido {pedido.id_pedido} tem {len(pedido.itens)} itens; "
+                             f"o prato só pode ser trocado em pedidos de um item.")
+        novo_prato = obter_prato(id_prato) or session.get(Prato, id_prato)
+        if novo_prato is None:
+            raise ValueError(f"Prato com ID {id_prato} não encontrado.")
+    esperada = pedido.versao if versao is None else versao
+    if novo_prato is None and id_cliente in (None, pedido.id_cliente) and data_pedido in (None, pedido.data_pedido):
+        if esperada != pedido.versao:
+            raise ConflitoDeVersao(Pedido, pedido.id_pedido, esperada, pedido.versao)
+        return
+    #Os campos de pedidos e a nova versão vão no mesmo UPDATE: uma alteração, uma linha em alteracoes
+    valores = _informados(id_cliente=id_cliente, data_pedido=data_pedido)
+    if not session.execute(update(Pedido).where(Pedido.id_pedido == pedido.id_pedido, Pedido.versao == esperada)
+                           .values({**valores, "versao": Pedido.versao + 1})
+                           .execution_options(synchronize_session=False)).rowcount:
+        raise ConflitoDeVersao(Pedido, pedido.id_pedido, esperada,
+                               _versao_atual(session, Pedido, pedido.id_pedido))
+    vendas = vendas_dos_itens(session, pedido.data_pedido, pedido.itens, -1)
+    #Já gravados: marcados como valores do banco para o flush não repetir o UPDATE em pedidos
+    for campo, valor in dict(valores, versao=esperada + 1).items():
+        set_committed_value(pedido, campo, valor)
+    if "id_cliente" in valores:
+        session.expire(pedido, ["cliente"])
+    if novo_prato is not None:
+        pedido.itens[0].id_prato = novo_prato.id_prato
+        pedido.itens[0].preco_unitario = novo_prato.preco
+    registrar_vendas(session, vendas_dos_itens(session, pedido.data_pedido, pedido.itens, 1, vendas))
+
+def atualizar_pedido(id_pedido, id_cliente=None, id_prato=None, data_pedido=None, versao=None):
+    with abrir_sessao() as session:
+        try:
+            if id_prato is None and data_pedido is None:
+                #Só o cliente muda: o resumo de vendas não depende dele, basta o UPDATE ... RETURNING
+                pedido = _atualizar_por_id(session, Pedido, id_pedido, _informados(id_cliente=id_cliente), versao)
+            else:
+                pedido = _ler_por_id(session, Pedido, id_pedido)
+                if pedido:
+                    alterar_pedido(session, pedido, id_cliente, id_prato, data_pedido, versao)
+            if pedido:
+                confirmar(session)
+            return pedido
+        except ConflitoDeVersao as e:
+            desfazer(session, e)
+            raise
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao atualizar pedido: {e}")
+
+#Excluir
+#Exclusões por DELETE ... WHERE, sem carregar o registro; as tabelas dependentes seguem as ações ON DELETE
+#declaradas nos modelos e as funções retornam quantas linhas foram afetadas.
+#Um prato que já aparece em itens de pedidos (ou a categoria dele) é recusado pela chave estrangeira: em vez
+#de "não encontrado", é lançado RegistroEmUso, que, como ConflitoDeVersao, fica para quem chamou tratar
+
+class RegistroEmUso(Exception):
+    def __init__(self, modelo, id_registro, motivo):
+        super().__init__(f"{modelo.__name__} {id_registro} não pode ser excluído(a): {motivo}.")
+        self.modelo = modelo
+        self.id_registro = id_registro
+
+def excluir_categoria(id_categoria):
+    with abrir_sessao() as session:
+        try:
+            pratos = session.execute(select(func.count()).select_from(Prato)
+                                     .where(Prato.id_categoria == id_categoria)).scalar()
+            if session.execute(delete(Categoria).where(Categoria.id_categoria == id_categoria)).rowcount:
+                invalidar_cardapio(session)
+                confirmar(session)
+                print(f"Categoria {id_categoria} excluída com sucesso ({pratos} pratos excluídos em cascata).")
+                return {"pratos": pratos}
+            else:
+                print(f"Categoria com ID {id_categoria} não encontrada.")
+        except IntegrityError:
+            em_uso = RegistroEmUso(Categoria, id_categoria, "há pratos dela em itens de pedidos")
+            desfazer(session, em_uso)
+            raise em_uso
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao excluir categoria: {e}")
+
+def excluir_prato(id_prato):
+    with abrir_sessao() as session:
+        try:
+            if session.execute(delete(Prato).where(Prato.id_prato == id_prato)).rowcount:
+                invalidar_cardapio(session)
+                confirmar(session)
+                print(f"Prato {id_prato} excluído com sucesso.")
+                return True
+            else:
+                print(f"Prato com ID {id_prato} não encontrado.")
+        except IntegrityError:
+            em_uso = RegistroEmUso(Prato, id_prato, "o prato aparece em itens de pedidos")
+            desfazer(session, em_uso)
+            raise em_uso
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao excluir prato: {e}")
+
+def _excluir_pedidos(session, *condicoes):
+    #Desconta as vendas do resumo e exclui os pedidos; os itens saem em cascata.
+    #Pedidos já carregados na sessão não são atualizados (synchronize_session=False)
+    itens = session.execute(select(func.count()).select_from(ItemPedido).join(ItemPedido.pedido)
+                            .where(*condicoes)).scalar()
+    descontar_vendas(session, *condicoes)
+    pedidos = session.execute(delete(Pedido).where(*condicoes)
+                              .execution_options(synchronize_session=False)).rowcount
+    return {"pedidos": pedidos, "itens": itens}
+
+def excluir_cliente(id_cliente):
+    #Exclui também os pedidos do cliente no banco principal; meses já arquivados não são alterados
+    with abrir_sessao() as session:
+        try:
+            if session.execute(select(Cliente.id_cliente).where(Cliente.id_cliente == id_cliente)).first():
+                removidos = _excluir_pedidos(session, Pedido.id_cliente == id_cliente)
+                session.execute(delete(Cliente).where(Cliente.id_cliente == id_cliente))
+                confirmar(session)
+                print(f"Cliente {id_cliente} excluído com sucesso "
+                      f"({removidos['pedidos']} pedidos e {removidos['itens']} itens).")
+                return removidos
+            else:
+                print(f"Cliente com ID {id_cliente} não encontrado.")
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao excluir cliente: {e}")
+
+def excluir_pedido(id_pedido):
+    with abrir_sessao() as session:
+        try:
+            pedido = _ler_por_id(session, Pedido, id_pedido)
+            if pedido:
+                registrar_vendas(session, vendas_dos_itens(session, pedido.data_pedido, pedido.itens, -1))
+                session.delete(pedido)
+                confirmar(session)
+                print(f"Pedido {id_pedido} excluído com sucesso.")
+                return True
+            else:
+                print(f"Pedido com ID {id_pedido} não encontrado.")
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao excluir pedido: {e}")
+
+#Alterações e exclusões em conjunto (uma instrução para todas as linhas)
+
+def reajustar_precos(percentual, id_categoria=None):
+    #Reajusta em percentual (8 = +8%, -10 = -10%) os preços de todos os pratos ou dos de uma categoria,
+    #arredondando para inteiro; itens de pedidos já feitos mantêm o preço gravado. Retorna quantos pratos mudaram
+    if percentual <= -100:
+        print("Erro ao reajustar preços: o percentual deve ser maior que -100.")
+        return None
+    consulta = update(Prato).values(preco=cast(func.round(Prato.preco * (100 + percentual) / 100.0), Integer),
+                                    versao=Prato.versao + 1)
+    if id_categoria is not None:
+        consulta = consulta.where(Prato.id_categoria == id_categoria)
+    with abrir_sessao() as session:
+        try:
+            alterados = session.execute(consulta).rowcount
+            invalidar_cardapio(session)
+            confirmar(session)
+            print(f"{alterados} pratos reajustados em {percentual:g}%.")
+            return alterados
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao reajustar preços: {e}")
+
+def excluir_pedidos_anteriores(data_limite):
+    #Expurgo dos pedidos anteriores a data_limite no banco principal (partições arquivadas não mudam);
+    #retorna {"pedidos": n, "itens": n}
+    with abrir_sessao() as session:
+        try:
+            removidos = _excluir_pedidos(session, Pedido.data_pedido < data_limite)
+            confirmar(session)
+            print(f"{removidos['pedidos']} pedidos e {removidos['itens']} itens anteriores a {data_limite} excluídos.")
+            return removidos
+        except Exception as e:
+            desfazer(session, e)
+            print(f"Erro ao excluir pedidos anteriores a {data_limite}: {e}")
@@ -0,0 +1,298 @@
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#Instrumentação das consultas
+#Com a instrumentação ativa, cada instrução SQL executada por qualquer engine síncrona é medida
+#(eventos before/after_cursor_execute) e agregada por instrução e pela função pública do pacote
+#que a originou: chamadas, histograma de latência, linhas retornadas ou afetadas e erros.
+#Instruções mais lentas que o limite entram no registro de lentas com o plano (EXPLAIN QUERY PLAN).
+#A latência medida é a da execução; o tempo gasto lendo as linhas do cursor é somado à parte.
+
+LIMITE_LENTA_MS = 100
+TAMANHO_REGISTRO_LENTAS = 200
+#Limites superiores dos baldes do histograma, em milissegundos
+BALDES_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+#Módulos que não contam como origem de uma consulta
+_MODULOS_IGNORADOS = {__name__, "restaurante.banco"}
+_LISTA_PARAMETROS = re.compile(r"\((?:\?, )+\?\)")
+_ESPACOS = re.compile(r"\s+")
+_PREFIXOS_PLANO = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+class Medida:
+    __slots__ = ("chamadas", "total_s", "maximo_s", "leitura_s", "linhas", "erros", "ultimo_erro", "baldes")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total_s = 0.0
+        self.maximo_s = 0.0
+        self.leitura_s = 0.0
+        self.linhas = 0
+        self.erros = 0
+        self.ultimo_erro = None
+        self.baldes = [0] * len(BALDES_MS)
+
+    def registrar(self, duracao):
+        self.chamadas += 1
+        self.total_s += duracao
+        self.maximo_s = max(self.maximo_s, duracao)
+        milissegundos = duracao * 1000
+        for posicao, limite in enumerate(BALDES_MS):
+            if milissegundos <= limite:
+                self.baldes[posicao] += 1
+                break
+
+    def percentil_ms(self, fracao):
+        #Estimativa pelo limite superior do balde que contém o percentil
+        alvo = fracao * self.chamadas
+        acumulado = 0
+        for limite, quantidade in zip(BALDES_MS, self.baldes):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return min(limite, self.maximo_s * 1000)
+        return 0.0
+
+    def como_dict(self):
+        return {
+            "chamadas": self.chamadas,
+            "total_ms": self.total_s * 1000,
+            "media_ms": self.total_s * 1000 / self.chamadas if self.chamadas else 0.0,
+            "p50_ms": self.percentil_ms(0.5),
+            "p95_ms": self.percentil_ms(0.95),
+            "p99_ms": self.percentil_ms(0.99),
+            "maximo_ms": self.maximo_s * 1000,
+            "leitura_ms": self.leitura_s * 1000,
+            "linhas": self.linhas,
+            "erros": self.erros,
+            "ultimo_erro": self.ultimo_erro,
+            "histograma": {("+inf" if limite == float("inf") else f"<={limite}"): quantidade
+                           for limite, quantidade in zip(BALDES_MS, self.baldes) if quantidade},
+        }
+
+#Cursor que soma as linhas lidas (e o tempo de leitura) às medidas da instrução que o executou
+
+class _CursorContador(sqlite3.Cursor):
+    medidas = None
+
+    def _contar(self, linhas, inicio):
+        if self.medidas is not None:
+            instrumentacao._somar_leitura(self.medidas, linhas, time.perf_counter() - inicio)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._contar(0 if linha is None else 1, inicio)
+        return linha
+
+    def fetchmany(self, *argumentos, **opcoes):
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(*argumentos, **opcoes)
+        self._contar(len(linhas), inicio)
+        return linhas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._contar(len(linhas), inicio)
+        return linhas
+
+class _ConexaoContadora(sqlite3.Connection):
+    def cursor(self, factory=_CursorContador):
+        return super().cursor(factory)
+
+class Instrumentacao:
+    def __init__(self):
+        self.ativa = False
+        self.limite_lenta_ms = LIMITE_LENTA_MS
+        self.arquivo_lentas = None
+        self._trava = threading.Lock()
+        self._eventos_instalados = False
+        self.zerar()
+
+    def zerar(self):
+        with self._trava:
+            self.inicio = datetime.now()
+            self._por_instrucao = {}
+            self._por_funcao = {}
+            self._lentas = deque(maxlen=TAMANHO_REGISTRO_LENTAS)
+
+    def ativar(self, limite_lenta_ms=None, arquivo_lentas=None):
+        if limite_lenta_ms is not None:
+            self.limite_lenta_ms = limite_lenta_ms
+        if arquivo_lentas is not None:
+            self.arquivo_lentas = arquivo_lentas
+        if not self._eventos_instalados:
+            event.listen(Engine, "do_connect", _ao_conectar)
+            event.listen(Engine, "before_cursor_execute", _antes_de_executar)
+            event.listen(Engine, "after_cursor_execute", _depois_de_executar)
+            event.listen(Engine, "handle_error", _ao_falhar)
+            self._eventos_instalados = True
+        self.ativa = True
+
+    def desativar(self):
+        self.ativa = False
+
+    #Agregação
+
+    def _medidas(self, instrucao, funcao):
+        chave = _ESPACOS.sub(" ", _LISTA_PARAMETROS.sub("(?...)", instrucao)).strip()
+        por_instrucao = self._por_instrucao.get(chave)
+        if por_instrucao is None:
+            por_instrucao = self._por_instrucao.setdefault(chave, Medida())
+        por_funcao = self._por_funcao.get(funcao)
+        if por_funcao is None:
+            por_funcao = self._por_funcao.setdefault(funcao, Medida())
+        return por_instrucao, por_funcao
+
+    def _registrar(self, instrucao, funcao, duracao, linhas_afetadas):
+        with self._trava:
+            medidas = self._medidas(instrucao, funcao)
+            for medida in medidas:
+                medida.registrar(duracao)
+                if linhas_afetadas > 0:
+                    medida.linhas += linhas_afetadas
+        return medidas
+
+    def _somar_leitura(self, medidas, linhas, duracao):
+        with self._trava:
+            for medida in medidas:
+                medida.linhas += linhas
+                medida.leitura_s += duracao
+
+    def _registrar_erro(self, instrucao, funcao, erro):
+        with self._trava:
+            for medida in self._medidas(instrucao, funcao):
+                medida.erros += 1
+                medida.ultimo_erro = f"{type(erro).__name__}: {erro}"
+
+    def _registrar_lenta(self, instrucao, parametros, funcao, duracao, plano):
+        registro = {
+            "quando": datetime.now().isoformat(timespec="seconds"),
+            "duracao_ms": duracao * 1000,
+            "funcao": funcao,
+            "sql": instrucao.strip(),
+            "parametros": repr(parametros)[:200],
+            "plano": plano,
+        }
+        with self._trava:
+            self._lentas.append(registro)
+            if self.arquivo_lentas:
+                with open(self.arquivo_lentas, "a", encoding="utf-8") as arquivo:
+                    arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    #Consulta dos resultados
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "ativa": self.ativa,
+                "limite_lenta_ms": self.limite_lenta_ms,
+                "funcoes": {funcao: medida.como_dict() for funcao, medida in sorted(
+                    self._por_funcao.items(), key=lambda item: -item[1].total_s)},
+                "instrucoes": [dict(medida.como_dict(), sql=instrucao) for instrucao, medida in sorted(
+                    self._por_instrucao.items(), key=lambda item: -item[1].total_s)],
+                "lentas": list(self._lentas),
+            }
+
+instrumentacao = Instrumentacao()
+
+#Eventos da engine
+
+def _ao_conectar(dialeto, registro, argumentos, parametros):
+    #Conexões pysqlite novas usam o cursor que conta linhas lidas
+    if instrumentacao.ativa and dialeto.driver == "pysqlite" and "factory" not in parametros:
+        parametros["factory"] = _ConexaoContadora
+
+def _funcao_de_origem():
+    #Função pública mais interna do pacote na pilha de chamadas, sem contar métodos (ou a mais interna do
+    #pacote, se nenhuma servir)
+    quadro = sys._getframe(2)
+    privada = None
+    while quadro is not None:
+        modulo = quadro.f_globals.get("__name__", "")
+        if modulo.startswith("restaurante.") and modulo not in _MODULOS_IGNORADOS:
+            codigo = quadro.f_code
+            nome = f"{modulo[len('restaurante.'):]}.{codigo.co_name}"
+            if not codigo.co_name.startswith(("_", "<")) and codigo.co_varnames[:1] not in (("self",), ("cls",)):
+                return nome
+            privada = privada or nome
+        quadro = quadro.f_back
+    return privada or "(fora do pacote)"
+
+def _antes_de_executar(conexao, cursor, instrucao, parametros, contexto, varios):
+    if instrumentacao.ativa:
+        conexao.info.setdefault("instrumentacao_inicio", []).append(time.perf_counter())
+
+def _depois_de_executar(conexao, cursor, instrucao, parametros, contexto, varios):
+    inicios = conexao.info.get("instrumentacao_inicio")
+    if not inicios:
+        return
+    duracao = time.perf_counter() - inicios.pop()
+    funcao = _funcao_de_origem()
+    medidas = instrumentacao._registrar(instrucao, funcao, duracao, cursor.rowcount)
+    if isinstance(cursor, _CursorContador):
+        cursor.medidas = medidas
+    if duracao * 1000 >= instrumentacao.limite_lenta_ms:
+        instrumentacao._registrar_lenta(instrucao, parametros, funcao, duracao,
+                                        _plano(cursor, instrucao, parametros, varios))
+
+def _ao_falhar(contexto):
+    conexao = contexto.connection
+    if conexao is not None and conexao.info.get("instrumentacao_inicio"):
+        conexao.info["instrumentacao_inicio"].pop()
+    if instrumentacao.ativa and contexto.statement is not None:
+        instrumentacao._registrar_erro(contexto.statement, _funcao_de_origem(), contexto.original_exception)
+
+def _plano(cursor, instrucao, parametros, varios):
+    if varios or not instrucao.lstrip().upper().startswith(_PREFIXOS_PLANO):
+        return None
+    try:
+        return [linha[3] for linha in cursor.connection.execute("EXPLAIN QUERY PLAN " + instrucao, parametros)]
+    except sqlite3.Error as e:
+        return [f"plano indisponível: {e}"]
+
+#Funções usadas pela CLI, pelo menu e pelo serviço HTTP
+
+def ativar_instrumentacao(limite_lenta_ms=None, arquivo_lentas=None):
+    instrumentacao.ativar(limite_lenta_ms, arquivo_lentas)
+
+def zerar_estatisticas():
+    instrumentacao.zerar()
+
+def estatisticas_consultas():
+    return instrumentacao.estatisticas()
+
+def salvar_estatisticas(caminho):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(estatisticas_consultas(), arquivo, ensure_ascii=False, indent=2)
+
+def imprimir_estatisticas(estatisticas=None, limite=10):
+    estatisticas = estatisticas or estatisticas_consultas()
+    print(f"=== Estatísticas de consultas desde {estatisticas['inicio']} ===")
+    print("Por função:")
+    for funcao, medida in list(estatisticas["funcoes"].items())[:limite]:
+        print(f"  {funcao}: {medida['chamadas']} instruções, total {medida['total_ms']:.1f} ms, "
+              f"p95 {medida['p95_ms']:.2f} ms, {medida['linhas']} linhas, {medida['erros']} erros")
+    print("Por instrução:")
+    for medida in estatisticas["instrucoes"][:limite]:
+        print(f"  {medida['chamadas']}x, total {medida['total_ms']:.1f} ms (leitura {medida['leitura_ms']:.1f} ms), "
+              f"p50 {medida['p50_ms']:.2f} ms, p95 {medida['p95_ms']:.2f} ms, máx {medida['maximo_ms']:.2f} ms, "
+              f"{medida['linhas']} linhas")
+        print(f"    {medida['sql'][:160]}")
+        if medida["ultimo_erro"]:
+            print(f"    último erro: {medida['ultimo_erro']}")
+    lentas = estatisticas["lentas"]
+    print(f"Consultas lentas (>= {estatisticas['limite_lenta_ms']} ms): {len(lentas)}")
+    for lenta in lentas[-limite:]:
+        print(f"  {lenta['quando']} {lenta['duracao_ms']:.1f} ms em {lenta['funcao']}: {lenta['sql'][:120]}")
+        for passo in lenta["plano"] or []:
+            print(f"    {passo}")
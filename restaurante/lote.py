@@ -0,0 +1,196 @@
+import csv
+import json
+from datetime import date
+
+from sqlalchemy import select
+
+from .analise import acumular_venda, registrar_vendas
+from .banco import abrir_sessao, confirmar, desfazer
+from .modelos import Prato, Cliente
+
+#Criação de pedidos em lote (uma única transação para muitos pedidos)
+
+TAMANHO_LOTE_PEDIDOS = 5000
+#Limite de parâmetros por consulta IN, abaixo do máximo de variáveis do SQLite
+LIMITE_PARAMETROS_IN = 900
+
+def _inteiro(valor, nome):
+    #Aceita int, float sem parte fracionária e texto com um inteiro (CSV); True/False não valem como 1/0
+    if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+        raise ValueError(f"{nome} deve ser um número inteiro")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{nome} deve ser um número inteiro")
+
+def _normalizar_pedido(linha):
+    #Aceita dicionários, tuplas (id_cliente, id_prato, data_pedido[, quantidade]) ou linhas JSON;
+    #cada linha vira um pedido de um item
+    if isinstance(linha, str):
+        try:
+            linha = json.loads(linha)
+        except ValueError as e:
+            raise ValueError(f"JSON inválido ({e})")
+    if isinstance(linha, dict):
+        try:
+            id_cliente, id_prato, data_pedido = linha["id_cliente"], linha["id_prato"], linha["data_pedido"]
+        except KeyError as e:
+            raise ValueError(f"campo obrigatório ausente: {e.args[0]}")
+        quantidade = linha.get("quantidade", 1)
+        if quantidade is None or quantidade == "":
+            #Coluna quantidade vazia no CSV ou null no JSON: quantidade não informada
+            quantidade = 1
+    else:
+        try:
+            id_cliente, id_prato, data_pedido, *resto = linha
+        except (TypeError, ValueError):
+            raise ValueError("esperado (id_cliente, id_prato, data_pedido)")
+        if len(resto) > 1:
+            raise ValueError("esperado (id_cliente, id_prato, data_pedido)")
+        quantidade = resto[0] if resto else 1
+    id_cliente = _inteiro(id_cliente, "id_cliente")
+    id_prato = _inteiro(id_prato, "id_prato")
+    quantidade = _inteiro(quantidade, "quantidade")
+    if quantidade < 1:
+        raise ValueError(f"quantidade inválida: {quantidade}")
+    if not isinstance(data_pedido, date):
+        try:
+            data_pedido = date.fromisoformat(str(data_pedido).strip())
+        except ValueError:
+            raise ValueError(f"data inválida: {data_pedido!r} (use AAAA-MM-DD)")
+    return {"id_cliente": id_cliente, "id_prato": id_prato, "data_pedido": data_pedido, "quantidade": quantidade}
+
+def linhas_por_id(session, coluna, ids, *colunas):
+    #Busca um conjunto de IDs com consultas IN, em fatias que respeitam o limite do SQLite
+    ids = list(ids)
+    encontrados = {}
+    for inicio in range(0, len(ids), LIMITE_PARAMETROS_IN):
+        fatia = ids[inicio:inicio + LIMITE_PARAMETROS_IN]
+        for linha in session.execute(select(coluna, *colunas).where(coluna.in_(fatia))):
+            encontrados[linha[0]] = linha
+    return encontrados
+
+def _inserir_pedidos(session, pedidos):
+    #pedidos: [(id_cliente, data_pedido, [(id_prato, quantidade, preco_unitario)])]
+    #Insere os cabeçalhos e depois todos os itens, cada um com um executemany do driver; retorna os IDs.
+    #Tuplas direto no sqlite3: o ORM em massa executaria os itens um a um, e mesmo o Core montaria um dicionário
+    #de parâmetros por linha, o que custa mais do que o próprio INSERT.
+    #Sem RETURNING: no SQLite o SQLAlchemy só devolve os IDs na ordem dos parâmetros inserindo linha a linha.
+    #O primeiro INSERT já pega a trava de escrita e pedidos usa AUTOINCREMENT (cada id é o maior já usado + 1),
+    #então os IDs do executemany são consecutivos e terminam em last_insert_rowid()
+    conexao = session.connection()
+    conexao.exec_driver_sql("INSERT INTO pedidos (id_cliente, data_pedido) VALUES (?, ?)",
+                            [(id_cliente, data_pedido.isoformat()) for id_cliente, data_pedido, _ in pedidos])
+    ultimo = conexao.exec_driver_sql("SELECT last_insert_rowid()").scalar()
+    ids = range(ultimo - len(pedidos) + 1, ultimo + 1)
+    conexao.exec_driver_sql(
+        "INSERT INTO itens_pedido (id_pedido, id_prato, quantidade, preco_unitario) VALUES (?, ?, ?, ?)",
+        [(id_pedido, id_prato, quantidade, preco)
+         for id_pedido, (_, _, itens) in zip(ids, pedidos)
+         for id_prato, quantidade, preco in itens])
+    return ids
+
+def _inserir_lote_pedidos(session, lote, clientes_validos, pratos_validos, rejeitados):
+    #Consulta de uma vez apenas os IDs ainda não conhecidos neste lote
+    novos_clientes = {pedido["id_cliente"] for _, pedido in lote} - clientes_validos.keys()
+    novos_pratos = {pedido["id_prato"] for _, pedido in lote} - pratos_validos.keys()
+    if novos_clientes:
+        existentes = linhas_por_id(session, Cliente.id_cliente, novos_clientes)
+        clientes_validos.update((id_cliente, id_cliente in existentes) for id_cliente in novos_clientes)
+    if novos_pratos:
+        existentes = linhas_por_id(session, Prato.id_prato, novos_pratos, Prato.preco, Prato.id_categoria)
+        pratos_validos.update((id_prato, existentes.get(id_prato)) for id_prato in novos_pratos)
+
+    validos = []
+    vendas = {}
+    for numero, pedido in lote:
+        prato = pratos_validos[pedido["id_prato"]]
+        if not clientes_validos[pedido["id_cliente"]]:
+            rejeitados.append((numero, f"Cliente com ID {pedido['id_cliente']} não encontrado."))
+        elif prato is None:
+            rejeitados.append((numero, f"Prato com ID {pedido['id_prato']} não encontrado."))
+        else:
+            quantidade = pedido["quantidade"]
+            validos.append((pedido["id_cliente"], pedido["data_pedido"],
+                            [(pedido["id_prato"], quantidade, prato.preco)]))
+            acumular_venda(vendas, pedido["data_pedido"], pedido["id_prato"], quantidade,
+                           quantidade * prato.preco, prato.id_categoria)
+    if validos:
+        _inserir_pedidos(session, validos)
+        registrar_vendas(session, vendas)
+    return len(validos)
+
+def gravar_pedidos(session, pedidos):
+    #pedidos: [(id_cliente, id_prato, data_pedido)]; retorna, na mesma ordem, o ID criado ou um ValueError
+    #Usada pelos escritores que agrupam pedidos de vários chamadores (camada assíncrona e serviço HTTP)
+    clientes = linhas_por_id(session, Cliente.id_cliente, {id_cliente for id_cliente, _, _ in pedidos})
+    pratos = linhas_por_id(session, Prato.id_prato, {id_prato for _, id_prato, _ in pedidos},
+                           Prato.preco, Prato.id_categoria)
+    resultados = []
+    validos = []
+    vendas = {}
+    for id_cliente, id_prato, data_pedido in pedidos:
+        prato = pratos.get(id_prato)
+        if id_cliente not in clientes:
+            resultados.append(ValueError(f"Cliente com ID {id_cliente} não encontrado."))
+        elif prato is None:
+            resultados.append(ValueError(f"Prato com ID {id_prato} não encontrado."))
+        else:
+            resultados.append(len(validos))
+            validos.append((id_cliente, data_pedido, [(id_prato, 1, prato.preco)]))
+            acumular_venda(vendas, data_pedido, id_prato, 1, prato.preco, prato.id_categoria)
+    if not validos:
+        return resultados
+    ids = _inserir_pedidos(session, validos)
+    registrar_vendas(session, vendas)
+    return [ids[resultado] if isinstance(resultado, int) else resultado for resultado in resultados]
+
+def criar_pedidos_em_lote(pedidos, tamanho_lote=TAMANHO_LOTE_PEDIDOS):
+    #Retorna {"inseridos": n, "rejeitados": [(linha, motivo), ...]}; as linhas são numeradas a partir de 1
+    return _criar_pedidos_numerados(enumerate(pedidos, start=1), tamanho_lote)
+
+def _criar_pedidos_numerados(pedidos, tamanho_lote):
+    #pedidos: [(número da linha, pedido)]; importar_pedidos numera pelas linhas do arquivo
+    resultado = {"inseridos": 0, "rejeitados": []}
+    clientes_validos = {}
+    pratos_validos = {}
+    with abrir_sessao() as session:
+        try:
+            lote = []
+            for numero, linha in pedidos:
+                try:
+                    lote.append((numero, _normalizar_pedido(linha)))
+                except ValueError as e:
+                    resultado["rejeitados"].append((numero, str(e)))
+                    continue
+                if len(lote) >= tamanho_lote:
+                    resultado["inseridos"] += _inserir_lote_pedidos(
+                        session, lote, clientes_validos, pratos_validos, resultado["rejeitados"])
+                    lote = []
+            if lote:
+                resultado["inseridos"] += _inserir_lote_pedidos(
+                    session, lote, clientes_validos, pratos_validos, resultado["rejeitados"])
+            confirmar(session)
+            resultado["rejeitados"].sort()
+            print(f"{resultado['inseridos']} pedidos criados, {len(resultado['rejeitados'])} rejeitados.")
+        except Exception as e:
+            desfazer(session, e)
+            resultado["inseridos"] = 0
+            print(f"Erro ao criar pedidos em lote: {e}")
+    return resultado
+
+def importar_pedidos(caminho, tamanho_lote=TAMANHO_LOTE_PEDIDOS):
+    #CSV com cabeçalho id_cliente,id_prato,data_pedido[,quantidade] ou JSONL com um objeto por linha
+    try:
+        arquivo = open(caminho, newline="", encoding="utf-8")
+    except OSError as e:
+        print(f"Erro ao abrir arquivo de pedidos: {e}")
+        return None
+    #Os erros citam a linha do arquivo: no CSV o cabeçalho é a linha 1 e linhas em branco também contam
+    with arquivo:
+        if caminho.lower().endswith(".csv"):
+            leitor = csv.DictReader(arquivo)
+            linhas = ((leitor.line_num, linha) for linha in leitor)
+        else:
+            linhas = ((numero, linha) for numero, linha in enumerate(arquivo, start=1) if linha.strip())
+        return _criar_pedidos_numerados(linhas, tamanho_lote)
@@ -0,0 +1,78 @@
+from datetime import date
+
+from .banco import obter_engine, preparar_esquema
+from .consultas import (consulta_pratos_por_preco, consulta_clientes_pedidos, consulta_pratos_nao_pedidos,
+                        consulta_clientes_por_telefone, consulta_pratos_da_categoria)
+from .busca import consulta_busca_pratos, consulta_busca_clientes
+from .modelos import Base
+
+#Migração do esquema e verificação dos planos de consulta
+
+def migrar_banco():
+    #Cria, em um banco já existente, as tabelas e índices declarados nos modelos que ainda faltam;
+    #pedidos de um prato por linha são convertidos para cabeçalho e itens (ver criar_esquema)
+    try:
+        with obter_engine().connect() as conexao:
+            preparar_esquema(conexao)
+        with obter_engine().begin() as conexao:
+            existentes = {linha[0] for linha in conexao.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+            for tabela in Base.metadata.sorted_tables:
+                for indice in sorted(tabela.indexes, key=lambda indice: indice.name):
+                    if indice.name not in existentes:
+                        indice.create(bind=conexao)
+                        print(f"Índice {indice.name} criado em {tabela.name}.")
+        print("Migração concluída.")
+    except Exception as e:
+        print(f"Erro ao migrar o banco de dados: {e}")
+
+def _busca_por_chave_primaria(*tabelas):
+    #Cada tabela interna da junção deve ser lida por rowid: nenhum passo SCAN sobre ela e um passo
+    #SEARCH ... USING INTEGER PRIMARY KEY; só a tabela que conduz a junção pode ser percorrida
+    def verificar(plano):
+        passos = [passo.split() for passo in plano]
+        return all(
+            not any(passo[:2] == ["SCAN", tabela] for passo in passos)
+            and any(passo[:2] == ["SEARCH", tabela] and passo[2:6] == ["USING", "INTEGER", "PRIMARY", "KEY"]
+                    for passo in passos)
+            for tabela in tabelas)
+    return verificar
+
+#Cada consulta publicada e o índice que o plano do SQLite deve usar (ou uma verificação sobre os passos do plano)
+CONSULTAS_VERIFICADAS = [
+    ("selecionar_pratos_por_preco", lambda: consulta_pratos_por_preco(30), "ix_pratos_preco"),
+    ("junção_clientes_pedidos", consulta_clientes_pedidos,
+     _busca_por_chave_primaria("pedidos", "clientes", "pratos")),
+    ("junção_clientes_pedidos (por período)",
+     lambda: consulta_clientes_pedidos(date(2024, 1, 1), date(2024, 1, 31)), "ix_pedidos_data_pedido"),
+    ("diferença_pratos_nao_pedidos", consulta_pratos_nao_pedidos, "ix_itens_pedido_prato_pedido"),
+    ("diferença_pratos_nao_pedidos (últimos 30 dias)",
+     lambda: consulta_pratos_nao_pedidos(30), "ix_itens_pedido_prato_pedido"),
+    ("pratos_da_categoria", lambda: consulta_pratos_da_categoria(1), "ix_pratos_id_categoria"),
+    ("ler_clientes_por_telefone", lambda: consulta_clientes_por_telefone("0"), "ix_clientes_telefone"),
+    ("buscar_pratos", lambda: consulta_busca_pratos('"a"*'), "VIRTUAL TABLE INDEX"),
+    ("buscar_clientes", lambda: consulta_busca_clientes('"a"*'), "VIRTUAL TABLE INDEX"),
+]
+
+def _plano_consulta(conexao, consulta):
+    compilada = consulta.compile(dialect=obter_engine().dialect)
+    parametros = compilada.construct_params()
+    valores = [parametros[nome] for nome in compilada.positiontup]
+    valores = [valor.isoformat() if isinstance(valor, date) else valor for valor in valores]
+    return [linha[3] for linha in conexao.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compilada), tuple(valores))]
+
+def verificar_planos_consulta():
+    #Retorna [(nome, plano, usa_indice)] e imprime um resumo; usado pelo comando "planos"
+    resultados = []
+    with obter_engine().connect() as conexao:
+        for nome, construir, indice_esperado in CONSULTAS_VERIFICADAS:
+            plano = _plano_consulta(conexao, construir())
+            if callable(indice_esperado):
+                usa_indice = indice_esperado(plano)
+            else:
+                usa_indice = any(indice_esperado in passo for passo in plano)
+            resultados.append((nome, plano, usa_indice))
+            print(f"[{'OK' if usa_indice else 'FALHA'}] {nome}")
+            for passo in plano:
+                print(f"    {passo}")
+    return resultados
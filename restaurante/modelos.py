@@ -0,0 +1,426 @@
+#Definição das entidades do banco de dados e criação do esquema
+
+import os
+import sqlite3
+from datetime import timedelta
+
+from sqlalchemy import (Column, Integer, String, ForeignKey, Date, Index, MetaData, select, insert, delete, func,
+                        inspect)
+from sqlalchemy.schema import CreateColumn, CreateTable
+from sqlalchemy.orm import declarative_base, relationship
+
+#Classe base para definir as tabelas do banco de dados com SQLAlchemy
+Base = declarative_base()
+
+#Definicao das entidades do banco de dados
+#As chaves estrangeiras são verificadas pelo SQLite (PRAGMA foreign_keys em banco.py). Excluir uma categoria
+#exclui seus pratos, excluir um cliente exclui seus pedidos e excluir um pedido exclui seus itens; um prato
+#que já aparece em itens de pedidos não pode ser excluído, para não apagar o histórico de vendas.
+#versao é o contador da concorrência otimista: toda alteração o incrementa e só é aplicada se a versão
+#lida ainda for a gravada (ver "Atualizar" em crud.py). Nas gravações pela sessão o SQLAlchemy acrescenta
+#"AND versao = <lida>" ao UPDATE (version_id_col); o novo valor é definido pelo código (version_id_generator=False)
+
+def _coluna_versao():
+    return Column(Integer, nullable=False, default=1, server_default="1")
+
+class Categoria(Base):
+    __tablename__ = 'categorias'
+
+    id_categoria = Column(Integer, primary_key=True, autoincrement=True)
+    nome_categoria = Column(String, nullable=False)
+    versao = _coluna_versao()
+
+    __mapper_args__ = {"version_id_col": versao, "version_id_generator": False}
+    
+    #passive_deletes="all": a exclusão dos pratos fica com o ON DELETE CASCADE do banco
+    pratos = relationship("Prato", back_populates="categoria", passive_deletes="all")
+    
+    def __repr__(self):
+        return f"<Categoria(id={self.id_categoria}, nome={self.nome_categoria})>"
+
+class Prato(Base):
+    __tablename__ = 'pratos'
+
+    id_prato = Column(Integer, primary_key=True, autoincrement=True)
+    nome_prato = Column(String, nullable=False)
+    preco = Column(Integer, nullable=False, index=True)
+    id_categoria = Column(Integer, ForeignKey('categorias.id_categoria', ondelete="CASCADE"), index=True)
+    versao = _coluna_versao()
+
+    __mapper_args__ = {"version_id_col": versao, "version_id_generator": False}
+
+    categoria = relationship("Categoria", back_populates="pratos")
+
+    def __repr__(self):
+        return f"<Prato(id={self.id_prato}, nome={self.nome_prato}, preco={self.preco})>"
+
+class Cliente(Base):
+    __tablename__ = 'clientes'
+
+    id_cliente = Column(Integer, primary_key=True, autoincrement=True)
+    nome_cliente = Column(String, nullable=False)
+    telefone = Column(String, nullable=False, index=True)
+    versao = _coluna_versao()
+
+    __mapper_args__ = {"version_id_col": versao, "version_id_generator": False}
+
+    def __repr__(self):
+        return f"<Cliente(id={self.id_cliente}, nome={self.nome_cliente}, telefone={self.telefone})>"
+
+#Pedidos e itens de meses arquivados saem do banco principal (particoes.py): com AUTOINCREMENT o SQLite nunca
+#devolve os ids deles a um pedido novo, como faria com uma chave INTEGER PRIMARY KEY comum
+
+class Pedido(Base):
+    __tablename__ = 'pedidos'
+
+    id_pedido = Column(Integer, primary_key=True, autoincrement=True)
+    id_cliente = Column(Integer, ForeignKey('clientes.id_cliente', ondelete="CASCADE"), index=True)
+    data_pedido = Column(Date, index=True)
+    versao = _coluna_versao()
+
+    __mapper_args__ = {"version_id_col": versao, "version_id_generator": False}
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    cliente = relationship("Cliente")
+    itens = relationship("ItemPedido", back_populates="pedido", cascade="all, delete-orphan", passive_deletes=True,
+                         order_by="ItemPedido.id_item")
+
+    def __repr__(self):
+        return f"<Pedido(id={self.id_pedido}, cliente={self.id_cliente}, data={self.data_pedido})>"
+
+#Itens do pedido: um por prato, com o preço capturado no momento do pedido
+
+class ItemPedido(Base):
+    __tablename__ = 'itens_pedido'
+
+    id_item = Column(Integer, primary_key=True, autoincrement=True)
+    id_pedido = Column(Integer, ForeignKey('pedidos.id_pedido', ondelete="CASCADE"), nullable=False, index=True)
+    id_prato = Column(Integer, ForeignKey('pratos.id_prato'), nullable=False)
+    quantidade = Column(Integer, nullable=False, default=1)
+    preco_unitario = Column(Integer, nullable=False)
+
+    pedido = relationship("Pedido", back_populates="itens")
+    prato = relationship("Prato")
+
+    #Diferença (NOT EXISTS por prato): o índice cobre id_prato e leva ao pedido para filtrar a data
+    __table_args__ = (
+        Index('ix_itens_pedido_prato_pedido', 'id_prato', 'id_pedido'),
+        {"sqlite_autoincrement": True},
+    )
+
+    def __repr__(self):
+        return (f"<ItemPedido(id={self.id_item}, pedido={self.id_pedido}, prato={self.id_prato}, "
+                f"quantidade={self.quantidade}, preco={self.preco_unitario})>")
+
+#Tabela de resumo mantida incrementalmente pelas operações de pedidos (ver "Análise de vendas")
+
+class VendaDiaria(Base):
+    __tablename__ = 'vendas_diarias'
+
+    data = Column(Date, primary_key=True)
+    id_prato = Column(Integer, primary_key=True)
+    id_categoria = Column(Integer, index=True)
+    qtd = Column(Integer, nullable=False, default=0)
+    receita = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<VendaDiaria(data={self.data}, prato={self.id_prato}, qtd={self.qtd}, receita={self.receita})>"
+
+#Catálogo das partições mensais de pedidos movidas para arquivos SQLite separados (ver particoes.py)
+
+class ParticaoPedidos(Base):
+    __tablename__ = 'particoes_pedidos'
+
+    mes = Column(String, primary_key=True)
+    caminho = Column(String, nullable=False)
+    data_inicio = Column(Date, nullable=False)
+    data_fim = Column(Date, nullable=False, index=True)
+    pedidos = Column(Integer, nullable=False, default=0)
+    itens = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ParticaoPedidos(mes={self.mes}, caminho={self.caminho}, pedidos={self.pedidos})>"
+
+#Registro de alterações (outbox): cada inclusão, alteração ou exclusão em categorias, pratos, clientes e
+#pedidos acrescenta uma linha, gravada por gatilhos na mesma transação da alteração (ver alteracoes.py).
+#AUTOINCREMENT garante que seq nunca é reutilizado, mesmo depois que a compactação apaga as últimas linhas
+
+class Alteracao(Base):
+    __tablename__ = 'alteracoes'
+
+    seq = Column(Integer, primary_key=True)
+    tabela = Column(String, nullable=False)
+    #Nulo na operação "R": a tabela inteira foi recarregada (importação colunar)
+    id_registro = Column(Integer)
+    operacao = Column(String(1), nullable=False)
+    versao = Column(Integer)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    def __repr__(self):
+        return (f"<Alteracao(seq={self.seq}, tabela={self.tabela}, id={self.id_registro}, "
+                f"operacao={self.operacao}, versao={self.versao})>")
+
+#Posição de cada consumidor no registro de alterações: a última seq que ele confirmou
+
+class ConsumidorAlteracoes(Base):
+    __tablename__ = 'consumidores_alteracoes'
+
+    nome = Column(String, primary_key=True)
+    posicao = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ConsumidorAlteracoes(nome={self.nome}, posicao={self.posicao})>"
+
+#Criação das tabelas no banco de dados
+
+def preencher_vendas_diarias(conexao, desde=None):
+    #A receita vem do preço gravado em cada item; pratos só fornece a categoria.
+    #Meses já arquivados não estão mais em pedidos: o resumo deles é mantido e a reconstrução
+    #começa depois do último mês arquivado
+    arquivado_ate = conexao.execute(select(func.max(ParticaoPedidos.data_fim))).scalar()
+    if arquivado_ate is not None and (desde is None or desde <= arquivado_ate):
+        desde = arquivado_ate + timedelta(days=1)
+    agregado = (select(Pedido.data_pedido, ItemPedido.id_prato, Prato.id_categoria,
+                       func.sum(ItemPedido.quantidade),
+                       func.sum(ItemPedido.quantidade * ItemPedido.preco_unitario))
+                .join(ItemPedido.pedido)
+                .outerjoin(ItemPedido.prato)
+                .where(Pedido.data_pedido.is_not(None))
+                .group_by(Pedido.data_pedido, ItemPedido.id_prato))
+    remover = delete(VendaDiaria)
+    if desde is not None:
+        agregado = agregado.where(Pedido.data_pedido >= desde)
+        remover = remover.where(VendaDiaria.data >= desde)
+    conexao.execute(remover)
+    conexao.execute(insert(VendaDiaria).from_select(
+        ["data", "id_prato", "id_categoria", "qtd", "receita"], agregado))
+
+def _converter_pedidos_em_itens(conexao):
+    #Bancos anteriores aos itens guardam um prato por pedido (pedidos.id_prato). A tabela é reconstruída
+    #sem a coluna e cada pedido vira um item com quantidade 1 e o preço atual do prato
+    for (indice,) in conexao.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'pedidos' AND sql IS NOT NULL").all():
+        conexao.exec_driver_sql(f'DROP INDEX "{indice}"')
+    conexao.exec_driver_sql("ALTER TABLE pedidos RENAME TO pedidos_antigos")
+    Pedido.__table__.create(bind=conexao)
+    ItemPedido.__table__.create(bind=conexao, checkfirst=True)
+    conexao.exec_driver_sql(
+        "INSERT INTO pedidos (id_pedido, id_cliente, data_pedido) "
+        "SELECT id_pedido, id_cliente, data_pedido FROM pedidos_antigos")
+    total = conexao.exec_driver_sql(
+        "INSERT INTO itens_pedido (id_pedido, id_prato, quantidade, preco_unitario) "
+        "SELECT p.id_pedido, p.id_prato, 1, COALESCE(pr.preco, 0) FROM pedidos_antigos p "
+        "LEFT JOIN pratos pr ON pr.id_prato = p.id_prato WHERE p.id_prato IS NOT NULL "
+        "ORDER BY p.id_pedido").rowcount
+    conexao.exec_driver_sql("DROP TABLE pedidos_antigos")
+    print(f"Pedidos convertidos para o modelo com itens: {total} itens criados.")
+
+#Bancos criados antes das ações ON DELETE guardam as chaves estrangeiras sem elas. O SQLite não altera
+#restrições de uma tabela existente: ela é recriada com o esquema do modelo, os dados são copiados e a
+#antiga é trocada pela nova. Exige as chaves estrangeiras desligadas (ver preparar_esquema em banco.py), senão
+#o DROP TABLE da tabela antiga excluiria em cascata as linhas que a referenciam
+
+def _acoes_desatualizadas(conexao, tabela):
+    declaradas = {(chave.parent.name, chave.column.table.name, (chave.ondelete or "NO ACTION").upper())
+                  for chave in tabela.foreign_keys}
+    gravadas = {(linha[3], linha[2], linha[6])
+                for linha in conexao.exec_driver_sql(f"PRAGMA foreign_key_list({tabela.name})")}
+    return declaradas != gravadas
+
+def _reconstruir_tabela(conexao, tabela):
+    metadados = MetaData()
+    for outra in Base.metadata.sorted_tables:
+        outra.to_metadata(metadados)
+    nova = tabela.to_metadata(metadados, name=f"{tabela.name}_nova")
+    existentes = {coluna["name"] for coluna in inspect(conexao).get_columns(tabela.name)}
+    colunas = ", ".join(coluna.name for coluna in tabela.columns if coluna.name in existentes)
+    conexao.execute(CreateTable(nova))
+    conexao.exec_driver_sql(f"INSERT INTO {nova.name} ({colunas}) SELECT {colunas} FROM {tabela.name}")
+    conexao.exec_driver_sql(f"DROP TABLE {tabela.name}")
+    conexao.exec_driver_sql(f"ALTER TABLE {nova.name} RENAME TO {tabela.name}")
+    for indice in tabela.indexes:
+        indice.create(bind=conexao)
+
+def adicionar_colunas_novas(conexao):
+    #Colunas declaradas nos modelos que faltam em tabelas existentes (por exemplo, versao) entram com
+    #ALTER TABLE ... ADD COLUMN, que no SQLite não reescreve a tabela; precisam de um valor padrão
+    inspetor = inspect(conexao)
+    for tabela in Base.metadata.sorted_tables:
+        if not inspetor.has_table(tabela.name):
+            continue
+        existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name not in existentes:
+                definicao = CreateColumn(coluna).compile(dialect=conexao.dialect)
+                conexao.exec_driver_sql(f"ALTER TABLE {tabela.name} ADD COLUMN {definicao}")
+                print(f"Coluna {coluna.name} adicionada em {tabela.name}.")
+
+def atualizar_chaves_estrangeiras(conexao):
+    inspetor = inspect(conexao)
+    reconstruidas = [tabela for tabela in Base.metadata.sorted_tables
+                     if tabela.foreign_keys and inspetor.has_table(tabela.name)
+                     and _acoes_desatualizadas(conexao, tabela)]
+    if not reconstruidas:
+        return
+    if conexao.exec_driver_sql("PRAGMA foreign_keys").scalar():
+        raise RuntimeError("As chaves estrangeiras precisam ser atualizadas com PRAGMA foreign_keys desligado "
+                           "(use preparar_esquema).")
+    if Prato.__table__ in reconstruidas:
+        #Os gatilhos da busca textual somem com a tabela antiga; criar_busca_textual os recria
+        remover_busca_textual(conexao)
+    for tabela in reconstruidas:
+        _reconstruir_tabela(conexao, tabela)
+        print(f"Chaves estrangeiras de {tabela.name} atualizadas.")
+    #Registros que já apontavam para linhas excluídas continuam no banco; o SQLite só os verifica quando mudam
+    orfaos = {}
+    for tabela, _, referenciada, _ in conexao.exec_driver_sql("PRAGMA foreign_key_check"):
+        orfaos[(tabela, referenciada)] = orfaos.get((tabela, referenciada), 0) + 1
+    for (tabela, referenciada), quantidade in sorted(orfaos.items()):
+        print(f"Aviso: {quantidade} registros de {tabela} apontam para {referenciada} inexistentes.")
+
+#Bancos anteriores ao AUTOINCREMENT em pedidos e itens_pedido: as tabelas são recriadas (como acima) e a
+#sequência de cada uma parte do maior id já usado, inclusive nos meses arquivados, que podem ter ids
+#maiores do que os que ficaram no banco principal
+
+def _sem_autoincremento(conexao, tabela):
+    sql = conexao.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                  (tabela.name,)).scalar()
+    return sql is not None and "AUTOINCREMENT" not in sql.upper()
+
+def _maiores_ids_arquivados(conexao):
+    #{tabela: maior id} nas partições do catálogo; arquivos que não existem mais são ignorados
+    maiores = {}
+    if not inspect(conexao).has_table(ParticaoPedidos.__tablename__):
+        return maiores
+    banco = conexao.engine.url.database
+    diretorio = os.path.dirname(os.path.abspath(banco)) if banco and banco != ":memory:" else os.getcwd()
+    for (caminho,) in conexao.execute(select(ParticaoPedidos.caminho)):
+        caminho = os.path.join(diretorio, caminho)
+        if not os.path.exists(caminho):
+            continue
+        particao = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        try:
+            for tabela in (Pedido.__table__, ItemPedido.__table__):
+                chave = tabela.primary_key.columns[0].name
+                maior = particao.execute(f"SELECT max({chave}) FROM {tabela.name}").fetchone()[0] or 0
+                maiores[tabela.name] = max(maiores.get(tabela.name, 0), maior)
+        finally:
+            particao.close()
+    return maiores
+
+def ativar_autoincremento(conexao):
+    reconstruidas = [tabela for tabela in (Pedido.__table__, ItemPedido.__table__)
+                     if _sem_autoincremento(conexao, tabela)]
+    if not reconstruidas:
+        return
+    if conexao.exec_driver_sql("PRAGMA foreign_keys").scalar():
+        raise RuntimeError("pedidos e itens_pedido precisam ser recriados com PRAGMA foreign_keys desligado "
+                           "(use preparar_esquema).")
+    arquivados = _maiores_ids_arquivados(conexao)
+    for tabela in reconstruidas:
+        _reconstruir_tabela(conexao, tabela)
+        maior = arquivados.get(tabela.name, 0)
+        if not conexao.exec_driver_sql("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?",
+                                       (maior, tabela.name)).rowcount:
+            conexao.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela.name, maior))
+        print(f"Ids de {tabela.name} não serão mais reutilizados (AUTOINCREMENT).")
+
+#Busca textual (FTS5)
+#busca_pratos e busca_clientes usam o rowid do registro de origem e são mantidas por gatilhos.
+#O tokenizador remove acentos ("fígado" encontra "figado"); o telefone é indexado só com dígitos.
+#Os índices de prefixo de 2 a 4 caracteres evitam expandir cada prefixo digitado em todos os termos
+
+OPCOES_BUSCA = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'"
+
+def _telefone_normalizado(expressao):
+    for caractere in (" ", "-", "(", ")", "+", "."):
+        expressao = f"replace({expressao}, '{caractere}', '')"
+    return expressao
+
+DDL_BUSCA = [
+    f"CREATE VIRTUAL TABLE busca_pratos USING fts5(nome_prato, {OPCOES_BUSCA})",
+    "CREATE TRIGGER busca_pratos_ai AFTER INSERT ON pratos BEGIN "
+    "INSERT INTO busca_pratos (rowid, nome_prato) VALUES (new.id_prato, new.nome_prato); END",
+    "CREATE TRIGGER busca_pratos_au AFTER UPDATE OF id_prato, nome_prato ON pratos BEGIN "
+    "DELETE FROM busca_pratos WHERE rowid = old.id_prato; "
+    "INSERT INTO busca_pratos (rowid, nome_prato) VALUES (new.id_prato, new.nome_prato); END",
+    "CREATE TRIGGER busca_pratos_ad AFTER DELETE ON pratos BEGIN "
+    "DELETE FROM busca_pratos WHERE rowid = old.id_prato; END",
+    "INSERT INTO busca_pratos (rowid, nome_prato) SELECT id_prato, nome_prato FROM pratos",
+
+    f"CREATE VIRTUAL TABLE busca_clientes USING fts5(nome_cliente, telefone, {OPCOES_BUSCA})",
+    "CREATE TRIGGER busca_clientes_ai AFTER INSERT ON clientes BEGIN "
+    "INSERT INTO busca_clientes (rowid, nome_cliente, telefone) "
+    f"VALUES (new.id_cliente, new.nome_cliente, {_telefone_normalizado('new.telefone')}); END",
+    "CREATE TRIGGER busca_clientes_au AFTER UPDATE OF id_cliente, nome_cliente, telefone ON clientes BEGIN "
+    "DELETE FROM busca_clientes WHERE rowid = old.id_cliente; "
+    "INSERT INTO busca_clientes (rowid, nome_cliente, telefone) "
+    f"VALUES (new.id_cliente, new.nome_cliente, {_telefone_normalizado('new.telefone')}); END",
+    "CREATE TRIGGER busca_clientes_ad AFTER DELETE ON clientes BEGIN "
+    "DELETE FROM busca_clientes WHERE rowid = old.id_cliente; END",
+    "INSERT INTO busca_clientes (rowid, nome_cliente, telefone) "
+    f"SELECT id_cliente, nome_cliente, {_telefone_normalizado('telefone')} FROM clientes",
+]
+
+def criar_busca_textual(conexao):
+    #Cria as tabelas FTS5 e os gatilhos e indexa os registros existentes; não faz nada se já existirem
+    if inspect(conexao).has_table("busca_pratos"):
+        return
+    for comando in DDL_BUSCA:
+        conexao.exec_driver_sql(comando)
+
+def remover_busca_textual(conexao):
+    #Usada antes de cargas grandes: sem os gatilhos, criar_busca_textual indexa tudo de uma vez no fim
+    for tabela in ("pratos", "clientes"):
+        for sufixo in ("ai", "au", "ad"):
+            conexao.exec_driver_sql(f"DROP TRIGGER IF EXISTS busca_{tabela}_{sufixo}")
+        conexao.exec_driver_sql(f"DROP TABLE IF EXISTS busca_{tabela}")
+
+#Gatilhos do registro de alterações
+#I = inclusão, A = alteração, E = exclusão (inclusive em cascata); a versão permite ao consumidor
+#descartar uma alteração mais antiga do que o registro que ele já tem. Fora dos gatilhos são gravados
+#M (pedido movido para uma partição mensal, ver particoes.py) e R (tabela recarregada, ver colunar.py)
+
+TABELAS_RASTREADAS = (Categoria, Prato, Cliente, Pedido)
+
+def _ddl_alteracoes():
+    comandos = []
+    for modelo in TABELAS_RASTREADAS:
+        tabela = modelo.__tablename__
+        chave = modelo.__mapper__.primary_key[0].name
+        for sufixo, evento, operacao, linha in (("ai", "INSERT", "I", "new"), ("au", "UPDATE", "A", "new"),
+                                                 ("ad", "DELETE", "E", "old")):
+            comandos.append(
+                f"CREATE TRIGGER IF NOT EXISTS alteracoes_{tabela}_{sufixo} AFTER {evento} ON {tabela} BEGIN "
+                "INSERT INTO alteracoes (tabela, id_registro, operacao, versao) "
+                f"VALUES ('{tabela}', {linha}.{chave}, '{operacao}', {linha}.versao); END")
+    return comandos
+
+def criar_registro_alteracoes(conexao):
+    #Os gatilhos somem quando uma tabela é recriada (atualizar_chaves_estrangeiras); IF NOT EXISTS os refaz
+    for comando in _ddl_alteracoes():
+        conexao.exec_driver_sql(comando)
+
+def remover_registro_alteracoes(conexao):
+    #Usada antes de cargas completas, que registram uma única alteração "R" por tabela
+    for modelo in TABELAS_RASTREADAS:
+        for sufixo in ("ai", "au", "ad"):
+            conexao.exec_driver_sql(f"DROP TRIGGER IF EXISTS alteracoes_{modelo.__tablename__}_{sufixo}")
+
+def criar_esquema(conexao):
+    #Recebe uma conexão em transação, com as chaves estrangeiras desligadas (ver preparar_esquema em banco.py);
+    #um resumo de vendas recém-criado em um banco com pedidos é preenchido a partir do histórico
+    inspetor = inspect(conexao)
+    if inspetor.has_table(Pedido.__tablename__) and "id_prato" in {
+            coluna["name"] for coluna in inspetor.get_columns(Pedido.__tablename__)}:
+        _converter_pedidos_em_itens(conexao)
+    adicionar_colunas_novas(conexao)
+    atualizar_chaves_estrangeiras(conexao)
+    ativar_autoincremento(conexao)
+    resumo_novo = not inspetor.has_table(VendaDiaria.__tablename__)
+    Base.metadata.create_all(bind=conexao)
+    if resumo_novo:
+        preencher_vendas_diarias(conexao)
+    criar_busca_textual(conexao)
+    criar_registro_alteracoes(conexao)
@@ -0,0 +1,262 @@
+import os
+from datetime import date, timedelta
+
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, select
+
+from .banco import obter_engine
+from .consultas import _formatar_linha_pedido
+from .modelos import (Cliente, Prato, Pedido, ItemPedido, ParticaoPedidos, criar_registro_alteracoes,
+                      remover_registro_alteracoes)
+
+#Particionamento mensal de pedidos
+#Os pedidos recentes ficam no banco principal; meses antigos são movidos para um arquivo SQLite por
+#mês (pedidos_AAAA_MM.db) e registrados em particoes_pedidos. As consultas por período anexam (ATTACH)
+#apenas as partições que cruzam o intervalo pedido. vendas_diarias continua com todo o histórico.
+#Em modo WAL um commit que envolve vários arquivos não é atômico entre eles, por isso cada mês é
+#copiado, conferido linha a linha e só então apagado do banco principal, junto com o registro no
+#catálogo, em uma transação apenas do banco principal. A conferência e a remoção ficam na mesma
+#transação BEGIN IMMEDIATE: nenhum outro escritor grava no mês entre uma e outra. Se alguém gravou
+#entre a cópia e a trava, a cópia é refeita. Repetir o comando após uma falha é seguro.
+#Os pedidos movidos não foram excluídos: no registro de alterações cada um recebe a operação "M" (movido
+#para uma partição) em vez do "E" que o gatilho de exclusão gravaria.
+
+DIRETORIO_ARQUIVO = "arquivo"
+APELIDO_PARTICAO = "particao"
+TENTATIVAS_ARQUIVAMENTO = 3
+
+def _inicio_do_mes(dia):
+    return dia.replace(day=1)
+
+def _fim_do_mes(dia):
+    return (dia.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+def _diretorio_banco():
+    banco = obter_engine().url.database
+    return os.path.dirname(os.path.abspath(banco)) if banco and banco != ":memory:" else os.getcwd()
+
+def _caminho_absoluto(caminho):
+    return caminho if os.path.isabs(caminho) else os.path.join(_diretorio_banco(), caminho)
+
+def _tabelas_no_esquema(esquema):
+    #Cópias de pedidos e itens_pedido (colunas e índices, sem chaves estrangeiras: clientes e pratos
+    #ficam no banco principal) qualificadas pelo apelido do banco anexado. Pedidos arquivados não são
+    #mais alterados, então a coluna versao (concorrência otimista) fica só no banco principal
+    metadados = MetaData()
+    tabelas = []
+    for original in (Pedido.__table__, ItemPedido.__table__):
+        tabela = Table(original.name, metadados, *[
+            Column(coluna.name, coluna.type, primary_key=coluna.primary_key, nullable=coluna.nullable)
+            for coluna in original.columns if coluna.name != "versao"], schema=esquema)
+        for indice in original.indexes:
+            Index(indice.name, *[tabela.c[coluna.name] for coluna in indice.columns])
+        tabelas.append(tabela)
+    return tuple(tabelas)
+
+def _criar_arquivo(caminho):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    engine = create_engine(f"sqlite:///{caminho}")
+    try:
+        with engine.begin() as conexao:
+            for tabela in _tabelas_no_esquema(None):
+                tabela.create(bind=conexao, checkfirst=True)
+    finally:
+        engine.dispose()
+
+#ATTACH e DETACH não podem ocorrer dentro de uma transação: a transação aberta é encerrada antes
+
+def _anexar(conexao, caminho):
+    conexao.commit()
+    conexao.exec_driver_sql(f"ATTACH DATABASE ? AS {APELIDO_PARTICAO}", (caminho,))
+    conexao.commit()
+
+def _desanexar(conexao):
+    conexao.rollback()
+    conexao.exec_driver_sql(f"DETACH DATABASE {APELIDO_PARTICAO}")
+    conexao.commit()
+
+#Arquivamento
+
+def _copiar_mes(conexao, periodo):
+    #Idempotente: uma cópia anterior interrompida é sobrescrita
+    conexao.exec_driver_sql(
+        f"INSERT OR REPLACE INTO {APELIDO_PARTICAO}.pedidos (id_pedido, id_cliente, data_pedido) "
+        "SELECT id_pedido, id_cliente, data_pedido FROM main.pedidos "
+        "WHERE data_pedido >= ? AND data_pedido < ?", periodo)
+    conexao.exec_driver_sql(
+        f"INSERT OR REPLACE INTO {APELIDO_PARTICAO}.itens_pedido "
+        "(id_item, id_pedido, id_prato, quantidade, preco_unitario) "
+        "SELECT i.id_item, i.id_pedido, i.id_prato, i.quantidade, i.preco_unitario "
+        "FROM main.itens_pedido i JOIN main.pedidos p ON p.id_pedido = i.id_pedido "
+        "WHERE p.data_pedido >= ? AND p.data_pedido < ?", periodo)
+    conexao.commit()
+
+def _conferir_copia(conexao, periodo):
+    #Quantos pedidos e itens do mês existem e quantos estão no arquivo com os mesmos valores
+    pedidos, pedidos_copiados = conexao.exec_driver_sql(
+        f"SELECT count(*), count(a.id_pedido) FROM main.pedidos m "
+        f"LEFT JOIN {APELIDO_PARTICAO}.pedidos a ON a.id_pedido = m.id_pedido "
+        "AND a.id_cliente IS m.id_cliente AND a.data_pedido = m.data_pedido "
+        "WHERE m.data_pedido >= ? AND m.data_pedido < ?", periodo).one()
+    itens, itens_copiados = conexao.exec_driver_sql(
+        f"SELECT count(*), count(a.id_item) FROM main.itens_pedido m "
+        "JOIN main.pedidos p ON p.id_pedido = m.id_pedido "
+        f"LEFT JOIN {APELIDO_PARTICAO}.itens_pedido a ON a.id_item = m.id_item "
+        "AND a.id_pedido = m.id_pedido AND a.id_prato = m.id_prato "
+        "AND a.quantidade = m.quantidade AND a.preco_unitario = m.preco_unitario "
+        "WHERE p.data_pedido >= ? AND p.data_pedido < ?", periodo).one()
+    return pedidos, pedidos_copiados, itens, itens_copiados
+
+def _arquivar_mes(conexao, mes, diretorio):
+    inicio = date.fromisoformat(mes + "-01")
+    fim = _fim_do_mes(inicio)
+    periodo = (inicio.isoformat(), (fim + timedelta(days=1)).isoformat())
+    relativo = os.path.join(diretorio, f"pedidos_{mes.replace('-', '_')}.db")
+    caminho = _caminho_absoluto(relativo)
+    _criar_arquivo(caminho)
+    _anexar(conexao, caminho)
+    try:
+        for _ in range(TENTATIVAS_ARQUIVAMENTO):
+            _copiar_mes(conexao, periodo)
+            #A trava de escrita vale até o commit da remoção (ou o rollback)
+            conexao.exec_driver_sql("BEGIN IMMEDIATE")
+            pedidos, pedidos_copiados, itens, itens_copiados = _conferir_copia(conexao, periodo)
+            if (pedidos, itens) == (pedidos_copiados, itens_copiados):
+                break
+            conexao.rollback()
+        else:
+            raise RuntimeError(f"Cópia de {mes} incompleta: {pedidos_copiados}/{pedidos} pedidos, "
+                               f"{itens_copiados}/{itens} itens. Nada foi removido do banco principal.")
+        total_pedidos, total_itens = conexao.exec_driver_sql(
+            f"SELECT (SELECT count(*) FROM {APELIDO_PARTICAO}.pedidos), "
+            f"(SELECT count(*) FROM {APELIDO_PARTICAO}.itens_pedido)").one()
+
+        #Remove do banco principal e registra a partição na mesma transação da conferência; os gatilhos do
+        #registro de alterações saem e voltam no mesmo commit
+        conexao.exec_driver_sql(
+            "INSERT INTO main.alteracoes (tabela, id_registro, operacao, versao) "
+            "SELECT 'pedidos', id_pedido, 'M', versao FROM main.pedidos "
+            "WHERE data_pedido >= ? AND data_pedido < ? ORDER BY id_pedido", periodo)
+        remover_registro_alteracoes(conexao)
+        conexao.exec_driver_sql(
+            "DELETE FROM main.itens_pedido WHERE id_pedido IN (SELECT id_pedido FROM main.pedidos "
+            "WHERE data_pedido >= ? AND data_pedido < ?)", periodo)
+        conexao.exec_driver_sql(
+            "DELETE FROM main.pedidos WHERE data_pedido >= ? AND data_pedido < ?", periodo)
+        criar_registro_alteracoes(conexao)
+        conexao.exec_driver_sql(
+            "INSERT INTO main.particoes_pedidos (mes, caminho, data_inicio, data_fim, pedidos, itens) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (mes) DO UPDATE SET "
+            "caminho = excluded.caminho, pedidos = excluded.pedidos, itens = excluded.itens",
+            (mes, relativo, inicio.isoformat(), fim.isoformat(), total_pedidos, total_itens))
+        conexao.commit()
+    finally:
+        _desanexar(conexao)
+    return pedidos
+
+def arquivar_pedidos(antes_de, diretorio=DIRETORIO_ARQUIVO, compactar=True):
+    #Move para arquivos mensais todos os meses completos anteriores a antes_de e compacta o banco principal
+    limite = _inicio_do_mes(antes_de).isoformat()
+    try:
+        with obter_engine().connect() as conexao:
+            meses = [mes for (mes,) in conexao.exec_driver_sql(
+                "SELECT DISTINCT substr(data_pedido, 1, 7) FROM pedidos WHERE data_pedido < ? ORDER BY 1",
+                (limite,))]
+            movidos = 0
+            for mes in meses:
+                quantidade = _arquivar_mes(conexao, mes, diretorio)
+                movidos += quantidade
+                print(f"Mês {mes}: {quantidade} pedidos arquivados.")
+            if not meses:
+                print("Nenhum pedido anterior a essa data no banco principal.")
+            elif compactar:
+                conexao.exec_driver_sql("VACUUM")
+                conexao.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+                print("Banco principal compactado.")
+        return movidos
+    except Exception as e:
+        print(f"Erro ao arquivar pedidos: {e}")
+
+def listar_particoes():
+    with obter_engine().connect() as conexao:
+        return conexao.execute(select(ParticaoPedidos).order_by(ParticaoPedidos.mes)).all()
+
+#Consultas que cruzam o banco principal e as partições
+
+def particoes_do_periodo(conexao, data_inicio=None, data_fim=None):
+    #Poda: apenas as partições cujo mês cruza o intervalo
+    consulta = select(ParticaoPedidos.mes, ParticaoPedidos.caminho).order_by(ParticaoPedidos.mes)
+    if data_inicio is not None:
+        consulta = consulta.where(ParticaoPedidos.data_fim >= data_inicio)
+    if data_fim is not None:
+        consulta = consulta.where(ParticaoPedidos.data_inicio <= data_fim)
+    return conexao.execute(consulta).all()
+
+def _nas_fontes(data_inicio, data_fim, executar):
+    #Executa executar(conexao, esquema) em cada partição necessária (em ordem cronológica) e no banco principal
+    with obter_engine().connect() as conexao:
+        for _, caminho in particoes_do_periodo(conexao, data_inicio, data_fim):
+            caminho = _caminho_absoluto(caminho)
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(f"Partição não encontrada: {caminho}")
+            _anexar(conexao, caminho)
+            try:
+                yield from executar(conexao, APELIDO_PARTICAO)
+            finally:
+                _desanexar(conexao)
+        yield from executar(conexao, None)
+
+def _consulta_pedidos(esquema, data_inicio, data_fim):
+    pedidos, itens = _tabelas_no_esquema(esquema)
+    consulta = (select(pedidos.c.id_pedido, Cliente.nome_cliente, Prato.nome_prato, itens.c.quantidade,
+                       pedidos.c.data_pedido)
+                .select_from(pedidos)
+                .join(itens, itens.c.id_pedido == pedidos.c.id_pedido)
+                .outerjoin(Cliente, Cliente.id_cliente == pedidos.c.id_cliente)
+                .outerjoin(Prato, Prato.id_prato == itens.c.id_prato)
+                .order_by(pedidos.c.data_pedido, pedidos.c.id_pedido, itens.c.id_item))
+    if data_inicio is not None:
+        consulta = consulta.where(pedidos.c.data_pedido >= data_inicio)
+    if data_fim is not None:
+        consulta = consulta.where(pedidos.c.data_pedido <= data_fim)
+    return consulta
+
+def linhas_pedidos_periodo(data_inicio=None, data_fim=None, limite=None):
+    #Uma linha por item, partição por partição (ordenadas por data dentro de cada uma) e depois o banco principal
+    restantes = [limite]
+
+    def executar(conexao, esquema):
+        consulta = _consulta_pedidos(esquema, data_inicio, data_fim)
+        if restantes[0] is not None:
+            if restantes[0] <= 0:
+                return
+            consulta = consulta.limit(restantes[0])
+        for linha in conexao.execute(consulta):
+            if restantes[0] is not None:
+                restantes[0] -= 1
+            yield linha
+
+    yield from _nas_fontes(data_inicio, data_fim, executar)
+
+def junção_pedidos_periodo(data_inicio=None, data_fim=None, limite=None):
+    try:
+        for linha in linhas_pedidos_periodo(data_inicio, data_fim, limite):
+            print(_formatar_linha_pedido(linha))
+    except Exception as e:
+        print(f"Erro ao consultar pedidos do período: {e}")
+
+def pratos_nao_pedidos_periodo(data_inicio=None, data_fim=None):
+    #Diferença entre todos os pratos e os pedidos no período, somando banco principal e partições
+    def executar(conexao, esquema):
+        pedidos, itens = _tabelas_no_esquema(esquema)
+        consulta = (select(itens.c.id_prato).distinct()
+                    .join(pedidos, pedidos.c.id_pedido == itens.c.id_pedido))
+        if data_inicio is not None:
+            consulta = consulta.where(pedidos.c.data_pedido >= data_inicio)
+        if data_fim is not None:
+            consulta = consulta.where(pedidos.c.data_pedido <= data_fim)
+        return conexao.execute(consulta).scalars()
+
+    pedidos = set(_nas_fontes(data_inicio, data_fim, executar))
+    with obter_engine().connect() as conexao:
+        return [prato for prato in conexao.execute(
+            select(Prato.id_prato, Prato.nome_prato).order_by(Prato.id_prato)) if prato.id_prato not in pedidos]
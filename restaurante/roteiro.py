@@ -0,0 +1,137 @@
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import date
+from io import StringIO
+from itertools import chain, islice
+
+from .analise import receita_por_dia, pratos_mais_vendidos, receita_por_categoria
+from .banco import unidade_de_trabalho
+from .busca import buscar_pratos, buscar_clientes
+from .crud import (criar_categoria, criar_prato, criar_cliente, criar_pedido, criar_pedido_com_itens, ler_categoria,
+                   ler_prato, ler_cliente, ler_pedido, ler_clientes_por_telefone, atualizar_categoria, atualizar_prato,
+                   atualizar_cliente, atualizar_pedido, excluir_categoria, excluir_prato, excluir_cliente,
+                   excluir_pedido, reajustar_precos, excluir_pedidos_anteriores, ConflitoDeVersao, RegistroEmUso)
+from .lote import criar_pedidos_em_lote
+from .servico import _para_json
+
+#Modo roteiro: executa comandos JSON, um por linha, sem os menus interativos
+#Cada linha é um objeto com "op" e os argumentos da função de mesmo nome, por exemplo
+#{"op": "criar_pedido", "id_cliente": 3, "id_prato": 5, "data_pedido": "2024-06-01"} ou
+#{"op": "criar_pedido_com_itens", "id_cliente": 3, "data_pedido": "2024-06-01", "itens": [[5, 2], 7]};
+#campos data_* vêm em AAAA-MM-DD. Os comandos são agrupados em transações de "lote" comandos
+#(unidade_de_trabalho) e cada um roda em um SAVEPOINT: o comando que falha é desfeito sozinho e o lote
+#continua. Com atomico o roteiro inteiro é uma transação e o primeiro erro desfaz tudo.
+#Para cada comando sai uma linha JSON {"linha", "op", "ok", "resultado" ou "erro", "mensagens"}, com o que a
+#função imprimiria no menu em "mensagens"; a última linha é {"resumo": {...}}.
+
+LOTE_ROTEIRO = 100
+
+OPERACOES = {
+    "criar_categoria": criar_categoria,
+    "criar_prato": criar_prato,
+    "criar_cliente": criar_cliente,
+    "criar_pedido": criar_pedido,
+    "criar_pedido_com_itens": criar_pedido_com_itens,
+    "criar_pedidos_em_lote": criar_pedidos_em_lote,
+    "ler_categoria": ler_categoria,
+    "ler_prato": ler_prato,
+    "ler_cliente": ler_cliente,
+    "ler_pedido": ler_pedido,
+    "ler_clientes_por_telefone": ler_clientes_por_telefone,
+    "atualizar_categoria": atualizar_categoria,
+    "atualizar_prato": atualizar_prato,
+    "atualizar_cliente": atualizar_cliente,
+    "atualizar_pedido": atualizar_pedido,
+    "excluir_categoria": excluir_categoria,
+    "excluir_prato": excluir_prato,
+    "excluir_cliente": excluir_cliente,
+    "excluir_pedido": excluir_pedido,
+    "reajustar_precos": reajustar_precos,
+    "excluir_pedidos_anteriores": excluir_pedidos_anteriores,
+    "buscar_pratos": buscar_pratos,
+    "buscar_clientes": buscar_clientes,
+    "receita_por_dia": receita_por_dia,
+    "pratos_mais_vendidos": pratos_mais_vendidos,
+    "receita_por_categoria": receita_por_categoria,
+}
+#Nas leituras, None significa "não encontrado"; nas gravações, que nada foi feito (a mensagem diz o motivo)
+_GRAVACOES = {op for op in OPERACOES if op.startswith(("criar_", "atualizar_", "excluir_", "reajustar_"))}
+
+class _RoteiroDesfeito(Exception):
+    pass
+
+def _argumentos(comando):
+    argumentos = {}
+    for nome, valor in comando.items():
+        if nome == "op":
+            continue
+        if nome.startswith("data") and isinstance(valor, str):
+            valor = date.fromisoformat(valor)
+        argumentos[nome] = valor
+    return argumentos
+
+def _executar_comando(session, numero, linha):
+    #Retorna o resultado já convertido em JSON (os objetos não são lidos depois que a transação avança)
+    mensagens = StringIO()
+    resultado = {"linha": numero, "op": None, "ok": False}
+    try:
+        comando = json.loads(linha)
+        if not isinstance(comando, dict):
+            raise ValueError("cada linha deve ser um objeto JSON")
+        resultado["op"] = op = comando.get("op")
+        if op not in OPERACOES:
+            raise ValueError(f"operação desconhecida: {op!r}")
+        argumentos = _argumentos(comando)
+        with session.begin_nested(), redirect_stdout(mensagens):
+            valor = OPERACOES[op](**argumentos)
+        impressas = mensagens.getvalue().splitlines()
+        if valor is None and op in _GRAVACOES:
+            resultado["erro"] = impressas[-1] if impressas else "operação não realizada"
+        else:
+            resultado.update(ok=True, resultado=valor)
+    except ConflitoDeVersao as e:
+        resultado.update(erro=str(e), versao_atual=e.versao_atual)
+    except (ValueError, RegistroEmUso) as e:
+        resultado["erro"] = str(e)
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+    resultado["mensagens"] = mensagens.getvalue().splitlines()
+    return resultado["ok"], json.dumps(resultado, default=_para_json, ensure_ascii=False)
+
+def executar_roteiro(linhas, lote=LOTE_ROTEIRO, parar_no_erro=False, atomico=False, saida=None):
+    #linhas: arquivo aberto ou qualquer iterável de strings; linhas vazias são ignoradas. Retorna o resumo
+    saida = saida or sys.stdout
+    inicio = time.perf_counter()
+    resumo = {"comandos": 0, "ok": 0, "erros": 0, "transacoes": 0, "desfeito": False}
+    pendentes = ((numero, linha) for numero, linha in enumerate(linhas, start=1) if linha.strip())
+    tamanho = None if atomico or not lote else lote
+    parar = False
+    while not parar:
+        bloco = islice(pendentes, tamanho)
+        primeiro = next(bloco, None)
+        if primeiro is None:
+            break
+        try:
+            with unidade_de_trabalho() as session:
+                #O pysqlite só abre a transação antes de INSERT/UPDATE/DELETE; se o primeiro SAVEPOINT a abrisse,
+                #o RELEASE dele faria o commit. IMMEDIATE reserva a gravação já no início do lote
+                session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for numero, linha in chain([primeiro], bloco):
+                    ok, resultado = _executar_comando(session, numero, linha)
+                    saida.write(resultado + "\n")
+                    resumo["comandos"] += 1
+                    resumo["ok" if ok else "erros"] += 1
+                    if not ok and (parar_no_erro or atomico):
+                        parar = True
+                        if atomico:
+                            raise _RoteiroDesfeito()
+                        break
+            resumo["transacoes"] += 1
+        except _RoteiroDesfeito:
+            resumo["desfeito"] = True
+    resumo["segundos"] = round(time.perf_counter() - inicio, 3)
+    saida.write(json.dumps({"resumo": resumo}, ensure_ascii=False) + "\n")
+    saida.flush()
+    return resumo
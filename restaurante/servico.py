@@ -0,0 +1,515 @@
+#Serviço HTTP/JSON local na frente das funções CRUD e de álgebra relacional (somente biblioteca padrão)
+#- HTTP/1.1 com keep-alive; cada conexão é atendida por uma thread de um pool de tamanho fixo
+#- POST /pedidos passa por um agrupador: os pedidos que chegam enquanto um grupo está sendo
+#  gravado são gravados juntos na transação seguinte
+#- GET /categorias e GET /pratos respondem com ETag; com If-None-Match igual, a resposta é 304
+#- PUT aceita "versao" no corpo (concorrência otimista): se o registro mudou desde a leitura, a resposta é 409
+#- DELETE de um prato já vendido (ou da categoria dele) também responde 409, com o motivo
+#- GET /alteracoes entrega o registro de alterações após uma seq ("apos") ou após a posição salva de um
+#  consumidor ("consumidor"); POST /alteracoes/confirmar avança essa posição (ver alteracoes.py)
+#- GET /stats devolve as estatísticas de consultas (instrumentacao.py) para coleta externa
+
+import hashlib
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlsplit
+
+from .alteracoes import LOTE_ALTERACOES, confirmar_alteracoes, ler_alteracoes, posicao_consumidor
+from .banco import abrir_sessao
+from .busca import LIMITE_BUSCA, buscar_pratos, buscar_clientes
+from .cache import TTL_CACHE_CARDAPIO, cache_cardapio, pratos_da_categoria
+from .consultas import (consulta_pratos_por_preco, consulta_clientes_por_telefone, linhas_clientes_pedidos,
+                        pratos_nao_pedidos)
+from .instrumentacao import estatisticas_consultas
+from .crud import (criar_categoria, criar_prato, criar_cliente, criar_pedido_com_itens, ler_categoria,
+                   ler_prato, ler_cliente, ler_pedido, iterar_categorias, iterar_pratos, iterar_clientes,
+                   iterar_pedidos, atualizar_categoria, atualizar_prato, atualizar_cliente, atualizar_pedido,
+                   excluir_categoria, excluir_prato, excluir_cliente, excluir_pedido, ConflitoDeVersao,
+                   RegistroEmUso)
+from .lote import criar_pedidos_em_lote, gravar_pedidos
+
+TRABALHADORES_PADRAO = 16
+TAMANHO_MAXIMO_GRUPO = 500
+LIMITE_PADRAO = 100
+
+class ErroHTTP(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+#Conversão para JSON
+
+def _para_json(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if hasattr(valor, "__table__"):
+        dados = {coluna.key: getattr(valor, coluna.key) for coluna in valor.__table__.columns}
+        #Os itens de um pedido entram apenas quando já foram carregados (ler_pedido, criar_pedido_com_itens)
+        if "itens" in vars(valor):
+            dados["itens"] = valor.itens
+        return dados
+    if hasattr(valor, "_asdict"):
+        return valor._asdict()
+    raise TypeError(f"Objeto do tipo {type(valor).__name__} não é serializável")
+
+def _serializar(dados):
+    return json.dumps(dados, default=_para_json, ensure_ascii=False).encode("utf-8")
+
+#Agrupamento de inserções de pedidos
+
+class AgrupadorPedidos:
+    def __init__(self, tamanho_maximo=TAMANHO_MAXIMO_GRUPO):
+        self.tamanho_maximo = tamanho_maximo
+        self._fila = queue.Queue()
+        self._thread = threading.Thread(target=self._executar, name="agrupador-pedidos", daemon=True)
+        self._thread.start()
+
+    def enviar(self, id_cliente, id_prato, data_pedido):
+        #Bloqueia a thread do pedido HTTP até o grupo ser gravado; retorna o ID ou lança ValueError
+        futuro = Future()
+        self._fila.put(((id_cliente, id_prato, data_pedido), futuro))
+        return futuro.result()
+
+    def encerrar(self):
+        self._fila.put(None)
+        self._thread.join()
+
+    def _executar(self):
+        while True:
+            #Sem espera fixa: enquanto um grupo é gravado, os pedidos seguintes se acumulam e formam o próximo
+            grupo = [self._fila.get()]
+            while grupo[-1] is not None and len(grupo) < self.tamanho_maximo:
+                try:
+                    grupo.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            if grupo[-1] is None:
+                grupo.pop()
+                if grupo:
+                    self._gravar(grupo)
+                return
+            self._gravar(grupo)
+
+    def _gravar(self, grupo):
+        try:
+            with abrir_sessao() as session:
+                resultados = gravar_pedidos(session, [pedido for pedido, _ in grupo])
+                session.commit()
+        except Exception as e:
+            for _, futuro in grupo:
+                futuro.set_exception(e)
+            return
+        for (_, futuro), resultado in zip(grupo, resultados):
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+#Respostas do cardápio com ETag
+
+class CacheRespostas:
+    #Guarda o corpo já serializado por caminho enquanto a geração do cache do cardápio não mudar
+    def __init__(self, ttl=TTL_CACHE_CARDAPIO):
+        self.ttl = ttl
+        self._respostas = {}
+        self._trava = threading.Lock()
+
+    def obter(self, chave, gerar):
+        geracao = cache_cardapio.geracao
+        agora = time.monotonic()
+        with self._trava:
+            resposta = self._respostas.get(chave)
+        if resposta is not None and resposta[0] == geracao and resposta[1] > agora:
+            return resposta[2], resposta[3]
+        corpo = _serializar(gerar())
+        etag = '"' + hashlib.sha1(corpo).hexdigest() + '"'
+        with self._trava:
+            self._respostas[chave] = (geracao, agora + self.ttl, etag, corpo)
+        return etag, corpo
+
+#Parâmetros
+
+def _inteiro(valor, nome):
+    #true/false e números com parte fracionária do JSON não viram 1/0 nem são truncados
+    if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+        raise ErroHTTP(400, f"{nome} deve ser um número inteiro")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroHTTP(400, f"{nome} deve ser um número inteiro")
+
+def _texto(valor, nome):
+    if not isinstance(valor, str):
+        raise ErroHTTP(400, f"{nome} deve ser um texto")
+    return valor
+
+def _data(valor, nome):
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErroHTTP(400, f"{nome} deve estar no formato AAAA-MM-DD")
+
+def _opcional(parametros, nome, converter):
+    valor = parametros.get(nome)
+    return converter(valor, nome) if valor not in (None, "") else None
+
+def _obrigatorio(corpo, nome, converter=None):
+    if nome not in corpo:
+        raise ErroHTTP(400, f"campo obrigatório ausente: {nome}")
+    return converter(corpo[nome], nome) if converter else corpo[nome]
+
+def _encontrado(registro, descricao):
+    if registro is None:
+        raise ErroHTTP(404, f"{descricao} não encontrado(a)")
+    return registro
+
+#Manipulador HTTP
+
+class ManipuladorPedidos(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    #Cabeçalho e corpo saem em escritas separadas; sem isto o atraso de ACK do cliente soma ~40 ms por resposta
+    disable_nagle_algorithm = True
+    #Conexões keep-alive ociosas liberam a thread depois deste tempo
+    timeout = 30
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+    def do_PUT(self):
+        self._despachar("PUT")
+
+    def do_DELETE(self):
+        self._despachar("DELETE")
+
+    def log_message(self, formato, *argumentos):
+        if self.server.registrar_acessos:
+            super().log_message(formato, *argumentos)
+
+    def _despachar(self, metodo):
+        url = urlsplit(self.path)
+        parametros = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+        try:
+            for metodo_rota, padrao, nome_funcao in ROTAS:
+                encontrado = padrao.fullmatch(url.path)
+                if metodo_rota == metodo and encontrado:
+                    resultado = getattr(self, nome_funcao)(parametros, *encontrado.groups())
+                    if resultado is not None:
+                        self._responder(*resultado)
+                    return
+            raise ErroHTTP(404, "rota não encontrada")
+        except ErroHTTP as e:
+            self._responder_json(e.status, {"erro": str(e)})
+        except ConflitoDeVersao as e:
+            self._responder_json(409, {"erro": str(e), "versao_atual": e.versao_atual})
+        except RegistroEmUso as e:
+            self._responder_json(409, {"erro": str(e)})
+        except ValueError as e:
+            self._responder_json(422, {"erro": str(e)})
+        except Exception as e:
+            self._responder_json(500, {"erro": f"{type(e).__name__}: {e}"})
+
+    def _corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if not tamanho:
+            return {}
+        try:
+            return json.loads(self.rfile.read(tamanho))
+        except ValueError:
+            raise ErroHTTP(400, "corpo JSON inválido")
+
+    def _responder(self, status, corpo, cabecalhos=()):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _responder_json(self, status, dados):
+        self._responder(status, _serializar(dados))
+
+    def _ok(self, dados, status=200):
+        return status, _serializar(dados)
+
+    def _cardapio(self, chave, gerar):
+        etag, corpo = self.server.respostas.obter(chave, gerar)
+        cabecalhos = [("ETag", etag), ("Cache-Control", "no-cache")]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            for nome, valor in cabecalhos:
+                self.send_header(nome, valor)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        return 200, corpo, cabecalhos
+
+    def _pagina(self, iterar, parametros):
+        limite = _opcional(parametros, "limite", _inteiro) or LIMITE_PADRAO
+        apos = _opcional(parametros, "apos", _inteiro)
+        return self._ok(list(islice(iterar(min(limite, 1000), apenas_colunas=True, apos=apos), limite)))
+
+    #Categorias
+
+    def listar_categorias(self, parametros):
+        return self._cardapio("categorias", lambda: list(iterar_categorias(apenas_colunas=True)))
+
+    def criar_categoria(self, parametros):
+        corpo = self._corpo()
+        categoria = criar_categoria(_obrigatorio(corpo, "nome_categoria", _texto))
+        return self._ok(_encontrado(categoria, "categoria"), 201)
+
+    def ler_categoria(self, parametros, id_categoria):
+        return self._ok(_encontrado(ler_categoria(int(id_categoria)), "categoria"))
+
+    def atualizar_categoria(self, parametros, id_categoria):
+        corpo = self._corpo()
+        categoria = atualizar_categoria(int(id_categoria), _obrigatorio(corpo, "nome_categoria", _texto),
+                                        _opcional(corpo, "versao", _inteiro))
+        return self._ok(_encontrado(categoria, "categoria"))
+
+    def excluir_categoria(self, parametros, id_categoria):
+        removidos = _encontrado(excluir_categoria(int(id_categoria)), "categoria")
+        return self._ok({"excluido": True, **removidos})
+
+    #Pratos
+
+    def listar_pratos(self, parametros):
+        id_categoria = _opcional(parametros, "categoria", _inteiro)
+        if id_categoria is not None:
+            return self._cardapio(f"pratos?categoria={id_categoria}",
+                                  lambda: [prato._asdict() for prato in pratos_da_categoria(id_categoria)])
+        return self._cardapio("pratos", lambda: list(iterar_pratos(apenas_colunas=True)))
+
+    def criar_prato(self, parametros):
+        corpo = self._corpo()
+        prato = criar_prato(_obrigatorio(corpo, "nome_prato", _texto), _obrigatorio(corpo, "preco", _inteiro),
+                            _obrigatorio(corpo, "id_categoria", _inteiro))
+        return self._ok(_encontrado(prato, "categoria do prato"), 201)
+
+    def ler_prato(self, parametros, id_prato):
+        return self._ok(_encontrado(ler_prato(int(id_prato)), "prato"))
+
+    def atualizar_prato(self, parametros, id_prato):
+        corpo = self._corpo()
+        prato = atualizar_prato(int(id_prato), _opcional(corpo, "nome_prato", _texto),
+                                _opcional(corpo, "preco", _inteiro), _opcional(corpo, "id_categoria", _inteiro),
+                                _opcional(corpo, "versao", _inteiro))
+        return self._ok(_encontrado(prato, "prato"))
+
+    def excluir_prato(self, parametros, id_prato):
+        _encontrado(excluir_prato(int(id_prato)), "prato")
+        return self._ok({"excluido": True})
+
+    #Clientes
+
+    def listar_clientes(self, parametros):
+        telefone = parametros.get("telefone")
+        if telefone:
+            with abrir_sessao() as session:
+                return self._ok(session.execute(consulta_clientes_por_telefone(telefone)).scalars().all())
+        return self._pagina(iterar_clientes, parametros)
+
+    def criar_cliente(self, parametros):
+        corpo = self._corpo()
+        cliente = criar_cliente(_obrigatorio(corpo, "nome_cliente", _texto), _obrigatorio(corpo, "telefone", _texto))
+        return self._ok(_encontrado(cliente, "cliente"), 201)
+
+    def ler_cliente(self, parametros, id_cliente):
+        return self._ok(_encontrado(ler_cliente(int(id_cliente)), "cliente"))
+
+    def atualizar_cliente(self, parametros, id_cliente):
+        corpo = self._corpo()
+        cliente = atualizar_cliente(int(id_cliente), _opcional(corpo, "nome_cliente", _texto),
+                                    _opcional(corpo, "telefone", _texto), _opcional(corpo, "versao", _inteiro))
+        return self._ok(_encontrado(cliente, "cliente"))
+
+    def excluir_cliente(self, parametros, id_cliente):
+        removidos = _encontrado(excluir_cliente(int(id_cliente)), "cliente")
+        return self._ok({"excluido": True, **removidos})
+
+    #Pedidos
+
+    def listar_pedidos(self, parametros):
+        return self._pagina(iterar_pedidos, parametros)
+
+    def criar_pedido(self, parametros):
+        #{"id_cliente", "data_pedido", "itens": [{"id_prato", "quantidade"}]} cria um pedido com vários itens;
+        #{"id_cliente", "id_prato", "data_pedido"} cria um pedido de um prato pelo agrupador
+        corpo = self._corpo()
+        if "itens" in corpo:
+            itens = corpo["itens"]
+            if not isinstance(itens, list) or not all(isinstance(item, dict) for item in itens):
+                raise ErroHTTP(400, "itens deve ser uma lista de objetos {id_prato, quantidade}")
+            pedido = criar_pedido_com_itens(
+                _obrigatorio(corpo, "id_cliente", _inteiro),
+                _obrigatorio(corpo, "data_pedido", _data),
+                [(_obrigatorio(item, "id_prato", _inteiro), _inteiro(item.get("quantidade", 1), "quantidade"))
+                 for item in itens])
+            if pedido is None:
+                raise ErroHTTP(422, "pedido não criado: cliente, prato ou quantidade inválidos")
+            return self._ok(pedido, 201)
+        id_pedido = self.server.agrupador.enviar(
+            _obrigatorio(corpo, "id_cliente", _inteiro),
+            _obrigatorio(corpo, "id_prato", _inteiro),
+            _obrigatorio(corpo, "data_pedido", _data))
+        return self._ok({"id_pedido": id_pedido}, 201)
+
+    def criar_pedidos_em_lote(self, parametros):
+        corpo = self._corpo()
+        if not isinstance(corpo, list):
+            raise ErroHTTP(400, "esperada uma lista de pedidos")
+        resultado = criar_pedidos_em_lote(corpo)
+        return self._ok({"inseridos": resultado["inseridos"],
+                         "rejeitados": [{"linha": linha, "motivo": motivo}
+                                        for linha, motivo in resultado["rejeitados"]]})
+
+    def ler_pedido(self, parametros, id_pedido):
+        return self._ok(_encontrado(ler_pedido(int(id_pedido)), "pedido"))
+
+    def atualizar_pedido(self, parametros, id_pedido):
+        corpo = self._corpo()
+        pedido = atualizar_pedido(
+            int(id_pedido),
+            _opcional(corpo, "id_cliente", _inteiro),
+            _opcional(corpo, "id_prato", _inteiro),
+            _opcional(corpo, "data_pedido", _data),
+            _opcional(corpo, "versao", _inteiro))
+        if pedido is None and ler_pedido(int(id_pedido)) is not None:
+            raise ErroHTTP(422, "o prato só pode ser trocado em pedidos de um item e por um prato existente")
+        return self._ok(_encontrado(pedido, "pedido"))
+
+    def excluir_pedido(self, parametros, id_pedido):
+        _encontrado(excluir_pedido(int(id_pedido)), "pedido")
+        return self._ok({"excluido": True})
+
+    #Busca textual
+
+    def buscar(self, parametros, tabela):
+        buscar = buscar_pratos if tabela == "pratos" else buscar_clientes
+        limite = _opcional(parametros, "limite", _inteiro) or LIMITE_BUSCA
+        return self._ok(buscar(parametros.get("q", ""), min(limite, 100)))
+
+    #Álgebra relacional
+
+    def selecao(self, parametros):
+        preco_minimo = _opcional(parametros, "preco_minimo", _inteiro) or 0
+        with abrir_sessao() as session:
+            return self._ok(session.execute(consulta_pratos_por_preco(preco_minimo)).scalars().all())
+
+    def projecao(self, parametros):
+        return self._pagina(lambda tamanho, apenas_colunas, apos: (
+            {"id_cliente": id_cliente, "nome_cliente": nome, "telefone": telefone}
+            for id_cliente, nome, telefone in iterar_clientes(tamanho, apenas_colunas, apos)), parametros)
+
+    def juncao(self, parametros):
+        return self._ok(list(linhas_clientes_pedidos(
+            _opcional(parametros, "data_inicio", _data),
+            _opcional(parametros, "data_fim", _data),
+            _opcional(parametros, "limite", _inteiro) or LIMITE_PADRAO)))
+
+    def diferenca(self, parametros):
+        return self._ok(list(pratos_nao_pedidos(_opcional(parametros, "dias", _inteiro))))
+
+    #Registro de alterações
+
+    def listar_alteracoes(self, parametros):
+        apos = _opcional(parametros, "apos", _inteiro)
+        if apos is None:
+            consumidor = parametros.get("consumidor")
+            apos = posicao_consumidor(consumidor) if consumidor else 0
+        limite = _opcional(parametros, "limite", _inteiro) or LOTE_ALTERACOES
+        tabelas = parametros["tabelas"].split(",") if parametros.get("tabelas") else None
+        alteracoes = ler_alteracoes(apos, min(limite, 5000), tabelas)
+        return self._ok({"apos": apos, "alteracoes": alteracoes})
+
+    def confirmar_alteracoes(self, parametros):
+        corpo = self._corpo()
+        consumidor = _obrigatorio(corpo, "consumidor")
+        confirmar_alteracoes(consumidor, _obrigatorio(corpo, "ate", _inteiro))
+        return self._ok({"consumidor": consumidor, "posicao": posicao_consumidor(consumidor)})
+
+    #Estatísticas de consultas
+
+    def estatisticas(self, parametros):
+        return self._ok(estatisticas_consultas())
+
+ROTAS = [(metodo, re.compile(padrao), funcao) for metodo, padrao, funcao in [
+    ("GET", r"/categorias", "listar_categorias"),
+    ("POST", r"/categorias", "criar_categoria"),
+    ("GET", r"/categorias/(\d+)", "ler_categoria"),
+    ("PUT", r"/categorias/(\d+)", "atualizar_categoria"),
+    ("DELETE", r"/categorias/(\d+)", "excluir_categoria"),
+    ("GET", r"/pratos", "listar_pratos"),
+    ("POST", r"/pratos", "criar_prato"),
+    ("GET", r"/pratos/(\d+)", "ler_prato"),
+    ("PUT", r"/pratos/(\d+)", "atualizar_prato"),
+    ("DELETE", r"/pratos/(\d+)", "excluir_prato"),
+    ("GET", r"/clientes", "listar_clientes"),
+    ("POST", r"/clientes", "criar_cliente"),
+    ("GET", r"/clientes/(\d+)", "ler_cliente"),
+    ("PUT", r"/clientes/(\d+)", "atualizar_cliente"),
+    ("DELETE", r"/clientes/(\d+)", "excluir_cliente"),
+    ("GET", r"/pedidos", "listar_pedidos"),
+    ("POST", r"/pedidos", "criar_pedido"),
+    ("POST", r"/pedidos/lote", "criar_pedidos_em_lote"),
+    ("GET", r"/pedidos/(\d+)", "ler_pedido"),
+    ("PUT", r"/pedidos/(\d+)", "atualizar_pedido"),
+    ("DELETE", r"/pedidos/(\d+)", "excluir_pedido"),
+    ("GET", r"/busca/(pratos|clientes)", "buscar"),
+    ("GET", r"/algebra/selecao", "selecao"),
+    ("GET", r"/algebra/projecao", "projecao"),
+    ("GET", r"/algebra/juncao", "juncao"),
+    ("GET", r"/algebra/diferenca", "diferenca"),
+    ("GET", r"/alteracoes", "listar_alteracoes"),
+    ("POST", r"/alteracoes/confirmar", "confirmar_alteracoes"),
+    ("GET", r"/stats", "estatisticas"),
+]]
+
+#Servidor com pool de threads
+
+class ServidorPedidos(HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, trabalhadores=TRABALHADORES_PADRAO, registrar_acessos=False):
+        super().__init__(endereco, ManipuladorPedidos)
+        self.registrar_acessos = registrar_acessos
+        self.agrupador = AgrupadorPedidos()
+        self.respostas = CacheRespostas()
+        self._pool = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="http")
+
+    def process_request(self, requisicao, endereco):
+        self._pool.submit(self._atender, requisicao, endereco)
+
+    def _atender(self, requisicao, endereco):
+        try:
+            self.finish_request(requisicao, endereco)
+        except Exception:
+            self.handle_error(requisicao, endereco)
+        finally:
+            self.shutdown_request(requisicao)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+        self.agrupador.encerrar()
+
+def servir(host="127.0.0.1", porta=8000, trabalhadores=TRABALHADORES_PADRAO, registrar_acessos=True):
+    servidor = ServidorPedidos((host, porta), trabalhadores, registrar_acessos)
+    print(f"Servindo em http://{host}:{servidor.server_address[1]} com {trabalhadores} trabalhadores (Ctrl+C encerra)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()